@@ -19,6 +19,7 @@ class BotCommand(object):
     """Create Geo object from Slack event"""
     def __init__(self, event, user):
         self.text = event['text']
+        self.channel = event.get('channel')
         self.api_key = os.environ.get('MYSPORTSFEEDS_API_KEY')
         self.config = get_config('sports.json')
         self.parsed_args = SlackArgParse(self.config['valid_args'], self.config['options'], event['text'])
@@ -28,7 +29,6 @@ class BotCommand(object):
         self.player = self._get_player()
         self.team_name = self._get_team_name()
         self.matchup = self._get_matchup()
-        self.response = self.run_cmd()
 
     def run_cmd(self):
         if self.text.split()[1] == 'help':
@@ -41,7 +41,7 @@ class BotCommand(object):
                 'mlb': SlackMLB
             }
             command = league_command.get(self.league)
-            response = command(self.args, self.option, self.team_name, self.player)
+            response = command(self.args, self.option, self.team_name, self.player, channel=self.channel)
         return response.reply
 
     def example_request(self):
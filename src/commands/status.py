@@ -0,0 +1,29 @@
+from utils.BotTools import get_config
+from utils.metrics import METRICS
+
+
+class BotCommand(object):
+    """Create status object from Slack event"""
+    def __init__(self, event, user):
+        self.config = get_config('status.json')
+        self.text = event["text"]
+
+    def run_cmd(self):
+        """
+        Return Slack formatted reply with the bot's runtime metrics
+        """
+        if self.text.split()[1:2] == ['help']:
+            return "\n".join(self.config['help'])
+        snapshot = METRICS.snapshot()
+        reply = [":robot_face: *JalBot Status*"]
+        for section in ('gauges', 'counters'):
+            values = snapshot[section]
+            if not values:
+                continue
+            reply.append(f"*{section.capitalize()}*")
+            for name in sorted(values):
+                value = values[name]
+                if isinstance(value, float):
+                    value = round(value, 3)
+                reply.append(f">*{name}: `{value}`*")
+        return "\n".join(reply)
@@ -5,13 +5,13 @@ import logging
 import os
 import redis
 import requests
-import socket
-import time
 
 from urllib3 import exceptions
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from utils import codec, http_client
+
 
 class NBATeamError(Exception):
     """Base class for NBATeam Errors"""
@@ -97,7 +97,7 @@ class NBATeam(object):
             raise NBATeamError('API Connection Error')
         if request.status_code != 200:
             raise NBATeamError(f'Error with API request: {request.status_code}')
-        data = request.json()
+        data = codec.response_json(request)
 
         return data
 
@@ -197,7 +197,7 @@ class NBATeam(object):
             raise NBATeamError('API Connection Error')
         if request.status_code != 200:
             raise NBATeamError(f'Error with API request: {request.status_code}')
-        data = request.json()
+        data = codec.response_json(request)
         #print(json.dumps(data, indent=4))
         return data
 
@@ -273,20 +273,13 @@ class NHLTeam:
         """
         retries = Retry(total=5, backoff_factor=1, status_forcelist=[ 502, 503, 504 ])
         self.session.mount('http://', HTTPAdapter(max_retries=retries))
-        try:
-            request = self.session.get(url)
-        except socket.gaierror:
-            time.sleep(1)
-            request = self.session.get(url)
-        except requests.exceptions.ConnectionError:
-            time.sleep(2)
-            request = self.session.get(url)
+        request = http_client.retry_policy(url).call(self.session.get, url)
 
         if request.status_code != 200:
             logging.error(f"Error with NHL API request | status: {request.status_code}\n{request.content}")
             data = None
         else:
-            data = request.json()
+            data = codec.response_json(request)
         return data
 
     def get_team_info(self, team):
@@ -427,7 +420,7 @@ class NHLTeam:
         request = requests.get(url)
         if request.status != 200:
             raise NHLTeamError('Error with API request')
-        data = request.json()
+        data = codec.response_json(request)
         return data
 
 
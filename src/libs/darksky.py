@@ -1,12 +1,9 @@
 import json
 import logging
 import os
-import requests
-import socket
-import time
 
-from requests.exceptions import ConnectionError
-from urllib3.exceptions import NewConnectionError
+from utils import codec, http_client
+from utils.BotTools import set_timeout
 
 
 class DarkSky:
@@ -40,25 +37,10 @@ class DarkSky:
             return
         url = f"{self._base_url}{coordinates}"
         logging.info(url)
-        try:
-            request = requests.get(url)
-        except (socket.gaierror, NewConnectionError, ConnectionError):
-            logging.error('What The Fuck?')
-            time.sleep(1)
-            try:
-                request = requests.get(url)
-            except NewConnectionError:
-                logging.error('New Connection Error')
-                time.sleep(1)
-                try:
-                    request = requests.get(url)
-                except requests.exceptions.ConnectionError:
-                    logging.info('Connection Error')
-                    time.sleep(1)
-                    request = requests.get(url)
+        request = http_client.get(url, timeout=set_timeout(10))
         logging.info(request.status_code)
         if request.status_code == 200:
-            return request.json()
+            return codec.response_json(request)
 
     def get_all_weather(self):
         logging.info(f"Coordinates: {self.coordinates}")
@@ -1,10 +1,8 @@
 import logging
 import os
-import requests
-import socket
-import time
 
-from urllib3.exceptions import NewConnectionError
+from utils import codec, http_client
+from utils.BotTools import set_timeout
 
 
 class GoogleMaps:
@@ -24,25 +22,10 @@ class GoogleMaps:
             'fields': 'geometry/location',
             'key': api_key
         }
-        try:
-            request = requests.get(url, params=params, verify=False)
-        except socket.gaierror:
-            logging.error('SOCKET GAIERROR')
-            time.sleep(1)
-            try:
-                request = requests.get(url, params=params, verify=False)
-            except NewConnectionError:
-                logging.error('New Connection Error')
-                time.sleep(1)
-                try:
-                    request = requests.get(url, params=params, verify=False)
-                except requests.exceptions.ConnectionError:
-                    logging.info('Connection Error')
-                    time.sleep(1)
-                    request = requests.get(url, params=params, verify=False)
+        request = http_client.get(url, params=params, verify=False, timeout=set_timeout(10))
         logging.info(request.status_code)
         if request.status_code == 200:
-            return request.json()
+            return codec.response_json(request)
 
     @property
     def coordinates(self):
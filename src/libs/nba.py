@@ -9,7 +9,8 @@ from pytz import timezone
 from pymemcache.client.base import Client
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
-from utils.BotTools import get_config
+from utils import codec, http_cache, http_client
+from utils.BotTools import get_config, set_timeout
 from utils.exceptions import NBAException
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
@@ -24,14 +25,14 @@ CONFIG = get_config('nba.json')
 def json_serializer(key, value):
     if type(value) == str:
         return value, 1
-    return json.dumps(value), 2
+    return codec.dumps(value), 2
 
 
 def json_deserializer(key, value, flags):
     if flags == 1:
         return value.decode('utf-8')
     if flags == 2:
-        return json.loads(value.decode('utf-8'))
+        return codec.loads(value)
     raise Exception("Unknown serialization format")
 
 
@@ -58,24 +59,22 @@ def fetch_data(session, url, params):
     }
 
     try:
-        request = session.get(url, headers=headers, params=params, verify=False, timeout=5)
+        request = http_cache.get(session, url, headers=headers, params=params, verify=False, timeout=set_timeout(5))
     except requests.exceptions.Timeout as err:
         err_message = [
             'Unable to connect to stats.nba.com API.',
             'Connection timed out'
         ]
         raise NBAException("\n".join(err_message))
-    except requests.exceptions.ConnectionError:
-        request = session.get(url, headers=headers, params=params, verify=False)
-    print(request.status_code)
+    logging.debug(f"stats.nba.com {url} | {request.status_code}")
     if request.status_code == 200:
-        data = request.json()
+        data = codec.response_json(request)
         #logging.info(json.dumps(data, indent=2))
         # for i in data['resultSets']:
         #    logging.info(i['name'])
         return data['resultSets']
     else:
-        print(request.status_code)
+        logging.error(f"stats.nba.com request failed | {url} {request.status_code}")
 
 
 class NBA:
@@ -83,7 +82,7 @@ class NBA:
     Create NBA team object
     """
     def __init__(self):
-        self._session = requests.session()
+        self._session = http_client.session(BASE_URL)
         self._date = datetime.datetime.now(timezone('US/Eastern'))
 
 
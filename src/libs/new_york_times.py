@@ -1,8 +1,8 @@
 import logging
 import requests
-import socket
 
-from urllib3 import exceptions
+from utils import codec, http_cache, http_client
+from utils.BotTools import set_timeout
 
 
 class NYTimesError(Exception):
@@ -15,7 +15,7 @@ class NYTimes:
     Create news article object from the New York Times API
     """
     def __init__(self, api_key):
-        self.session = requests.session()
+        self.session = http_client.session('https://api.nytimes.com/')
         self.key = api_key
 
     def _nyt_request(self, url):
@@ -24,20 +24,15 @@ class NYTimes:
         """
         headers = {"api-key": self.key}
         try:
-            request = self.session.get(url, headers=headers)
-        except socket.gaierror as err:
-            print("SOCKET ERROR")
-            print(err.__class__.__name__)
-        except exceptions.NewConnectionError as err:
-            print('NEW CONNECTION ERROR')
-        except ConnectionError as err:
-            print('CONNECTION ERROR')
-        print(request.status_code)
+            request = http_cache.get(self.session, url, headers=headers, timeout=set_timeout(10))
+        except requests.exceptions.ConnectionError as err:
+            logging.error(f"Error connecting to NYT API | {err.__class__.__name__}")
+            return None
         if request.status_code != 200:
             logging.error(f"Error with NYT API request | status: {request.status_code}\n{request.content}")
             data = None
         else:
-            data = request.json()
+            data = codec.response_json(request)
         return data
 
     def get_articles(self, news_subject=None):
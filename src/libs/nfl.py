@@ -1,4 +1,3 @@
-import aiohttp
 import asyncio
 import base64
 import datetime
@@ -6,11 +5,11 @@ import json  # noqa
 import logging
 import os
 import requests
-import socket
-import time
 
-from utils.BotTools import get_config
+from utils import codec, http_cache, http_client
+from utils.BotTools import get_config, set_timeout
 from utils.exceptions import NFLRequestException
+from utils.exceptions import UpstreamResponseError
 
 
 class NFL:
@@ -23,7 +22,7 @@ class NFL:
         self.password = os.environ.get('MYSPORTSFEEDS_PASSWORD')
         self.date = datetime.datetime.now()
         self.base_url = f"https://api.mysportsfeeds.com/v{self.version}/pull/nfl/"
-        self.session = requests.session()
+        self.session = http_client.session(self.base_url)
         self.league_schedule = self.get_schedule()
         self.upcoming_games = self.get_games_by_week()
         self.config = get_config('nfl_config.json')
@@ -138,18 +137,11 @@ class NFL:
         Request data from Mysportsfeeds API
         """
         logging.info(f"URL | {url}")
-        session = requests.session()
-        try:
-            request = session.get(url, headers=self._headers(), verify=False)
-        except socket.gaierror:
-            time.sleep(1)
-            request = session.get(url, headers=self._headers(), verify=False)
-        except requests.exceptions.ConnectionError:
-            time.sleep(2)
-            request = session.get(url, headers=self._headers(), verify=False)
+        session = http_client.session(url)
+        request = http_cache.get(session, url, headers=self._headers(), verify=False, timeout=set_timeout(10))
         if request.status_code != 200:
             raise NFLRequestException(f"{request.status_code} Error with Mysportsfeeds API request")
-        data = request.json()
+        data = codec.response_json(request)
         return data
 
     def get_schedule(self, team_abbreviation=None):
@@ -200,37 +192,30 @@ class NFL:
     async def fetch_game_results(self, season, game, type):
         url = f"{self.base_url}{season}-regular/game_boxscore.json?gameid={game['id']}&playerstats=none"
         logging.info(url)
-        async with aiohttp.ClientSession() as self.session:
-            async with self.session.get(url, headers=self._headers()) as response:
-                try:
-                    data = await response.json()
-                except aiohttp.client_exceptions.ContentTypeError as err:
-                    if 'status' in dir(response):
-                        logging.info(response.status)
-                    logging.error(f"Error retrieving data from Mysportsfeeds API\n\n{err}")
-                    data = None
-                    pass
-                    # raise NFLRequestException(f"Error retrieving data from Mysportsfeeds API\n\n{response.status}\n{response.reason}\n{response.raw_headers}\n{response.content}")
-            if data:
-                game_score = data['gameboxscore']['quarterSummary']['quarterTotals']
-                game['game_score'] = game_score
-                if type == 'team':
-                    self.team_game_results.append(game)
-                elif type == 'league':
-                    self.league_game_results.append(game)
+        try:
+            data = await http_cache.async_get_json(url, timeout=set_timeout(10), headers=self._headers())
+        except UpstreamResponseError as err:
+            logging.info(err.status)
+            logging.error(f"Error retrieving data from Mysportsfeeds API\n\n{err}")
+            data = None
+        if data:
+            game_score = data['gameboxscore']['quarterSummary']['quarterTotals']
+            game['game_score'] = game_score
+            if type == 'team':
+                self.team_game_results.append(game)
+            elif type == 'league':
+                self.league_game_results.append(game)
 
     async def fetch_standings(self):
         url = "https://api.mysportsfeeds.com/v2.0/pull/nfl/2018-regular/standings.json"
-        async with aiohttp.ClientSession() as self.session:
-            async with self.session.get(url, headers=self._headers('MYSPORTSFEEDS')) as response:
-                try:
-                    data = await response.json()
-                except aiohttp.client_exceptions.ContentTypeError:
-                    logging.error("Error retrieving data from Mysportsfeeds API")
-                    raise NFLRequestException(f"Error retrieving data from Mysportsfeeds API")
-            if data:
-                teams_list = data['teams']
-                self.standings_data = teams_list
+        try:
+            data = await http_cache.async_get_json(url, timeout=set_timeout(10), headers=self._headers('MYSPORTSFEEDS'))
+        except UpstreamResponseError:
+            logging.error("Error retrieving data from Mysportsfeeds API")
+            raise NFLRequestException(f"Error retrieving data from Mysportsfeeds API")
+        if data:
+            teams_list = data['teams']
+            self.standings_data = teams_list
 
     def parse_division_standings(self):
         stats = self.fetch_team_stats()
@@ -328,31 +313,26 @@ class NFLTeam(NFL):
 
     async def fetch_game_logs(self, team_abbreviation):
         url = f"{self.base_url}{self.season}-regular/team_gamelogs.json?team={team_abbreviation}"
-        async with aiohttp.ClientSession() as self.session:
-            async with self.session.get(url, headers=self._headers()) as response:
-                data = await response.json()
-                return data
+        data = await http_cache.async_get_json(url, timeout=set_timeout(10), headers=self._headers())
+        return data
 
     async def fetch_team_game_results(self, season, game):
         url = f"{self.base_url}{season}-regular/game_boxscore.json?gameid={game['id']}&playerstats=none"
-        async with aiohttp.ClientSession() as self.session:
-            async with self.session.get(url, headers=self._headers()) as response:
-                try:
-                    data = await response.json()
-                except aiohttp.client_exceptions.ContentTypeError:
-                    logging.error("Error retrieving data from Mysportsfeeds API")
-                    data = None
-                    pass
-                if data:
-                    quarter_summary = data['gameboxscore']['quarterSummary']
-                    game_score = data['gameboxscore']['quarterSummary']['quarterTotals']
-                    away_stats = data['gameboxscore']['awayTeam']['awayTeamStats']
-                    home_stats = data['gameboxscore']['homeTeam']['homeTeamStats']
-                    game['quarter_summary'] = quarter_summary
-                    game['game_score'] = game_score
-                    game['awayTeam']['stats'] = away_stats
-                    game['homeTeam']['stats'] = home_stats
-                    self.team_game_results.append(game)
+        try:
+            data = await http_cache.async_get_json(url, timeout=set_timeout(10), headers=self._headers())
+        except UpstreamResponseError:
+            logging.error("Error retrieving data from Mysportsfeeds API")
+            data = None
+        if data:
+            quarter_summary = data['gameboxscore']['quarterSummary']
+            game_score = data['gameboxscore']['quarterSummary']['quarterTotals']
+            away_stats = data['gameboxscore']['awayTeam']['awayTeamStats']
+            home_stats = data['gameboxscore']['homeTeam']['homeTeamStats']
+            game['quarter_summary'] = quarter_summary
+            game['game_score'] = game_score
+            game['awayTeam']['stats'] = away_stats
+            game['homeTeam']['stats'] = home_stats
+            self.team_game_results.append(game)
 
     async def gather_team_game_results(self):
         """
@@ -663,7 +643,7 @@ def main():
     url = 'https://api.mysportsfeeds.com/v2.0/pull/nfl/2018-regular/date/20181126/games.json'
     req = requests.get(url, headers=headers, verify=False)
     print(req.status_code)
-    print(json.dumps(req.json(), indent=2))
+    print(json.dumps(codec.response_json(req), indent=2))
 
     #game = nfl.get_game_results('46169')
     # games = nfl.get_team_schedule('ne')
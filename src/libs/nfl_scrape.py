@@ -2,11 +2,12 @@ import datetime
 import json
 import os
 import requests
-import socket
-import time
 
 from bs4 import BeautifulSoup
 
+from utils import http_cache, http_client
+from utils.BotTools import set_timeout
+
 # from utils.BotTools import get_config
 def get_config(config_file):
     """
@@ -58,13 +59,9 @@ class NFLScrape:
             season = self.current_season
         url = self.base_url.format(self.team_abbreviation, season)
         try:
-            request = requests.get(url)
-        except (socket.gaierror, requests.exceptions.ConnectionError):
-            time.sleep(2)
-            try:
-                request = requests.get(url)
-            except requests.exceptions.ConnectionError as err:
-                raise NFLScrapeException(f"Error connecting to server: {err}")
+            request = http_cache.get(http_client.session(url), url, timeout=set_timeout(20))
+        except requests.exceptions.ConnectionError as err:
+            raise NFLScrapeException(f"Error connecting to server: {err}")
         if request.status_code != 200:
             error = f"Error requesting page content: {request.status_code}"
             raise NFLScrapeException(error)
@@ -2,68 +2,62 @@ import datetime
 import json
 import logging
 import redis
-import requests
-import socket
 import sys
-import time
 
 from datetime import timedelta
 from pytz import timezone
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
+from libs import nhl_schedule
+from utils import codec, http_cache, http_client
+from utils.BotTools import set_timeout
+from utils.lazy import is_loaded, lazy_property
 from utils.exceptions import NHLException
 from utils.exceptions import NHLTeamException
 from utils.exceptions import NHLPlayerException
 from utils.exceptions import NHLRequestException
+from utils.exceptions import UpstreamResponseError
 
 
 class NHL:
     """
     Create NHL object
+
+    Schedule and standings data is memoised on the object, so one NHL
+    object serves every read made while building a reply.
     """
     def __init__(self):
         self._date = datetime.datetime.now(timezone('US/Eastern'))
-        self._session = requests.session()
         self._config = self._get_config()
         self._base_url = 'https://statsapi.web.nhl.com/api/v1/'
+        self._session = http_client.session(self._base_url)
         self._team_list = self._config['teams']
 
-    @property
+    @lazy_property
     def todays_games(self):
         """
         Get NHL games being played today
         """
-        date = datetime.datetime.strftime(self._date, "%Y-%m-%d")
-        games = {}
-        url = f"{self._base_url}schedule?date={date}"
-        data = self._nhl_request(url)
-        if data:
-            if data['totalGames'] == 0:
-                return None
-            games['date'] = data['dates'][0]['date']
-            games_list = data['dates'][0]['games']
-            games['games'] = games_list
-            return games
-
-    @property
+        return self._games_on(self._date)
+
+    @lazy_property
     def recent_games(self):
         """
         Get games played yesterday
         """
-        date = (self._date - timedelta(1)).strftime('%Y-%m-%d')
-        games = {}
-        url = f"{self._base_url}schedule?date={date}"
-        data = self._nhl_request(url)
-        if data:
-            if data['totalGames'] == 0:
-                return None
-            games['date'] = data['dates'][0]['date']
-            games_list = data['dates'][0]['games']
-            games['games'] = games_list
-            return games
-
-    @property
+        return self._games_on(self._date - timedelta(1))
+
+    def _games_on(self, date):
+        """
+        Return the date and games played on it from the league schedule, or
+        None if there were no games
+        """
+        date = date.strftime('%Y-%m-%d')
+        games = nhl_schedule.store().games_on(date)
+        if not games:
+            return None
+        return {'date': date, 'games': games}
+
+    @lazy_property
     def standings(self):
         """
         Get current NHL standings
@@ -126,24 +120,46 @@ class NHL:
         """
         GET request to NHL API
         """
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504])
-        self._session.mount('http://', HTTPAdapter(max_retries=retries))
-        try:
-            request = self._session.get(url, verify=False)
-        except socket.gaierror:
-            time.sleep(1)
-            request = self._session.get(url)
-        except requests.exceptions.ConnectionError:
-            time.sleep(2)
-            request = self._session.get(url)
+        request = http_cache.get(self._session, url, verify=False, timeout=set_timeout(10))
         if request.status_code != 200:
             error_message = f"Error with NHL API request | status: {request.status_code}\n{request.content}"
             logging.error(error_message)
             raise NHLRequestException(error_message)
         else:
-            data = request.json()
+            data = codec.response_json(request)
         return data
 
+    async def _async_nhl_request(self, url):
+        """
+        GET request to NHL API on the shared aiohttp session
+        """
+        try:
+            return await http_cache.async_get_json(url, timeout=set_timeout(10), raise_for_status=True)
+        except UpstreamResponseError as err:
+            error_message = f"Error with NHL API request | status: {err.status}\n{err.body}"
+            logging.error(error_message)
+            raise NHLRequestException(error_message)
+
+    def _nhl_requests(self, *urls):
+        """
+        GET several NHL API urls concurrently. Return their data in the
+        order the urls were given
+        """
+        return http_client.run_concurrently(*[self._async_nhl_request(url) for url in urls])
+
+    def _endpoints(self):
+        """
+        Map each API backed attribute to its (url, parse function)
+        """
+        return {}
+
+    def _load(self, name):
+        """
+        Fetch and parse the endpoint behind a single attribute
+        """
+        url, parse = self._endpoints()[name]
+        return parse(self._nhl_request(url))
+
     def _parse_schedule(self, schedule):
         """
         Get results of completed games
@@ -209,18 +225,76 @@ class NHLLeague(NHL):
 class NHLTeam(NHL):
     """
     Create NHL team object
+
+    Team data is fetched the first time an attribute is read, so a reply
+    only requests the endpoints it uses.
     """
     def __init__(self, team=None):
         super().__init__()
         self.team = team
         self.team_id = self._get_team_id(self.team)
-        self.info = self._get_team_info(self.team_id)
-        self.name = self.info['name']
-        self.venue = self.info['venue']['name']
-        self.stats = self._get_team_stats(self.team_id)
-        self.roster = self._get_team_roster(self.team_id)
-        self.schedule = self._get_schedule(self.team_id)
-        self.game_results, self.unplayed_games = self._parse_schedule(self.schedule)
+
+    def _endpoints(self):
+        team_url = f"{self._base_url}teams/{self.team_id}"
+        return {
+            'stats': (f"{team_url}?expand=team.stats", lambda data: data['teams'][0]),
+            '_roster_team': (f"{team_url}?expand=team.roster", lambda data: data['teams'][0])
+        }
+
+    @lazy_property
+    def stats(self):
+        """Team info and stats"""
+        return self._load('stats')
+
+    @lazy_property
+    def info(self):
+        """General team info, taken from the team stats request"""
+        return self.stats
+
+    @lazy_property
+    def name(self):
+        """Team name, taken from the roster or stats if loaded, otherwise the league schedule"""
+        if is_loaded(self, '_roster_team'):
+            return self._roster_team['name']
+        if not is_loaded(self, 'stats'):
+            for game in self.schedule:
+                for side in game['games'][0]['teams'].values():
+                    if side['team']['id'] == self.team_id:
+                        return side['team']['name']
+        return self.info['name']
+
+    @lazy_property
+    def venue(self):
+        """Home arena name"""
+        return self.info['venue']['name']
+
+    @lazy_property
+    def _roster_team(self):
+        return self._load('_roster_team')
+
+    @lazy_property
+    def roster(self):
+        """List of player objects"""
+        return self._roster_team['roster']['roster']
+
+    @lazy_property
+    def schedule(self):
+        """Season schedule, taken from the league schedule"""
+        return nhl_schedule.store().team_schedule(self.team_id)
+
+    @lazy_property
+    def _parsed_schedule(self):
+        return self._parse_schedule(self.schedule)
+
+    @lazy_property
+    def game_results(self):
+        """Completed games"""
+        return self._parsed_schedule[0]
+
+    @lazy_property
+    def unplayed_games(self):
+        """Games still to be played"""
+        return self._parsed_schedule[1]
 
     def _get_team_id(self, team=None):
         """
@@ -235,55 +309,53 @@ class NHLTeam(NHL):
             raise NHLTeamException(f"Error retrieving ID for {team}")
         return team_id
 
-    def _get_team_info(self, team_id):
-        """
-        Get general team information
-        """
-        url = f"{self._base_url}teams/{team_id}"
-        data = self._nhl_request(url)
-        if data:
-            team_info = data['teams'][0]
-            return team_info
-
-    def _get_team_stats(self, team_id):
-        """
-        Get team stats. Return team stats object
-        """
-        url = f"{self._base_url}teams/{team_id}?expand=team.stats"
-        data = self._nhl_request(url)
-        return data['teams'][0]
-
-    def _get_team_roster(self, team_id):
-        """
-        Get team roster. Return list of player objects
-        """
-        url = f"{self._base_url}teams/{team_id}/roster"
-        data = self._nhl_request(url)
-        player_list = data['roster']
-        return player_list
-
-    def _get_schedule(self, team_id, season='20182019'):
-        """
-        Get team schedule. Return list of game objects
-        """
-        url = f"{self._base_url}schedule?teamId={team_id}&season={season}"
-        data = self._nhl_request(url)
-        game_list = data['dates']
-        return game_list
-
 
 class NHLPlayer(NHL):
     """
     Create an NHL player object
+
+    Player data is fetched the first time an attribute is read.
     """
     def __init__(self, player=None):
         super().__init__()
         self.player = player
         self.players = redis.StrictRedis(host='jal_redis.backend', port=6379, db=0)
         self.player_id = self._get_player_id(self.player)
-        self.info = self._get_player_info(self.player_id)
-        self.season_stats = self._get_season_stats(self.player_id)
-        self.career_stats = self._get_career_stats(self.player_id)
+
+    def _endpoints(self):
+        player_url = f"{self._base_url}people/{self.player_id}"
+        return {
+            'info': (player_url, lambda data: data['people'][0]),
+            'career_stats': (f"{player_url}/stats?stats=yearByYear", lambda data: data['stats'][0]['splits'])
+        }
+
+    def _season_stats_url(self, season='20182019'):
+        """
+        URL of a player's stats for one season. Season stats aren't in
+        _endpoints because parsing them needs the player info too.
+        """
+        return f"{self._base_url}people/{self.player_id}/stats?stats=statsSingleSeason&season={season}"
+
+    @lazy_property
+    def info(self):
+        """General player info"""
+        return self._load('info')
+
+    @lazy_property
+    def season_stats(self):
+        """Stats for the current season"""
+        return self.season_stats_for(None)
+
+    def season_stats_for(self, season):
+        """
+        Stats for a season formatted like 20182019, None for the current one
+        """
+        return self._get_season_stats(self.player_id, season=season)
+
+    @lazy_property
+    def career_stats(self):
+        """Stats for every season played"""
+        return self._load('career_stats')
 
     def _get_player_id(self, player):
         if not player:
@@ -293,42 +365,30 @@ class NHLPlayer(NHL):
             raise NHLPlayerException(f"Player Not Found {player}")
         return player.decode()
 
-    def _get_player_info(self, player_id):
+    def _get_season_stats(self, player_id, season=None, info=None):
         """
-        Get individual stats for a player
+        Get individual stats for a player. The player info the stats are
+        annotated with is requested alongside them unless it's passed in or
+        already loaded
         """
-        url = f"{self._base_url}people/{player_id}"
-        data = self._nhl_request(url)
-        if data:
-            info = data['people'][0]
-            return info
-
-    def _get_season_stats(self, player_id, season=None):
-        """
-        Get individual stats for a player
-        """
-        player_info = self._get_player_info(player_id)
-        team = player_info['currentTeam']['id']
-        if not season:
-            season = '20182019'
-        endpoint = f"/stats?stats=statsSingleSeason&season={season}"
-        url = f"{self._base_url}people/{player_id}{endpoint}"
-        data = self._nhl_request(url)
-        if data:
-            stats = data['stats'][0]['splits'][0]
-            stats['team'] = team
-            return stats
+        url = self._season_stats_url(season or '20182019')
+        if info is None and is_loaded(self, 'info'):
+            info = self.info
+        if info is None:
+            info_url, parse_info = self._endpoints()['info']
+            info_data, data = self._nhl_requests(info_url, url)
+            info = self.__dict__['info'] = parse_info(info_data)
+        else:
+            data = self._nhl_request(url)
+        return self._parse_season_stats(data, info)
 
-    def _get_career_stats(self, player_id):
+    def _parse_season_stats(self, data, info):
         """
-        Get career stats for a player
+        Return the season split tagged with the player's current team id
         """
-        endpoint = "stats?stats=yearByYear"
-        url = f"{self._base_url}people/{player_id}/{endpoint}"
-        data = self._nhl_request(url)
-        if data:
-            seasons = data['stats'][0]['splits']
-            return seasons
+        stats = data['stats'][0]['splits'][0]
+        stats['team'] = info['currentTeam']['id']
+        return stats
 
 
 def main():
@@ -0,0 +1,464 @@
+import datetime
+import logging
+import redis
+import threading
+import time
+import uuid
+
+from pytz import timezone
+
+from libs import nhl_schedule
+from libs.nhl import NHL
+from utils import http_client
+from utils.BotTools import get_config
+from utils.metrics import METRICS
+
+
+# Takes or renews the claim in KEYS[1] for owner ARGV[1] for ARGV[2]
+# seconds. Returns 1 if the owner holds the claim, 0 if another one does.
+CLAIM_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+# Deletes the claim in KEYS[1] if owner ARGV[1] holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class GamePoller:
+    """
+    Poll one NHL game and report score and period changes
+
+    The poller sleeps until shortly before puck drop, polls every
+    live_interval seconds while the game is being played and every
+    intermission_interval seconds during intermissions, and stops once the
+    game is final, postponed or suspended, or hasn't started max_delay
+    seconds after its scheduled start. Each change is passed to notify
+    along with the game. Before every poll keep is called, if given, and
+    the poller stops when it returns False or stop() is called.
+    """
+    def __init__(self, game_pk, fetch, notify, live_interval=10, intermission_interval=60,
+                 pregame_lead=300, max_interval=600, max_delay=10800, keep=None):
+        self.game_pk = game_pk
+        self.fetch = fetch
+        self.notify = notify
+        self.live_interval = live_interval
+        self.intermission_interval = intermission_interval
+        self.pregame_lead = pregame_lead
+        self.max_interval = max_interval
+        self.max_delay = max_delay
+        self.keep = keep
+        self.url = f"https://statsapi.web.nhl.com/api/v1/schedule?gamePk={game_pk}&expand=schedule.linescore"
+        self.state = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, game_pk, fetch, notify, config, keep=None):
+        """
+        Create a poller from the live section of nhl_config.json
+        """
+        return cls(game_pk, fetch, notify,
+                   live_interval=config.get('live_interval', 10),
+                   intermission_interval=config.get('intermission_interval', 60),
+                   pregame_lead=config.get('pregame_lead', 300),
+                   max_interval=config.get('max_interval', 600),
+                   max_delay=config.get('max_delay', 10800),
+                   keep=keep)
+
+    @staticmethod
+    def until_start(start):
+        """
+        Seconds until a game's scheduled start, negative once it has passed
+        """
+        start = datetime.datetime.strptime(start, '%Y-%m-%dT%H:%M:%SZ')
+        return (start - datetime.datetime.utcnow()).total_seconds()
+
+    @staticmethod
+    def game_state(game):
+        """
+        Reduce a game with its linescore to the fields changes are found in
+        """
+        linescore = game.get('linescore', {})
+        return {
+            'status': game['status']['abstractGameState'],
+            'detailed_status': game['status'].get('detailedState'),
+            'start': game['gameDate'],
+            'period': linescore.get('currentPeriod', 0),
+            'ordinal': linescore.get('currentPeriodOrdinal'),
+            'time_remaining': linescore.get('currentPeriodTimeRemaining'),
+            'intermission': linescore.get('intermissionInfo', {}).get('inIntermission', False),
+            'away': game['teams']['away']['score'],
+            'home': game['teams']['home']['score'],
+            'away_name': game['teams']['away']['team']['name'],
+            'home_name': game['teams']['home']['team']['name']
+        }
+
+    @staticmethod
+    def changes(old, new):
+        """
+        Describe what changed between two game states
+        """
+        if not old:
+            return ['In progress'] if new['status'] == 'Live' else []
+        changes = []
+        if old['status'] == 'Preview' and new['status'] == 'Live':
+            changes.append('Puck drop')
+        for side in ('away', 'home'):
+            if new[side] > old[side]:
+                changes.append(f"{new[f'{side}_name']} goal")
+            elif new[side] < old[side]:
+                changes.append(f"{new[f'{side}_name']} goal disallowed")
+        if new['intermission'] and not old['intermission']:
+            changes.append(f"End of {old['ordinal'] or new['ordinal']} period")
+        elif new['period'] > old['period'] and old['period']:
+            changes.append(f"Start of {new['ordinal']} period")
+        if new['status'] == 'Final' and old['status'] != 'Final':
+            changes.append('Final')
+        return changes
+
+    def poll(self):
+        """
+        Fetch the game, notify of any changes and return its state
+        """
+        data = self.fetch(self.url)
+        METRICS.incr('nhl_live.polls')
+        game = data['dates'][0]['games'][0]
+        state = self.game_state(game)
+        changes = self.changes(self.state, state)
+        self.state = state
+        if changes:
+            self.notify(game, state, changes)
+        return state
+
+    def interval(self, state):
+        """
+        Seconds to wait before the next poll
+        """
+        if state['status'] == 'Preview':
+            until_start = self.until_start(state['start']) - self.pregame_lead
+            return min(self.max_interval, max(self.live_interval, until_start))
+        if state['intermission']:
+            return self.intermission_interval
+        return self.live_interval
+
+    def done(self, state):
+        """
+        True once a game won't change any more today
+        """
+        if state['status'] == 'Final' or state['detailed_status'] in nhl_schedule.INACTIVE_STATES:
+            return True
+        return state['status'] == 'Preview' and self.until_start(state['start']) < -self.max_delay
+
+    def stop(self):
+        """
+        Stop polling, waking the poller if it's waiting
+        """
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        """True once stop() has been called"""
+        return self._stop.is_set()
+
+    def run(self):
+        """
+        Poll until the game is done or the poller is stopped
+        """
+        while not self.stopped:
+            if self.keep and not self.keep():
+                return
+            try:
+                state = self.poll()
+            except Exception as err:
+                logging.error(f"NHL live poll for game {self.game_pk} failed | {err}")
+                self._stop.wait(self.intermission_interval)
+                continue
+            if self.done(state):
+                return
+            self._stop.wait(self.interval(state))
+
+
+class LiveGames:
+    """
+    Channel subscriptions to NHL teams and the pollers for their games
+
+    There's one poller per game however many channels follow either team,
+    so N followers cost one upstream poll. A watcher checks today's
+    schedule every check_interval seconds and starts pollers only for
+    followed games that are still to be played. A poller stops once no
+    channel follows either team. Changes are posted to the following
+    channels with the poster set by the Slack client.
+
+    When a Redis client is given subscriptions are kept there, so they are
+    shared by the bot and worker processes and survive restarts, and each
+    game is polled by whichever process claims it first. A claim expires
+    claim_ttl seconds after its poller last renewed it, so another process
+    takes over if the owner dies.
+    """
+    def __init__(self, config=None, redis_client=None):
+        self.config = config or get_config('nhl_config.json')
+        self.live_config = self.config.get('live', {})
+        self.check_interval = self.live_config.get('check_interval', 300)
+        self.claim_ttl = self.live_config.get('claim_ttl', 2 * self.live_config.get('max_interval', 600))
+        self.emojis = self.config.get('emojis', {})
+        self.poster = None
+        self.redis = redis_client
+        self.prefix = 'jalbot:nhl:live:'
+        self.owner = uuid.uuid4().hex
+        self._subscriptions = {}
+        self._pollers = {}
+        self._games = {}
+        self._finished = set()
+        self._finished_date = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._nhl = None
+        if self.redis:
+            self._claim = self.redis.register_script(CLAIM_SCRIPT)
+            self._release = self.redis.register_script(RELEASE_SCRIPT)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create live games from nhl_config.json, kept in Redis if live.persist
+        is set
+        """
+        redis_client = None
+        if config.get('live', {}).get('persist'):
+            redis_config = http_client.get_http_config().get('redis', {})
+            redis_client = redis.StrictRedis(host=redis_config.get('host', 'jal_redis.backend'),
+                                             port=redis_config.get('port', 6379),
+                                             db=0,
+                                             socket_timeout=redis_config.get('socket_timeout', 1))
+        return cls(config, redis_client=redis_client)
+
+    def _fetch(self, url):
+        if not self._nhl:
+            self._nhl = NHL()
+        return self._nhl._nhl_request(url)
+
+    def _today(self):
+        return datetime.datetime.now(timezone('US/Eastern')).strftime('%Y-%m-%d')
+
+    def _key(self, team_id):
+        return f"{self.prefix}follow:{team_id}"
+
+    def _update_local(self, team_id, channel, follow):
+        with self._lock:
+            channels = self._subscriptions.setdefault(team_id, set())
+            following = channel in channels
+            if follow:
+                channels.add(channel)
+            else:
+                channels.discard(channel)
+            if not channels:
+                del self._subscriptions[team_id]
+            METRICS.gauge('nhl_live.subscriptions', sum(len(c) for c in self._subscriptions.values()))
+        return following
+
+    def follow(self, team_id, channel):
+        """
+        Subscribe channel to a team's games. Return today's game for the
+        team if there is one
+        """
+        self._update_local(team_id, channel, True)
+        if self.redis:
+            try:
+                self.redis.sadd(self._key(team_id), channel)
+            except redis.exceptions.RedisError as err:
+                logging.error(f"Error saving NHL follow to Redis | {err}")
+        self.start()
+        return self.check(team_id)
+
+    def unfollow(self, team_id, channel):
+        """
+        Unsubscribe channel from a team's games and stop pollers for games
+        no channel follows any more. Return False if it wasn't following
+        the team
+        """
+        following = self._update_local(team_id, channel, False)
+        if self.redis:
+            try:
+                following = bool(self.redis.srem(self._key(team_id), channel))
+            except redis.exceptions.RedisError as err:
+                logging.error(f"Error removing NHL follow from Redis | {err}")
+        with self._lock:
+            games = [(self._pollers[game_pk], self._games[game_pk]) for game_pk in self._pollers]
+        for poller, game in games:
+            if not self.channels(game):
+                poller.stop()
+        return following
+
+    def channels(self, game):
+        """
+        Channels following either team in a game
+        """
+        team_ids = [side['team']['id'] for side in game['teams'].values()]
+        if self.redis:
+            try:
+                channels = self.redis.sunion(*[self._key(team_id) for team_id in team_ids])
+                return {channel.decode() for channel in channels}
+            except redis.exceptions.RedisError as err:
+                logging.error(f"Error loading NHL follows from Redis | {err}")
+        with self._lock:
+            channels = set()
+            for team_id in team_ids:
+                channels |= self._subscriptions.get(team_id, set())
+            return channels
+
+    def check(self, team_id=None):
+        """
+        Start pollers for today's followed games that are still to be
+        played. Return today's game for team_id
+        """
+        team_game = None
+        max_delay = self.live_config.get('max_delay', 10800)
+        today = self._today()
+        with self._lock:
+            if today != self._finished_date:
+                self._finished.clear()
+                self._finished_date = today
+        for game in nhl_schedule.store().games_on(today):
+            team_ids = [side['team']['id'] for side in game['teams'].values()]
+            if team_id in team_ids:
+                team_game = game
+            if not nhl_schedule.is_pending(game) or not self.channels(game):
+                continue
+            started = game['status']['abstractGameState'] != 'Preview'
+            if not started and GamePoller.until_start(game['gameDate']) < -max_delay:
+                continue
+            self._start_poller(game)
+        return team_game
+
+    def _keep_polling(self, game):
+        """
+        Keep polling a game while a channel follows it and this process
+        holds its claim
+        """
+        return bool(self.channels(game)) and self._claim_game(game['gamePk'])
+
+    def _claim_game(self, game_pk):
+        """
+        Take or renew this process's claim on polling a game. Always True
+        without Redis
+        """
+        if not self.redis:
+            return True
+        try:
+            return bool(self._claim(keys=[f"{self.prefix}poller:{game_pk}"], args=[self.owner, self.claim_ttl]))
+        except redis.exceptions.RedisError as err:
+            logging.error(f"Error claiming NHL game {game_pk} in Redis | {err}")
+            return False
+
+    def _start_poller(self, game):
+        game_pk = game['gamePk']
+        with self._lock:
+            if game_pk in self._pollers or game_pk in self._finished:
+                return
+        if not self._claim_game(game_pk):
+            return
+        with self._lock:
+            if game_pk in self._pollers:
+                return
+            poller = GamePoller.from_config(game_pk, self._fetch, self._notify, self.live_config,
+                                            keep=lambda: self._keep_polling(game))
+            self._pollers[game_pk] = poller
+            self._games[game_pk] = game
+            METRICS.gauge('nhl_live.pollers', len(self._pollers))
+        threading.Thread(target=self._run_poller, args=(poller, ), name=f"nhl-live-{game_pk}", daemon=True).start()
+
+    def _run_poller(self, poller):
+        try:
+            poller.run()
+        finally:
+            with self._lock:
+                del self._pollers[poller.game_pk]
+                del self._games[poller.game_pk]
+                if poller.state and poller.done(poller.state):
+                    self._finished.add(poller.game_pk)
+                METRICS.gauge('nhl_live.pollers', len(self._pollers))
+            if self.redis and not (poller.state and poller.done(poller.state)):
+                try:
+                    self._release(keys=[f"{self.prefix}poller:{poller.game_pk}"], args=[self.owner])
+                except redis.exceptions.RedisError as err:
+                    logging.error(f"Error releasing NHL game {poller.game_pk} in Redis | {err}")
+
+    def message(self, state, changes):
+        """
+        Slack message for changes to a game
+        """
+        away_emoji = self.emojis.get(str(state['away_id']))
+        home_emoji = self.emojis.get(str(state['home_id']))
+        reply = [
+            f":nhl: *{' | '.join(changes)}*",
+            f">:{away_emoji}: *{state['away_name']}:* *`{state['away']}`*",
+            f">:{home_emoji}: *{state['home_name']}:* *`{state['home']}`*"
+        ]
+        if state['status'] == 'Live' and state['ordinal']:
+            reply.append(f">_{state['ordinal']} {state['time_remaining'] or ''}_")
+        return "\n".join(reply)
+
+    def _notify(self, game, state, changes):
+        if not self.poster:
+            logging.error(f"No poster set for NHL live updates, dropping {changes}")
+            return
+        state = dict(state,
+                     away_id=game['teams']['away']['team']['id'],
+                     home_id=game['teams']['home']['team']['id'])
+        message = self.message(state, changes)
+        for channel in self.channels(game):
+            try:
+                self.poster(channel, message)
+                METRICS.incr('nhl_live.posts')
+            except Exception as err:
+                logging.error(f"Error posting NHL live update to {channel} | {err}")
+
+    def _watch_forever(self):
+        while True:
+            try:
+                self.check()
+            except Exception as err:
+                logging.error(f"NHL live check failed | {err}")
+            time.sleep(self.check_interval)
+
+    def start(self):
+        """
+        Start the watcher that starts pollers for followed games
+        """
+        with self._lock:
+            if self._watcher:
+                return
+            self._watcher = threading.Thread(target=self._watch_forever, name='nhl-live', daemon=True)
+        self._watcher.start()
+
+
+_LIVE = None
+_LIVE_LOCK = threading.Lock()
+
+
+def live_games():
+    """
+    The subscriptions and pollers shared by this process
+    """
+    global _LIVE
+    with _LIVE_LOCK:
+        if not _LIVE:
+            _LIVE = LiveGames.from_config(get_config('nhl_config.json'))
+        return _LIVE
+
+
+def set_poster(poster):
+    """
+    Set the function live updates are posted with, called with a channel
+    and a message
+    """
+    live_games().poster = poster
@@ -0,0 +1,281 @@
+import datetime
+import logging
+import redis
+import threading
+import time
+
+from pytz import timezone
+
+from utils import codec, http_cache, http_client
+from utils.BotTools import get_config, set_timeout
+from utils.deadline import remaining
+from utils.exceptions import JalBotTimeout, NHLRequestException
+from utils.metrics import METRICS
+
+
+# Games in these states aren't going to be played on their scheduled date
+INACTIVE_STATES = ('Postponed', 'Suspended')
+
+
+def is_pending(game):
+    """
+    True if a game is still to be finished on its scheduled date
+    """
+    status = game['status']
+    return status['abstractGameState'] != 'Final' and status.get('detailedState') not in INACTIVE_STATES
+
+
+class ScheduleStore:
+    """
+    League wide NHL season schedule indexed by team id and by date
+
+    The whole season is downloaded once and every schedule, score and
+    results read is answered from memory. Refreshing only re-requests
+    dates up to today that still have games which aren't final, so the
+    season already played is never downloaded again. When a Redis client
+    is given the schedule is persisted there and shared across processes.
+    Dates outside the season, like the playoffs, are requested on their own
+    and kept for refresh_interval seconds.
+    """
+    def __init__(self, season='20182019', base_url='https://statsapi.web.nhl.com/api/v1/',
+                 refresh_interval=60, redis_client=None):
+        self.season = season
+        self.base_url = base_url
+        self.refresh_interval = refresh_interval
+        self.redis = redis_client
+        self.redis_key = f"jalbot:nhl:schedule:{season}"
+        self._session = http_client.session(base_url)
+        self._dates = {}
+        self._teams = {}
+        self._other_dates = {}
+        self._refreshed = None
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._refresher = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a store from the schedule section of nhl_config.json
+        """
+        schedule_config = config.get('schedule', {})
+        redis_client = None
+        if schedule_config.get('persist'):
+            redis_config = http_client.get_http_config().get('redis', {})
+            redis_client = redis.StrictRedis(host=redis_config.get('host', 'jal_redis.backend'),
+                                             port=redis_config.get('port', 6379),
+                                             db=0,
+                                             socket_timeout=redis_config.get('socket_timeout', 1))
+        return cls(season=schedule_config.get('season', '20182019'),
+                   base_url=config.get('url', 'https://statsapi.web.nhl.com/api/v1/'),
+                   refresh_interval=schedule_config.get('refresh_interval', 60),
+                   redis_client=redis_client)
+
+    def _request(self, url):
+        """
+        GET request to NHL API
+        """
+        request = http_cache.get(self._session, url, verify=False, timeout=set_timeout(10))
+        if request.status_code != 200:
+            error_message = f"Error with NHL API request | status: {request.status_code}\n{request.content}"
+            logging.error(error_message)
+            raise NHLRequestException(error_message)
+        return codec.response_json(request)
+
+    def _today(self):
+        return datetime.datetime.now(timezone('US/Eastern')).strftime('%Y-%m-%d')
+
+    def _index(self, dates):
+        """
+        Replace the games for each of the given schedule dates and rebuild
+        the team index
+        """
+        with self._lock:
+            for date in dates:
+                self._dates[date['date']] = date['games']
+            teams = {}
+            for date in sorted(self._dates):
+                for game in self._dates[date]:
+                    for side in game['teams'].values():
+                        teams.setdefault(side['team']['id'], []).append({'date': date, 'games': [game]})
+            self._teams = teams
+
+    def _persist(self):
+        if not self.redis:
+            return
+        with self._lock:
+            dates = [{'date': date, 'games': games} for date, games in sorted(self._dates.items())]
+        try:
+            self.redis.set(self.redis_key, codec.dumps(dates))
+        except redis.exceptions.RedisError as err:
+            logging.error(f"Error saving NHL schedule to Redis | {err}")
+
+    def _restore(self):
+        """
+        Load the schedule persisted in Redis, return False if there isn't one
+        """
+        if not self.redis:
+            return False
+        try:
+            data = self.redis.get(self.redis_key)
+        except redis.exceptions.RedisError as err:
+            logging.error(f"Error loading NHL schedule from Redis | {err}")
+            return False
+        if not data:
+            return False
+        self._index(codec.loads(data))
+        return True
+
+    def load(self):
+        """
+        Load the season schedule from Redis, or download it if it isn't
+        persisted
+        """
+        if self._restore():
+            with self._lock:
+                self._refreshed = 0
+            self.refresh()
+            return
+        data = self._request(f"{self.base_url}schedule?season={self.season}")
+        self._index(data['dates'])
+        with self._lock:
+            self._refreshed = time.monotonic()
+        METRICS.gauge('nhl_schedule.dates', len(self._dates))
+        self._persist()
+
+    def pending_dates(self):
+        """
+        Dates up to today with games that aren't final, postponed or
+        suspended
+        """
+        today = self._today()
+        with self._lock:
+            return sorted(date for date, games in self._dates.items()
+                          if date <= today and any(is_pending(game) for game in games))
+
+    def refresh(self):
+        """
+        Re-request the dates that still have games which aren't final
+        """
+        updated = []
+        for date in self.pending_dates():
+            data = self._request(f"{self.base_url}schedule?date={date}")
+            updated.extend(data['dates'] or [{'date': date, 'games': []}])
+        if updated:
+            self._index(updated)
+            self._persist()
+        METRICS.incr('nhl_schedule.refreshes')
+        METRICS.gauge('nhl_schedule.refreshed_dates', len(updated))
+        with self._lock:
+            self._refreshed = time.monotonic()
+
+    def _update(self):
+        """
+        Load the schedule, or refresh it once loaded. Requests are made
+        without holding the lock readers take, and only one thread loads
+        or refreshes at a time.
+        """
+        with self._load_lock:
+            if self._refreshed is None:
+                self.load()
+            else:
+                self.refresh()
+
+    def _current(self):
+        """
+        Load the schedule on first use. Without a background refresher,
+        refresh it when it's older than refresh_interval unless another
+        thread already is. Waiting on another thread's first load is
+        bounded by the command deadline.
+        """
+        if self._refreshed is None:
+            timeout = remaining()
+            if not self._load_lock.acquire(timeout=-1 if timeout is None else timeout):
+                raise JalBotTimeout('Command timed out waiting on the NHL schedule')
+            try:
+                if self._refreshed is None:
+                    self.load()
+            finally:
+                self._load_lock.release()
+        elif not self._refresher and time.monotonic() - self._refreshed > self.refresh_interval:
+            if self._load_lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._refreshed > self.refresh_interval:
+                        self.refresh()
+                finally:
+                    self._load_lock.release()
+
+    def _other_date(self, date):
+        """
+        Games on a date outside the season schedule, requested on their own
+        """
+        with self._lock:
+            entry = self._other_dates.get(date)
+        if entry and time.monotonic() - entry[0] <= self.refresh_interval:
+            return entry[1]
+        data = self._request(f"{self.base_url}schedule?date={date}")
+        games = [game for day in data['dates'] for game in day['games']]
+        with self._lock:
+            self._other_dates[date] = (time.monotonic(), games)
+        METRICS.incr('nhl_schedule.other_dates')
+        return games
+
+    def games_on(self, date):
+        """
+        List of games played on a date formatted YYYY-MM-DD
+        """
+        self._current()
+        with self._lock:
+            if date in self._dates:
+                return self._dates[date]
+            in_season = self._dates and min(self._dates) <= date <= max(self._dates)
+        if in_season:
+            return []
+        return self._other_date(date)
+
+    def team_schedule(self, team_id):
+        """
+        A team's season schedule in the format of the schedule?teamId
+        endpoint, a list of dates with one game each
+        """
+        self._current()
+        return self._teams.get(team_id, [])
+
+    def _refresh_forever(self):
+        while True:
+            try:
+                self._update()
+            except Exception as err:
+                logging.error(f"NHL schedule refresh failed | {err}")
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        """
+        Load the schedule and keep refreshing it in a background thread
+        """
+        if not self._refresher:
+            self._refresher = threading.Thread(target=self._refresh_forever, name='nhl-schedule', daemon=True)
+            self._refresher.start()
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def store():
+    """
+    The schedule store shared by every NHL object in this process
+    """
+    global _STORE
+    with _STORE_LOCK:
+        if not _STORE:
+            _STORE = ScheduleStore.from_config(get_config('nhl_config.json'))
+        return _STORE
+
+
+def use(schedule_store):
+    """
+    Make schedule_store the shared store, None creates a new one on next use
+    """
+    global _STORE
+    _STORE = schedule_store
@@ -1,22 +1,35 @@
 import slackclient
 import logging
-import time
 import traceback
 import os
 import requests
 import importlib
 import inspect
 import sys
-import asyncio
 
-from time import sleep
 from threading import Thread
 
+from libs import nhl_live
+from libs import nhl_schedule
+from libs.slack_rtm import SlackRTM
+from libs.slack_web import SlackWebDispatcher
 from utils.BotTools import get_config, log_command
+from utils import http_client
+from utils.botmatch import BotMatcher
+from utils.circuit import collect_stale
+from utils.dedupe import EventDeduper
+from utils.dispatcher import CommandDispatcher
+from utils.deadline import command_timeout, deadline, expired
 from utils.exceptions import JalBotError
+from utils.exceptions import JalBotTimeout
 from utils.exceptions import NFLRequestException
 from utils.exceptions import NHLException
 from utils.exceptions import NBAException
+from utils.reply_cache import ReplyCache, cache_ttl
+from utils.singleflight import SingleFlight
+from utils.slackparse import command_key
+from utils.user_cache import UserDirectory
+from utils.work_queue import RedisWorkQueue
 
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
@@ -32,7 +45,31 @@ class Slack(object):
         """
         self.config = get_config('slack.json')
         self.client = slackclient.SlackClient(token)
+        self.web = SlackWebDispatcher(self.client, self.config.get('web_api'))
         self.commands = self.load_commands('/jalbot/src/commands/')
+        self.matcher = BotMatcher(self.config["bot_names"], self.config["commands"]["alt_names"])
+        self.command_configs = self.load_command_configs(self.commands)
+        self.inflight = SingleFlight('inflight_commands')
+        self.replies = ReplyCache(max_size=self.config.get('reply_cache', {}).get('max_size', 1000))
+        self.dispatcher_config = self.config.get('dispatcher', {})
+        if self.dispatcher_config.get('mode') == 'redis':
+            self.dispatcher = RedisWorkQueue.from_config(self.dispatcher_config)
+        else:
+            self.dispatcher = CommandDispatcher.from_config(self.handle_message, self.dispatcher_config)
+        self.users = UserDirectory.from_config(self.config.get('user_cache', {}))
+        self.deduper = EventDeduper.from_config(self.config.get('dedupe', {}),
+                                                self.dispatcher_config.get('redis'))
+        nhl_live.set_poster(self.post_message)
+        self.rtm = None
+
+    @staticmethod
+    def message_args(message):
+        """
+        Build chat.postMessage arguments for a text or attachment reply
+        """
+        if isinstance(message, dict):
+            return {"attachments": [message]}
+        return {"text": message}
 
     def post_message(self, channel, message):
         """
@@ -42,52 +79,52 @@ class Slack(object):
         :param message:
         :return:
         """
-        if isinstance(message, dict):
-            self.client.api_call("chat.postMessage",
-                                 channel=channel,
-                                 attachments=[message],
-                                 as_user=True)
-        else:
-            self.client.api_call("chat.postMessage",
-                                 channel=channel,
-                                 text=message,
-                                 as_user=True)
+        return self.web.call("chat.postMessage",
+                             channel=channel,
+                             as_user=True,
+                             **self.message_args(message))
 
     def post_reaction(self, emoji, ts, channel):
         """
-        Post the provided message to the given channel
+        Add the provided emoji reaction to a message
 
+        :param emoji:
+        :param ts:
         :param channel:
-        :param message:
         :return:
         """
-        self.client.api_call("reactions.add",
+        return self.web.call("reactions.add",
                              name=emoji,
                              timestamp=ts,
                              channel=channel)
 
     def del_reaction(self, emoji, msg_id, channel):
         """
-        Post the provided message to the given channel
+        Remove the provided emoji reaction from a message
 
+        :param emoji:
+        :param msg_id:
         :param channel:
-        :param message:
         :return:
         """
-        self.client.api_call("reactions.remove",
+        return self.web.call("reactions.remove",
                              name=emoji,
                              timestamp=msg_id,
                              channel=channel)
 
     def user_info(self, user_id):
         """
-        Post the provided message to the given channel
+        Get user info from the user directory, falling back to users.info
 
-        :param channel:
-        :param message:
+        :param user_id:
         :return:
         """
-        info = self.client.api_call("users.info", user=user_id)
+        user = self.users.get(user_id)
+        if user:
+            return {"ok": True, "user": user}
+        info = self.web.call("users.info", user=user_id).result()
+        if info.get("ok"):
+            self.users.set(info["user"])
         return info
 
     def channel_info(self, channel_id):
@@ -98,51 +135,53 @@ class Slack(object):
         :param message:
         :return:
         """
-        info = self.client.api_call("channels.info", channel=channel_id)
+        info = self.web.call("channels.info", channel=channel_id).result()
         if not info["ok"]:
             info = None
         return info
 
-    @staticmethod
-    def slack_worker(loop):
-        """
-        Slack event loop
-        """
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-
     def api_connect(self):
         """
         Connect to Slack Real Time Messaging API
         :return:
         """
-        client = self.client.rtm_connect()
-        if client:
-            logging.info('Connected to Slack')
-            worker_loop = asyncio.new_event_loop()
-            worker = Thread(target=self.slack_worker, args=(worker_loop, ))
-            worker.start()
-            while True:
-                try:
-                    events = self.client.rtm_read()
-                except Exception as err:
-                    time.sleep(1)
-                    events = self.client.rtm_read()
-                for event in events:
-                    try:
-                        if event.get('text'):
-                            bot_text = self.get_bot_command(event["text"])
-                            if bot_text:
-                                event["text"] = bot_text[1]
-                                command = bot_text[0]
-                                self.post_reaction("spinning", event["ts"], event["channel"])
-                                worker_loop.run_in_executor(None, self.handle_message, command, event)
-                    except requests.exceptions.ConnectionError as err:
-                        logging.error(err)
-                        sleep(2)
-                        self.client.rtm_connect()
-                        self.post_reaction("spinning", event["ts"], event["channel"])
-                        worker_loop.run_in_executor(None, self.handle_message, command, event)
+        Thread(target=self.users.prewarm, args=(self.web, ), daemon=True).start()
+        Thread(target=http_client.prewarm, daemon=True).start()
+        nhl_schedule.store().start()
+        nhl_live.live_games().start()
+        if not self.rtm:
+            rtm_config = self.config.get('rtm', {})
+            self.rtm = SlackRTM(self.client, self.handle_event,
+                                heartbeat=rtm_config.get('heartbeat', 30),
+                                record=rtm_config.get('record'))
+        self.rtm.connect()
+
+    def handle_event(self, event):
+        """
+        Dispatch RTM message events that contain a bot command
+        """
+        if event.get('type') in ('user_change', 'team_join'):
+            self.users.set(event['user'])
+            return
+        if event.get('type') != 'message' or not event.get('text'):
+            return
+        bot_text = self.get_bot_command(event["text"])
+        if bot_text and self.deduper.first_seen(event):
+            event["text"] = bot_text[1]
+            command = bot_text[0]
+            self.dispatch(command, event)
+
+    def dispatch(self, command, event):
+        """
+        Queue a bot command on the dispatcher, reacting with the busy emoji
+        if the queue is full. Worker processes start the spinner themselves
+        when the dispatcher is the Redis work queue.
+        """
+        if not getattr(self.dispatcher, 'remote', False):
+            self.web.start(event["channel"], event["ts"])
+        if not self.dispatcher.submit(event["channel"], command, event):
+            busy_emoji = self.dispatcher_config.get('busy_emoji', 'hourglass')
+            self.web.finish(event["channel"], event["ts"], None, busy_emoji)
 
     @staticmethod
     def load_commands(command_path):
@@ -163,30 +202,90 @@ class Slack(object):
                 commands[command[:-3]] = cmd_func
         return commands
 
+    @staticmethod
+    def load_command_configs(commands):
+        """
+        Load the config file for each command, if it has one
+        """
+        configs = {}
+        for command in commands:
+            try:
+                configs[command] = get_config(f'{command}.json')
+            except FileNotFoundError:
+                configs[command] = {}
+        return configs
+
+    def command_key(self, command, event):
+        """
+        Key identifying identical requests of a command. Requests for the
+        options in channel_options only match requests from the same channel
+        """
+        command = self.config["commands"]["alt_names"].get(command, command)
+        command_config = self.command_configs.get(command, {})
+        return command_key(command, command_config, event["text"], event.get("channel"))
+
+    def command_reply(self, command, func, event, user):
+        """
+        Get the reply for a command from the reply cache or by running it,
+        sharing one run between identical concurrent requests
+        """
+        command = self.config["commands"]["alt_names"].get(command, command)
+        command_config = self.command_configs.get(command, {})
+        key = self.command_key(command, event)
+        option = key.option if key else None
+        ttl = cache_ttl(command_config, option) if key else 0
+        timeout = command_timeout(command_config, option, self.dispatcher_config.get('default_timeout', 60))
+        if ttl:
+            response = self.replies.get(key)
+            if response is not None:
+                return response
+        try:
+            return self.inflight.do(key, self.run_command, func, event, user, timeout, key, ttl)
+        except JalBotTimeout as err:
+            stale = self.replies.get_stale(key) if key else None
+            if not stale:
+                raise
+            age, response = stale
+            raise JalBotTimeout(f"{err} after {timeout}s",
+                                partial=f"_*Last reply from {int(age)}s ago*_\n{response}")
+
+    def run_command(self, func, event, user, timeout, key=None, ttl=0):
+        """
+        Create the bot command object and run it to get the reply, with HTTP
+        calls limited to the command's time budget. Replies built from stale
+        cached data are flagged and not cached.
+        """
+        with deadline(timeout), collect_stale() as stale_hosts:
+            try:
+                bot_command = func(event, user)
+                response = bot_command.run_cmd()
+            except JalBotTimeout:
+                raise
+            except Exception as err:
+                if expired():
+                    raise JalBotTimeout(f"Command timed out | {err.__class__.__name__}") from err
+                raise
+        if stale_hosts:
+            if isinstance(response, str):
+                response = f"{response}\n_:warning: {', '.join(sorted(stale_hosts))} unavailable, showing cached data_"
+            return response
+        if ttl:
+            self.replies.set(key, response, ttl)
+        return response
+
     def get_bot_command(self, text=None):
         """
         Check if Slack message is a command for JalBot
         :param text:
         :return:
         """
-        if not text:
-            return
-        # names bot will respond to
-        bot = text.split(None, 1)[0].lower().strip()
-        if bot not in self.config["bot_names"]:
-            return
-        bot_text = text.split(None, 1)[1].strip().replace('  ', ' ')
-        bot_command = bot_text.split()[0]
-        return (bot_command, bot_text)
+        return self.matcher.match(text)
 
     def post_to_slack(self, response, event, emoji):
         """
         Post reply to Slack and add command complete emoji
         """
-        self.post_message(event["channel"], response)
-        self.del_reaction("spinning", event["ts"], event["channel"])
-        self.post_reaction(emoji, event["ts"], event["channel"])
-        return
+        return self.web.finish(event["channel"], event["ts"], self.message_args(response), emoji)
 
     def get_func(self, command, event):
         """
@@ -204,14 +303,31 @@ class Slack(object):
     @log_command
     def handle_message(self, command, event):
         """
-        Handle Slack messages sent to JalBot
+        Handle Slack messages sent to JalBot, dropping the command's spinner
+        if nothing was posted because the handler raised
         :param event:
         """
+        try:
+            self.reply(command, event)
+        finally:
+            self.web.cancel(event["channel"], event["ts"])
+
+    def reply(self, command, event):
+        """
+        Run a command and post its reply or error
+        """
         user = self.user_info(event["user"])
         func = self.get_func(command, event)
+        if not func:
+            return
         try:
-            bot_command = func(event, user)
-            response = bot_command.run_cmd()
+            response = self.command_reply(command, func, event, user)
+        except JalBotTimeout as err:
+            response = f":stopwatch: _*JalBot {command.upper()} Timeout*_```{err}```"
+            if err.partial:
+                response = f"{response}\n{err.partial}"
+            self.post_to_slack(response, event, 'x')
+            return
         except JalBotError as err:
             response = f":red_dot: _*JalBot {command.upper()} Error*_```{err}```"
             self.post_to_slack(response, event, 'x')
@@ -237,10 +353,4 @@ class Slack(object):
             ]
             self.post_to_slack("\n".join(response), event, 'skull_and_crossbones')
             return
-        try:
-            self.post_to_slack(response, event, 'robot_face')
-        except Exception as err:
-            logging.error(f'ERROR POSTING TO SLACK API: {err}')
-            time.sleep(1)
-            self.client.rtm_connect()
-            self.post_message(event["channel"], response)
+        self.post_to_slack(response, event, 'robot_face')
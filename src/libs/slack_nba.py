@@ -12,11 +12,12 @@ class SlackNBA:
     """
     Create a Slack response object`
     """
-    def __init__(self, args, option, team=None, player=None):
+    def __init__(self, args, option, team=None, player=None, channel=None):
         self.args = args
         self.option = option
         self.team = team
         self.player = player
+        self.channel = channel
         self.config = get_config('nba.json')
 
     @property
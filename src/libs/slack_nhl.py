@@ -2,6 +2,7 @@ import datetime
 import logging
 import redis
 
+from libs import nhl_live
 from libs.nhl import NHL
 from libs.nhl import NHLTeam
 from libs.nhl import NHLLeague
@@ -14,14 +15,25 @@ class SlackNHL:
     """
     Create a Slack response object`
     """
-    def __init__(self, args, option, team=None, player=None):
+    def __init__(self, args, option, team=None, player=None, channel=None):
         self.args = args
         self.option = option
         self.team = team
         self.player = player
+        self.channel = channel
         self.config = get_config('nhl_config.json')
         self.emojis = self.config['emojis']
         self.nhl = NHL()
+        self._teams = {}
+
+    def nhl_team(self, team=None):
+        """
+        Return the NHLTeam for team, shared by everything built for this reply
+        """
+        team = team or self.team
+        if team not in self._teams:
+            self._teams[team] = NHLTeam(team)
+        return self._teams[team]
 
     @property
     def reply(self):
@@ -35,7 +47,9 @@ class SlackNHL:
             'stats': self.nhl_stats_reply,
             'roster': self.nhl_roster,
             'career': self.nhl_career_stats,
-            'standings': self.nhl_standings
+            'standings': self.nhl_standings,
+            'follow': self.nhl_follow,
+            'unfollow': self.nhl_unfollow
         }
         option = options.get(self.option)
         response = option()
@@ -71,11 +85,41 @@ class SlackNHL:
             reply = self.nhl_player_stats()
         return reply
 
+    def nhl_follow(self):
+        """
+        Subscribe the channel to live updates for a team's games
+        """
+        if not self.team:
+            raise NHLException('Missing required arg -t|-team')
+        team = self.nhl_team()
+        emoji = self.emojis.get(str(team.team_id))
+        game = nhl_live.live_games().follow(team.team_id, self.channel)
+        reply = [f":{emoji}: *Following {team.name}*"]
+        if game:
+            away_team = game['teams']['away']['team']['name']
+            home_team = game['teams']['home']['team']['name']
+            reply.append(f">*Updates for {away_team} vs {home_team} will be posted here*")
+        else:
+            reply.append(">*No game today, updates will be posted here during their next game*")
+        return "\n".join(reply)
+
+    def nhl_unfollow(self):
+        """
+        Unsubscribe the channel from live updates for a team's games
+        """
+        if not self.team:
+            raise NHLException('Missing required arg -t|-team')
+        team = self.nhl_team()
+        emoji = self.emojis.get(str(team.team_id))
+        if not nhl_live.live_games().unfollow(team.team_id, self.channel):
+            return f":{emoji}: *_Not following {team.name}_*"
+        return f":{emoji}: *Stopped following {team.name}*"
+
     def nhl_team_stats(self):
         """
         Return slack reply with NHL stats
         """
-        team = NHLTeam(self.team)
+        team = self.nhl_team()
         emoji = self.emojis.get(str(team.team))
         team_stats = team.stats
         stats = team_stats['teamStats'][0]['splits'][0]['stat']
@@ -108,10 +152,11 @@ class SlackNHL:
         Get player stats
         """
         season = self.args.get('season')
+        player = NHLPlayer(self.player)
         if season:
-            stats = self.team.get_player_season_stats(self.player, season=season)
+            stats = player.season_stats_for(season)
         else:
-            stats = self.team.get_player_season_stats(self.player)
+            stats = player.season_stats
         emoji = self.config['emojis'].get(str(stats['team']))
         reply = [
             f":{emoji}: *{self.player}*",
@@ -161,12 +206,11 @@ class SlackNHL:
         """
         Return slack reply with NHL stats
         """
-        team = NHLTeam(self.team)
+        team = self.nhl_team()
         nhl_players = redis.StrictRedis(host='jal_redis.backend', port=6379, db=0)
         emoji = self.emojis.get(str(self.team))
         roster = team.roster
-        team_stats = team.stats
-        reply = [f":{emoji}: *{team_stats['name']} Roster*"]
+        reply = [f":{emoji}: *{team.name} Roster*"]
         for i in range(len(roster)):
             player = roster[i]['person']
             nhl_players.set(player['fullName'], player['id'])
@@ -179,7 +223,7 @@ class SlackNHL:
 
     def nhl_schedule(self, title=True, limit=None, type=None):
         """Format slack reply"""
-        team = NHLTeam(self.team)
+        team = self.nhl_team()
         games = team.unplayed_games
         num_games = self.args.get('games')
         emoji = self.emojis.get(str(team.name))
@@ -211,7 +255,7 @@ class SlackNHL:
 
     def nhl_league_schedule(self, title=True, limit=None, type=None):
         """Format slack reply"""
-        nhl = NHL()
+        nhl = self.nhl
         if not nhl.todays_games:
             return f":nhl: *_No Games Today*_"
         games = nhl.todays_games['games']
@@ -277,7 +321,7 @@ class SlackNHL:
 
     def nhl_team_scores(self, title=True, limit=None):
         """Format slack reply"""
-        team = NHLTeam(self.team)
+        team = self.nhl_team()
         games = team.game_results
         emoji = self.emojis.get(str(team.team_id))
         num_games = self.args.get('games')
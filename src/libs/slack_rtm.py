@@ -0,0 +1,131 @@
+import aiohttp
+import asyncio
+import logging
+
+from utils import codec
+from utils.retry import RetryPolicy
+
+
+class SlackRTM:
+    """
+    Event driven reader for the Slack Real Time Messaging websocket
+
+    Frames are awaited on an aiohttp websocket instead of polling
+    SlackClient.rtm_read, so the reader sleeps until Slack sends something.
+    If record is a file path every raw frame is appended to it, which is
+    how the corpus replayed by test/bench_ingest.py is captured. Failed
+    connections are retried after a capped, jittered backoff that grows
+    until a connection succeeds.
+    """
+    def __init__(self, client, on_event, heartbeat=30, record=None, backoff=None):
+        self.client = client
+        self.on_event = on_event
+        self.heartbeat = heartbeat
+        self.record = record
+        self.backoff = backoff or RetryPolicy('slack_rtm', base_delay=1, max_delay=30)
+        self.failures = 0
+        self.loop = None
+
+    def connect(self):
+        """
+        Open the websocket and read events until Slack closes the connection
+        """
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.run())
+        finally:
+            self.loop.close()
+            self.loop = None
+
+    async def run(self):
+        """
+        Read events, backing off before returning if the connection failed
+        """
+        try:
+            await self.read_events()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            logging.error(f"Slack RTM connection error | {err.__class__.__name__} {err}")
+            await self.wait_to_reconnect()
+
+    async def wait_to_reconnect(self):
+        """
+        Sleep for the backoff delay of the current run of failed connections
+        """
+        delay = self.backoff.backoff(self.failures)
+        self.failures += 1
+        logging.info(f"Reconnecting to Slack RTM in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    def rtm_url(self):
+        """
+        Get a websocket URL from the rtm.connect Web API method
+        """
+        response = self.client.api_call("rtm.connect")
+        if not response.get('ok'):
+            logging.error(f"Slack rtm.connect failed | {response.get('error')}")
+            return None
+        return response['url']
+
+    async def read_events(self):
+        """
+        Await websocket frames and hand each parsed event to on_event
+        """
+        url = await self.loop.run_in_executor(None, self.rtm_url)
+        if not url:
+            await self.wait_to_reconnect()
+            return
+        record = open(self.record, 'a') if self.record else None
+        try:
+            await self.read_frames(url, record)
+        finally:
+            if record:
+                record.close()
+
+    async def read_frames(self, url, record=None):
+        """
+        Read frames from the websocket until it closes
+        """
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(url, heartbeat=self.heartbeat) as ws:
+                logging.info('Connected to Slack')
+                self.failures = 0
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        if record:
+                            record.write(f"{msg.data}\n")
+                        event = self.decode(msg.data)
+                        if event is None:
+                            continue
+                        if event.get('type') == 'goodbye':
+                            logging.info('Slack RTM goodbye | reconnecting')
+                            break
+                        self.handle(event)
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        logging.info(f"Slack RTM websocket closed | {msg.type}")
+                        break
+
+    @staticmethod
+    def decode(data):
+        """
+        Parse a text frame, returning None for a frame that isn't a JSON
+        object so one bad frame doesn't drop the connection
+        """
+        try:
+            event = codec.loads(data)
+        except ValueError as err:
+            logging.error(f"Ignoring malformed Slack RTM frame | {err}")
+            return None
+        if not isinstance(event, dict):
+            logging.error(f"Ignoring unexpected Slack RTM frame | {data[:100]}")
+            return None
+        return event
+
+    def handle(self, event):
+        """
+        Pass an event to the event handler without letting a bad event
+        kill the reader
+        """
+        try:
+            self.on_event(event)
+        except Exception as err:
+            logging.error(f"Error handling Slack event | {err}")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Thread
+
+from utils.metrics import METRICS
+from utils.ratelimit import TokenBucket
+
+
+# Slack Web API rate limit tiers in requests per second
+TIERS = {
+    'chat.postMessage': {'rate': 1, 'burst': 5},
+    'reactions.add': {'rate': 0.8, 'burst': 10},
+    'reactions.remove': {'rate': 0.3, 'burst': 5},
+    'users.info': {'rate': 1.6, 'burst': 20},
+    'users.list': {'rate': 0.3, 'burst': 2},
+    'default': {'rate': 0.3, 'burst': 5}
+}
+
+
+class SlackWebDispatcher:
+    """
+    Send Slack Web API calls from a dedicated event loop
+
+    Each Web API method gets a token bucket sized to its Slack rate limit
+    tier and a ratelimited response pauses the bucket for Retry-After
+    seconds before the call is retried. The spinner reaction on a command
+    is only posted if the reply takes longer than spinner_delay seconds.
+    """
+    def __init__(self, client, config=None):
+        config = config or {}
+        self.client = client
+        self.spinner_delay = config.get('spinner_delay', 1.0)
+        self.max_retries = config.get('max_retries', 3)
+        tiers = dict(TIERS, **config.get('tiers', {}))
+        self._buckets = {
+            method: TokenBucket(tier['rate'], tier['burst']) for method, tier in tiers.items()
+        }
+        self._spinners = {}
+        self._executor = ThreadPoolExecutor(max_workers=config.get('workers', 8))
+        self.loop = asyncio.new_event_loop()
+        Thread(target=self._run_loop, daemon=True).start()
+
+    def _run_loop(self):
+        """
+        Web API event loop
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _submit(self, coro):
+        """
+        Schedule a coroutine on the Web API loop and log any failure
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception():
+            logging.error(f"Slack Web API call failed | {future.exception()}")
+
+    def call(self, method, **kwargs):
+        """
+        Queue a Web API call, returning a future with the API response
+        """
+        return self._submit(self._call(method, **kwargs))
+
+    def start(self, channel, ts):
+        """
+        Mark a command as started, posting the spinner if it runs long
+        """
+        return self._submit(self._start(channel, ts))
+
+    def finish(self, channel, ts, message, emoji):
+        """
+        Post a command's reply and swap the spinner for the result emoji
+
+        With no message only the emoji is posted, which is how commands
+        rejected by the dispatcher are marked busy
+        """
+        return self._submit(self._finish(channel, ts, message, emoji))
+
+    def cancel(self, channel, ts):
+        """
+        Drop a command's spinner without posting a reply. Does nothing if
+        the command was already finished.
+        """
+        return self._submit(self._cancel(channel, ts))
+
+    async def _call(self, method, **kwargs):
+        bucket = self._buckets.get(method, self._buckets['default'])
+        for attempt in range(self.max_retries + 1):
+            await bucket.async_wait()
+            response = await self.loop.run_in_executor(
+                self._executor, partial(self.client.api_call, method, **kwargs))
+            METRICS.incr(f"slack_web.{method}")
+            if response.get('error') != 'ratelimited':
+                return response
+            headers = {k.lower(): v for k, v in response.get('headers', {}).items()}
+            retry_after = int(headers.get('retry-after', 1))
+            logging.warning(f"Slack rate limited {method} | retrying in {retry_after}s")
+            METRICS.incr('slack_web.ratelimited')
+            bucket.pause(retry_after)
+        return response
+
+    async def _start(self, channel, ts):
+        key = (channel, ts)
+        self._spinners[key] = self.loop.call_later(self.spinner_delay, self._post_spinner, key)
+
+    def _post_spinner(self, key):
+        channel, ts = key
+        self._spinners[key] = self.loop.create_task(
+            self._call('reactions.add', name='spinning', timestamp=ts, channel=channel))
+
+    async def _finish(self, channel, ts, message, emoji):
+        calls = [self._call('reactions.add', name=emoji, timestamp=ts, channel=channel)]
+        if message:
+            calls.insert(0, self._call('chat.postMessage', channel=channel, as_user=True, **message))
+        spinner = self._spinners.pop((channel, ts), None)
+        if isinstance(spinner, asyncio.TimerHandle):
+            spinner.cancel()
+            METRICS.incr('slack_web.spinner_skipped')
+        elif spinner is not None:
+            await spinner
+            calls.append(self._call('reactions.remove', name='spinning', timestamp=ts, channel=channel))
+        responses = await asyncio.gather(*calls)
+        return responses[0]
+
+    async def _cancel(self, channel, ts):
+        spinner = self._spinners.pop((channel, ts), None)
+        if isinstance(spinner, asyncio.TimerHandle):
+            spinner.cancel()
+        elif spinner is not None:
+            await spinner
+            await self._call('reactions.remove', name='spinning', timestamp=ts, channel=channel)
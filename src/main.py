@@ -1,10 +1,10 @@
 import logging
 import os
-import time
 
 from libs import slack
 
 from utils.BotTools import setup_logger
+from utils.retry import RetryPolicy
 
 
 class JalBot(object):
@@ -37,12 +37,8 @@ def main():
     token = os.environ.get('JAL_SLACK_TOKEN')
     jalbot = JalBot(token)
     logging.info('starting slackbot')
-    try:
-        output = jalbot.slackbot()
-    except Exception as err:
-        logging.error(f"JALBOT main() EXCEPTION\n{err}")
-        time.sleep(2)
-        output = jalbot.slackbot()
+    policy = RetryPolicy('jalbot', attempts=2, base_delay=2, max_delay=2, retry_on=(Exception,))
+    output = policy.call(jalbot.slackbot)
     if output:
         print(output)
 
@@ -1,15 +1,14 @@
 import json
 import logging
 import os
-import requests
 import sys
 import time
 
 from functools import wraps
 from requests.exceptions import ConnectTimeout, ConnectionError
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
+from utils import codec, http_client
+from utils.deadline import remaining
 from utils.exceptions import JalBotError
 
 
@@ -49,14 +48,15 @@ def setup_logger():
 
 def set_timeout(timeout=None):
     """
-    Set requests timeout default to 250 sec if not specified
+    Set requests timeout default to 250 sec if not specified, capped at the
+    time left before the current command's deadline
     :return:
     """
     if not timeout:
         timeout = 250
     else:
         timeout = int(timeout)
-    return timeout
+    return remaining(timeout)
 
 
 def get_config(config_file):
@@ -80,12 +80,9 @@ def try_request(command, *args, **kwargs):
     requests wrapper for API calls
     """
     command = command.capitalize()
-    session = requests.session()
-    retries = Retry(total=5, backoff_factor=1, status_forcelist=[ 502, 503, 504 ])
-    session.mount('http://', HTTPAdapter(max_retries=retries))
     try:
-        # request = requests.request(*args, **kwargs)
-        request = session.get(*args, **kwargs)
+        kwargs['timeout'] = set_timeout(kwargs.get('timeout'))
+        request = http_client.get(*args, **kwargs)
         logging.info(f"{command} | {request.status_code}")
     except (ConnectTimeout, ConnectionError) as err:
         err_name = err.__class__.__name__
@@ -96,7 +93,7 @@ def try_request(command, *args, **kwargs):
             raise JalBotRequestsException(f"{command} API Error {request.status_code}")
         raise JalBotRequestsException(f"{command} API Error {request.status_code}\n{request.content}")
     if 'json' in dir(request):
-        request = request.json()
+        request = codec.response_json(request)
     return request
 
 
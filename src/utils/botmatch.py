@@ -0,0 +1,29 @@
+import re
+
+
+class BotMatcher:
+    """
+    Precompiled matcher for messages addressed to the bot
+
+    Messages that don't start with one of the bot names are rejected by a
+    single anchored regex match without splitting or copying the text.
+    Command aliases are resolved to the command name.
+    """
+    def __init__(self, bot_names, alt_names=None):
+        names = sorted(bot_names, key=len, reverse=True)
+        pattern = r'\s*(?:{})\s+(\S+)'.format('|'.join(re.escape(name) for name in names))
+        self._pattern = re.compile(pattern, re.IGNORECASE)
+        self.alt_names = alt_names or {}
+
+    def match(self, text):
+        """
+        Return (command, command text) for a bot command or None
+        """
+        if not text:
+            return None
+        match = self._pattern.match(text)
+        if not match:
+            return None
+        command = match.group(1)
+        bot_text = text[match.start(1):].strip().replace('  ', ' ')
+        return (self.alt_names.get(command, command), bot_text)
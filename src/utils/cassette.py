@@ -0,0 +1,143 @@
+import asyncio
+import base64
+import logging
+import os
+import requests
+import threading
+import time
+
+from requests.structures import CaseInsensitiveDict
+
+from utils import codec
+from utils.exceptions import CassetteMiss
+from utils.metrics import METRICS
+
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class Cassette:
+    """
+    Record upstream HTTP responses to fixture files and replay them offline
+
+    In record mode every GET made through http_client is performed as usual
+    and its response is written to path, one JSON file per URL. In replay
+    mode the recorded responses are returned without touching the network,
+    after sleeping latency seconds to stand in for the upstream, and a GET
+    that was never recorded raises CassetteMiss.
+    """
+    def __init__(self, path, mode=REPLAY, latency=0):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a cassette from the JALBOT_CASSETTE* environment variables,
+        or return None when JALBOT_CASSETTE isn't set
+        """
+        path = os.environ.get('JALBOT_CASSETTE')
+        if not path:
+            return None
+        return cls(path,
+                   mode=os.environ.get('JALBOT_CASSETTE_MODE', REPLAY),
+                   latency=float(os.environ.get('JALBOT_CASSETTE_LATENCY', 0)))
+
+    @property
+    def replaying(self):
+        """True when responses come from the fixtures instead of the network"""
+        return self.mode == REPLAY
+
+    def _file(self, url, params=None):
+        # Imported here as http_cache imports this module
+        from utils.http_cache import cache_key
+        return os.path.join(self.path, f"{cache_key(url, params)}.json")
+
+    def load(self, url, params=None):
+        """
+        Return (status, headers, body) recorded for a GET
+        """
+        try:
+            with open(self._file(url, params), 'rb') as f:
+                entry = codec.loads(f.read())
+        except FileNotFoundError:
+            METRICS.incr('cassette.misses')
+            raise CassetteMiss(f"No recorded response for {url}")
+        METRICS.incr('cassette.replayed')
+        if entry.get('base64'):
+            body = base64.b64decode(entry['body'])
+        else:
+            body = entry['body'].encode('utf-8')
+        return entry['status'], entry['headers'], body
+
+    def save(self, url, params, status, headers, body):
+        """
+        Record the response to a GET
+        """
+        headers = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+        entry = {'url': url, 'params': params, 'status': status, 'headers': headers}
+        try:
+            entry['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body'] = base64.b64encode(body).decode('ascii')
+            entry['base64'] = True
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file(url, params), 'w') as f:
+                f.write(codec.dumps(entry))
+        METRICS.incr('cassette.recorded')
+        logging.info(f"Recorded {url}")
+
+    def replay(self, url, params=None):
+        """
+        Return the recorded requests Response for a GET
+        """
+        status, headers, body = self.load(url, params)
+        if self.latency:
+            time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        return response
+
+    async def async_replay(self, url, params=None):
+        """
+        Return (status, headers, body) recorded for a GET made with aiohttp
+        """
+        status, headers, body = self.load(url, params)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return status, CaseInsensitiveDict(headers), body
+
+    def record(self, url, params, response):
+        """
+        Record a requests Response
+        """
+        self.save(url, params, response.status_code, response.headers, response.content)
+        return response
+
+
+_CASSETTE = Cassette.from_env()
+
+
+def active():
+    """
+    The cassette set up from the environment, or None
+    """
+    return _CASSETTE
+
+
+def use(cassette):
+    """
+    Make cassette the active cassette, None turns recording and replay off
+    """
+    global _CASSETTE
+    _CASSETTE = cassette
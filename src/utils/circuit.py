@@ -0,0 +1,136 @@
+import contextvars
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+
+from utils.exceptions import UpstreamUnavailable
+from utils.metrics import METRICS
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STALE = contextvars.ContextVar('jalbot_stale_hosts', default=None)
+
+
+class CircuitBreaker:
+    """
+    Track the health of one upstream host
+
+    The circuit opens after failure_threshold consecutive failures, where a
+    response slower than latency_slo seconds counts as a failure. While open
+    calls are refused until reset_timeout has passed, then a single probe
+    is let through (half open) and its outcome closes or reopens the circuit.
+    """
+    def __init__(self, host, failure_threshold=5, latency_slo=None, reset_timeout=30):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, host, config):
+        """
+        Create a breaker from the circuit section of a host's http config
+        """
+        return cls(host,
+                   failure_threshold=config.get('failure_threshold', 5),
+                   latency_slo=config.get('latency_slo'),
+                   reset_timeout=config.get('reset_timeout', 30))
+
+    def _set_state(self, state):
+        if state != self.state:
+            logging.info(f"Circuit for {self.host} {self.state} -> {state}")
+            if state == OPEN:
+                METRICS.incr(f"circuit.{self.host}.opened")
+        self.state = state
+        METRICS.gauge(f"circuit.{self.host}.state", state)
+
+    def retry_in(self):
+        """
+        Seconds until an open circuit lets a probe through
+        """
+        return max(0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def blocked(self):
+        """
+        Return True if allow() would refuse a call, without letting a probe
+        through
+        """
+        return self.state == HALF_OPEN or (self.state == OPEN and self.retry_in() > 0)
+
+    def allow(self):
+        """
+        Return True if a call may go to the host now
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and not self.retry_in():
+                self._set_state(HALF_OPEN)
+                return True
+        METRICS.incr(f"circuit.{self.host}.rejected")
+        return False
+
+    def record(self, ok, latency=0):
+        """
+        Record the outcome of a call to the host
+        """
+        if ok and self.latency_slo and latency > self.latency_slo:
+            METRICS.incr(f"circuit.{self.host}.slow")
+            ok = False
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self._set_state(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the breaker. Exceptions and 5xx responses count
+        as failures. Raise UpstreamUnavailable while the circuit is open.
+        """
+        if not self.allow():
+            raise UpstreamUnavailable(self.host, self.retry_in())
+        start = time.monotonic()
+        try:
+            response = func(*args, **kwargs)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(response.status_code < 500, time.monotonic() - start)
+        return response
+
+
+@contextmanager
+def collect_stale():
+    """
+    Collect the hosts whose cached data was served stale inside the block
+    """
+    hosts = set()
+    token = _STALE.set(hosts)
+    try:
+        yield hosts
+    finally:
+        _STALE.reset(token)
+
+
+def mark_stale(host):
+    """
+    Note that a stale cached response from host was used
+    """
+    METRICS.incr(f"circuit.{host}.stale")
+    hosts = _STALE.get()
+    if hosts is not None:
+        hosts.add(host)
@@ -0,0 +1,55 @@
+"""
+JSON codec used for API responses and cached values
+
+Uses orjson when it is installed, then ujson, then the standard library.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+if orjson:
+    NAME = 'orjson'
+
+    def loads(data):
+        """Decode a JSON str or bytes"""
+        return orjson.loads(data)
+
+    def dumps(value):
+        """Encode a value as a JSON str"""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+elif ujson:
+    NAME = 'ujson'
+
+    def loads(data):
+        """Decode a JSON str or bytes"""
+        return ujson.loads(data)
+
+    def dumps(value):
+        """Encode a value as a JSON str"""
+        return ujson.dumps(value, ensure_ascii=False)
+else:
+    NAME = 'json'
+
+    def loads(data):
+        """Decode a JSON str or bytes"""
+        return json.loads(data)
+
+    def dumps(value):
+        """Encode a value as a JSON str"""
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def response_json(response):
+    """
+    Decode the body of a requests Response
+    """
+    return loads(response.content)
@@ -0,0 +1,58 @@
+import contextvars
+import time
+
+from contextlib import contextmanager
+
+from utils.exceptions import JalBotTimeout
+
+
+_DEADLINE = contextvars.ContextVar('jalbot_deadline', default=None)
+
+
+def command_timeout(command_config, option, default=60):
+    """
+    Get the time budget in seconds for a command option from the timeouts
+    section of the command's config
+    """
+    timeouts = command_config.get('timeouts', {})
+    return timeouts.get(option or 'default', timeouts.get('default', default))
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Run the enclosed block with a deadline seconds from now. Code running
+    in the block, including asyncio tasks it creates, sees the deadline
+    through remaining().
+    """
+    token = _DEADLINE.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def expired():
+    """
+    Return True if the current deadline has passed
+    """
+    expires = _DEADLINE.get()
+    return expires is not None and expires <= time.monotonic()
+
+
+def remaining(default=None):
+    """
+    Seconds left before the current deadline, capped at default
+
+    Return default if there is no deadline and raise JalBotTimeout if the
+    deadline has passed.
+    """
+    expires = _DEADLINE.get()
+    if expires is None:
+        return default
+    left = expires - time.monotonic()
+    if left <= 0:
+        raise JalBotTimeout('Command timed out waiting on upstream APIs')
+    if default is None:
+        return left
+    return min(left, default)
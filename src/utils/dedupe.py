@@ -0,0 +1,80 @@
+import logging
+import redis
+import threading
+import time
+
+from collections import OrderedDict
+
+from utils.metrics import METRICS
+
+
+class EventDeduper:
+    """
+    Remember recently seen Slack events so each one is only run once
+
+    Events are keyed on client_msg_id, falling back to channel and ts, and
+    remembered for window seconds. When a Redis client is given the keys are
+    also claimed in Redis so several front ends agree on who runs an event.
+    """
+    def __init__(self, window=300, max_size=10000, redis_client=None, prefix='jalbot:seen:'):
+        self.window = window
+        self.max_size = max_size
+        self.redis = redis_client
+        self.prefix = prefix
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, redis_config=None):
+        """
+        Create a deduper from the dedupe section of a config file
+
+        Redis timeouts are kept short because first_seen runs on the RTM
+        reader; when Redis is slow or down the local window is used alone.
+        """
+        redis_client = None
+        if config.get('redis'):
+            redis_config = redis_config or {}
+            redis_client = redis.StrictRedis(host=redis_config.get('host', 'jal_redis.backend'),
+                                             port=redis_config.get('port', 6379),
+                                             db=0,
+                                             socket_timeout=config.get('socket_timeout', 0.5),
+                                             socket_connect_timeout=config.get('socket_connect_timeout', 0.5))
+        return cls(window=config.get('window', 300),
+                   max_size=config.get('max_size', 10000),
+                   redis_client=redis_client)
+
+    @staticmethod
+    def event_key(event):
+        """
+        Key identifying a Slack message event
+        """
+        if event.get('client_msg_id'):
+            return event['client_msg_id']
+        return f"{event.get('channel')}:{event.get('ts')}"
+
+    def first_seen(self, event):
+        """
+        Return True the first time an event is seen within the window
+        """
+        key = self.event_key(event)
+        now = time.monotonic()
+        with self._lock:
+            while self._seen:
+                oldest, expires = next(iter(self._seen.items()))
+                if expires > now and len(self._seen) < self.max_size:
+                    break
+                del self._seen[oldest]
+            if key in self._seen:
+                METRICS.incr('dedupe.duplicates')
+                return False
+            self._seen[key] = now + self.window
+        if self.redis:
+            try:
+                if not self.redis.set(f"{self.prefix}{key}", 1, nx=True, ex=self.window):
+                    METRICS.incr('dedupe.duplicates')
+                    return False
+            except redis.exceptions.RedisError as err:
+                METRICS.incr('dedupe.redis_errors')
+                logging.error(f"Redis dedupe error, using the local window | {err}")
+        return True
@@ -0,0 +1,121 @@
+import logging
+import queue
+import threading
+import time
+import traceback
+
+from collections import defaultdict, deque
+
+from utils.metrics import METRICS
+
+
+class CommandDispatcher:
+    """
+    Bounded worker pool for running bot commands
+
+    Jobs beyond a channel's concurrency cap are deferred until one of that
+    channel's running jobs finishes. Once the total number of queued and
+    deferred jobs reaches max_queue new jobs are rejected so the caller can
+    tell the user the bot is busy.
+    """
+    def __init__(self, handler, workers=8, max_queue=50, channel_concurrency=2, name='dispatcher'):
+        self.name = name
+        self.max_queue = int(max_queue)
+        self.channel_concurrency = int(channel_concurrency)
+        self._handler = handler
+        self._queue = queue.Queue()
+        self._deferred = defaultdict(deque)
+        self._active = defaultdict(int)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._workers = []
+        for i in range(int(workers)):
+            worker = threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @classmethod
+    def from_config(cls, handler, config):
+        """
+        Create a dispatcher from the dispatcher section of a config file
+        """
+        return cls(handler,
+                   workers=config.get('workers', 8),
+                   max_queue=config.get('max_queue', 50),
+                   channel_concurrency=config.get('channel_concurrency', 2))
+
+    @property
+    def depth(self):
+        """
+        Number of jobs waiting to run, including deferred jobs
+        """
+        with self._lock:
+            return self._pending
+
+    def submit(self, channel, *args):
+        """
+        Queue handler(*args) to run on a worker thread
+
+        Return False if the job was rejected because the queue is full
+        """
+        job = (time.monotonic(), channel, args)
+        with self._lock:
+            if self._pending >= self.max_queue:
+                METRICS.incr(f"{self.name}.rejected")
+                logging.warning(f"{self.name} queue full | rejecting job for channel {channel}")
+                return False
+            self._pending += 1
+            if self._active[channel] < self.channel_concurrency:
+                self._active[channel] += 1
+                self._queue.put(job)
+            else:
+                METRICS.incr(f"{self.name}.deferred")
+                self._deferred[channel].append(job)
+            METRICS.incr(f"{self.name}.submitted")
+            METRICS.gauge(f"{self.name}.queue_depth", self._pending)
+        return True
+
+    def stop(self):
+        """
+        Stop the worker threads once the queued jobs have run
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _worker(self):
+        """
+        Worker thread loop
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            enqueued, channel, args = job
+            wait = time.monotonic() - enqueued
+            with self._lock:
+                self._pending -= 1
+                METRICS.gauge(f"{self.name}.queue_depth", self._pending)
+            METRICS.gauge(f"{self.name}.last_wait", round(wait, 3))
+            METRICS.incr(f"{self.name}.wait_seconds", wait)
+            try:
+                self._handler(*args)
+            except Exception as err:
+                logging.error(f"{self.name} job failed | {err}\n{traceback.format_exc()}")
+            finally:
+                METRICS.incr(f"{self.name}.completed")
+                self._release(channel)
+
+    def _release(self, channel):
+        """
+        Hand a finished job's channel slot to the next deferred job
+        """
+        with self._lock:
+            deferred = self._deferred.get(channel)
+            if deferred:
+                self._queue.put(deferred.popleft())
+                if not deferred:
+                    del self._deferred[channel]
+                return
+            self._active[channel] -= 1
+            if self._active[channel] <= 0:
+                del self._active[channel]
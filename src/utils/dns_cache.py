@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+
+from aiohttp import ThreadedResolver
+from aiohttp.abc import AbstractResolver
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from utils.metrics import METRICS
+
+
+class DNSCache:
+    """
+    In-process cache of getaddrinfo results for a fixed set of hosts
+
+    Lookups for the cached hosts are answered from memory for ttl seconds
+    and a background thread re-resolves them before they expire, so DNS
+    stays off the request path. If a lookup fails the last good answer is
+    served instead of raising socket.gaierror. Other hosts are resolved as
+    usual. The cache is only used by connections made through a
+    CachedDNSAdapter or a CachedResolver, socket.getaddrinfo is left alone.
+    """
+    def __init__(self, hosts, ttl=300, refresh_interval=60):
+        self.hosts = set(hosts)
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._getaddrinfo = socket.getaddrinfo
+        self._refresher = None
+
+    @classmethod
+    def from_config(cls, hosts, config):
+        """
+        Create a cache from the dns section of http.json
+        """
+        return cls(hosts,
+                   ttl=config.get('ttl', 300),
+                   refresh_interval=config.get('refresh_interval', 60))
+
+    def _resolve(self, key):
+        """
+        Look up key with the real getaddrinfo and cache the answer
+        """
+        result = self._getaddrinfo(*key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """
+        socket.getaddrinfo answered from the cache for the cached hosts
+        """
+        if host not in self.hosts:
+            return self._getaddrinfo(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            METRICS.incr('dns_cache.hits')
+            return entry[1]
+        METRICS.incr('dns_cache.misses')
+        try:
+            return self._resolve(key)
+        except socket.gaierror as err:
+            if not entry:
+                raise
+            logging.error(f"DNS lookup for {host} failed, using cached address | {err}")
+            METRICS.incr('dns_cache.stale')
+            return entry[1]
+
+    def addresses(self, host, port):
+        """
+        Distinct IP addresses for a TCP connection to host, in the order
+        getaddrinfo returned them
+        """
+        addresses = []
+        for *_, address in self.getaddrinfo(host, port, 0, socket.SOCK_STREAM):
+            if address[0] not in addresses:
+                addresses.append(address[0])
+        return addresses
+
+    def refresh(self):
+        """
+        Re-resolve entries that expire before the next refresh
+        """
+        with self._lock:
+            expiring = [key for key, (expires, _) in self._entries.items()
+                        if expires - time.monotonic() <= self.refresh_interval]
+        for key in expiring:
+            try:
+                self._resolve(key)
+            except socket.gaierror as err:
+                logging.error(f"DNS refresh for {key[0]} failed | {err}")
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def start(self):
+        """
+        Start re-resolving cached hosts in the background
+        """
+        with self._lock:
+            if self._refresher:
+                return
+            self._refresher = threading.Thread(target=self._refresh_forever, name='dns-refresh', daemon=True)
+        self._refresher.start()
+        logging.info(f"DNS cache started for {len(self.hosts)} hosts")
+
+
+class _CachedDNSConnectionMixin:
+    """
+    Connect to the addresses the DNS cache has for the host, trying each
+    until one accepts. Certificates are still checked against the host name.
+    """
+    dns_cache = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        if host not in self.dns_cache.hosts:
+            return super()._new_conn()
+        try:
+            addresses = self.dns_cache.addresses(host, self.port)
+        except socket.gaierror:
+            return super()._new_conn()
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except NewConnectionError as err:
+                    logging.info(f"Connection to {host} at {address} failed | {err}")
+            self._dns_host = addresses[-1]
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """
+    requests adapter whose connections resolve hosts through a DNSCache
+    """
+    def __init__(self, dns_cache, **kwargs):
+        attrs = {'dns_cache': dns_cache}
+        http = type('CachedDNSHTTPConnection', (_CachedDNSConnectionMixin, HTTPConnection), attrs)
+        https = type('CachedDNSHTTPSConnection', (_CachedDNSConnectionMixin, HTTPSConnection), attrs)
+        self.pool_classes = {
+            'http': type('CachedDNSHTTPConnectionPool', (HTTPConnectionPool, ), {'ConnectionCls': http}),
+            'https': type('CachedDNSHTTPSConnectionPool', (HTTPSConnectionPool, ), {'ConnectionCls': https})
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+
+class CachedResolver(AbstractResolver):
+    """
+    aiohttp resolver answering lookups for cached hosts from a DNSCache
+    """
+    def __init__(self, dns_cache):
+        self.dns_cache = dns_cache
+        self._resolver = None
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if host not in self.dns_cache.hosts:
+            if not self._resolver:
+                self._resolver = ThreadedResolver()
+            return await self._resolver.resolve(host, port, family)
+        infos = await asyncio.get_running_loop().run_in_executor(
+            None, self.dns_cache.getaddrinfo, host, port, family, socket.SOCK_STREAM)
+        return [{'hostname': host, 'host': address[0], 'port': address[1], 'family': info_family,
+                 'proto': proto, 'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
+                for info_family, _, proto, _, address in infos]
+
+    async def close(self):
+        if self._resolver:
+            await self._resolver.close()
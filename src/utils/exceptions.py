@@ -3,6 +3,41 @@ class JalBotError(Exception):
     pass
 
 
+class JalBotTimeout(JalBotError):
+    """Raised when a command runs past its deadline"""
+    def __init__(self, message, partial=None):
+        super().__init__(message)
+        self.partial = partial
+
+
+class UpstreamUnavailable(JalBotError):
+    """Raised when an upstream host's circuit breaker is open"""
+    def __init__(self, host, retry_in=0):
+        super().__init__(f"{host} is unavailable, retrying in {int(retry_in)}s")
+        self.host = host
+
+
+class UpstreamResponseError(JalBotError):
+    """Raised when an upstream answers with an error status or a body that isn't JSON"""
+    def __init__(self, url, status, body=b''):
+        super().__init__(f"Unexpected response from {url} | status: {status}")
+        self.url = url
+        self.status = status
+        self.body = body
+
+
+class QuotaExceeded(JalBotError):
+    """Raised when an upstream API's daily quota has been used up"""
+    def __init__(self, name, quota):
+        super().__init__(f"Daily {name} quota of {quota} requests used up")
+        self.name = name
+
+
+class CassetteMiss(JalBotError):
+    """Raised when a replayed request was never recorded"""
+    pass
+
+
 class JalBotExampleError(JalBotError):
     """base class for JalBot Example errors"""
     pass
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import requests
+import time
+
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlparse
+
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from utils import cassette, codec, http_client
+from utils.circuit import mark_stale
+from utils.exceptions import UpstreamUnavailable
+from utils.http_client import get_http_config, guarded_get
+from utils.metrics import METRICS
+
+
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date')
+
+
+def cache_key(url, params=None):
+    """
+    File name for a URL and its query params
+    """
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()))}"
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def kept_headers(headers):
+    """
+    Headers worth storing with a cached body
+    """
+    return {name: headers[name] for name in KEPT_HEADERS if name in headers}
+
+
+def freshness(headers, now=None):
+    """
+    Return (store, expires) for a response from its Cache-Control header.
+    no-store responses aren't kept and no-cache ones are always revalidated.
+    """
+    now = now or time.time()
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control:
+        return False, 0
+    if 'no-cache' in cache_control:
+        return True, 0
+    max_age = re.search(r'max-age=(\d+)', cache_control)
+    if max_age:
+        return True, now + int(max_age.group(1))
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return True, parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return True, 0
+
+
+class HTTPCache:
+    """
+    Disk cache of GET responses revalidated with ETag and Last-Modified
+
+    Bodies and their validators are kept on the stats_cache volume so they
+    survive restarts. A response still fresh under Cache-Control max-age is
+    served without a request, otherwise the stored validators are sent as
+    If-None-Match/If-Modified-Since and a 304 is answered from disk. While
+    the host's circuit breaker is open the last body is served marked stale.
+    """
+    def __init__(self, directory, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a cache from the cache section of http.json
+        """
+        return cls(directory=config.get('directory', '/jalbot/stats_cache/http'),
+                   enabled=config.get('enabled', True))
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def load(self, key):
+        """
+        Return (meta, body) for a cached response or None
+        """
+        try:
+            with open(self._path(key, 'json'), 'r') as f:
+                meta = codec.loads(f.read())
+            with open(self._path(key, 'body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def _write(self, path, data, mode):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, key, meta, body=None):
+        """
+        Store a response's validators and, when given, its body
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if body is not None:
+                self._write(self._path(key, 'body'), body, 'wb')
+            self._write(self._path(key, 'json'), codec.dumps(meta), 'w')
+        except OSError as err:
+            logging.error(f"Unable to write HTTP cache entry {key} | {err}")
+
+    @staticmethod
+    def cached_response(meta, body):
+        """
+        Build a requests Response from a cache entry
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = meta['url']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.from_cache = True
+        response.stale = False
+        return response
+
+    @staticmethod
+    def validators(meta, headers):
+        """
+        Add a cache entry's validators to request headers
+        """
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    def revalidated(self, key, meta, headers):
+        """
+        Refresh a cache entry's headers and expiry after a 304
+        """
+        meta['headers'].update(kept_headers(headers))
+        meta['expires'] = freshness(headers)[1]
+        self.save(key, meta)
+
+    def store(self, key, url, headers, body):
+        """
+        Store a 200 response if it can be revalidated or is fresh for a while
+        """
+        store, expires = freshness(headers)
+        validators = 'ETag' in headers or 'Last-Modified' in headers
+        if store and (validators or expires):
+            meta = {
+                'url': url,
+                'expires': expires,
+                'headers': kept_headers(headers)
+            }
+            self.save(key, meta, body)
+
+    def get(self, session, url, params=None, headers=None, **kwargs):
+        """
+        GET a URL on session, answering from the cache when it is fresh or
+        the server says it hasn't changed
+        """
+        if not self.enabled or cassette.active():
+            return guarded_get(session, url, params=params, headers=headers, **kwargs)
+        host = urlparse(url).hostname
+        key = cache_key(url, params)
+        entry = self.load(key)
+        headers = dict(headers or {})
+        if entry:
+            meta, body = entry
+            if meta['expires'] > time.time():
+                METRICS.incr(f"http_cache.{host}.fresh")
+                return self.cached_response(meta, body)
+            self.validators(meta, headers)
+        try:
+            response = guarded_get(session, url, params=params, headers=headers, **kwargs)
+        except UpstreamUnavailable:
+            if not entry:
+                raise
+            mark_stale(host)
+            response = self.cached_response(meta, body)
+            response.stale = True
+            return response
+        if response.status_code == 304 and entry:
+            METRICS.incr(f"http_cache.{host}.revalidated")
+            self.revalidated(key, meta, response.headers)
+            return self.cached_response(meta, body)
+        METRICS.incr(f"http_cache.{host}.misses")
+        if response.status_code == 200:
+            self.store(key, response.url, response.headers, response.content)
+        return response
+
+    async def async_get(self, url, params=None, headers=None, **kwargs):
+        """
+        GET a URL with http_client.async_get and return (status, headers,
+        body), answering from the cache the same way get does. Cache files
+        are read and written on the loop's executor so disk I/O doesn't
+        block the other requests sharing the loop.
+        """
+        if not self.enabled or cassette.active():
+            return await http_client.async_get(url, params=params, headers=headers, **kwargs)
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).hostname
+        key = cache_key(url, params)
+        entry = await loop.run_in_executor(None, self.load, key)
+        headers = dict(headers or {})
+        if entry:
+            meta, body = entry
+            if meta['expires'] > time.time():
+                METRICS.incr(f"http_cache.{host}.fresh")
+                return 200, CaseInsensitiveDict(meta['headers']), body
+            self.validators(meta, headers)
+        try:
+            status, response_headers, response_body = await http_client.async_get(url, params=params,
+                                                                                  headers=headers, **kwargs)
+        except UpstreamUnavailable:
+            if not entry:
+                raise
+            mark_stale(host)
+            return 200, CaseInsensitiveDict(meta['headers']), body
+        if status == 304 and entry:
+            METRICS.incr(f"http_cache.{host}.revalidated")
+            await loop.run_in_executor(None, self.revalidated, key, meta, response_headers)
+            return 200, CaseInsensitiveDict(meta['headers']), body
+        METRICS.incr(f"http_cache.{host}.misses")
+        if status == 200:
+            await loop.run_in_executor(None, self.store, key, url, response_headers, response_body)
+        return status, response_headers, response_body
+
+
+_CACHE = None
+
+
+def _shared():
+    """
+    The HTTP cache shared by this process
+    """
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = HTTPCache.from_config(get_http_config().get('cache', {}))
+    return _CACHE
+
+
+def get(session, url, **kwargs):
+    """
+    GET a URL through the shared HTTP cache
+    """
+    return _shared().get(session, url, **kwargs)
+
+
+async def async_get(url, **kwargs):
+    """
+    GET a URL with aiohttp through the shared HTTP cache and return
+    (status, headers, body)
+    """
+    return await _shared().async_get(url, **kwargs)
+
+
+async def async_get_json(url, raise_for_status=False, **kwargs):
+    """
+    GET a JSON document with aiohttp through the shared HTTP cache
+    """
+    status, headers, body = await async_get(url, **kwargs)
+    return http_client.json_body(url, status, headers, body, raise_for_status)
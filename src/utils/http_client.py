@@ -0,0 +1,462 @@
+import aiohttp
+import asyncio
+import contextvars
+import json
+import logging
+import requests
+import threading
+import time
+
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from requests.structures import CaseInsensitiveDict
+
+from utils import cassette, codec
+from utils.circuit import CircuitBreaker
+from utils.deadline import remaining
+from utils.dns_cache import CachedDNSAdapter, CachedResolver, DNSCache
+from utils.exceptions import JalBotTimeout, UpstreamResponseError, UpstreamUnavailable
+from utils.metrics import METRICS
+from utils.ratelimit import RedisTokenBucket
+from utils.retry import RetryPolicy
+
+
+CONFIG_FILE = '/jalbot/config/http.json'
+
+_SESSIONS = {}
+_BREAKERS = {}
+_LIMITERS = {}
+_RETRY_POLICIES = {}
+_LATENCIES = defaultdict(lambda: deque(maxlen=200))
+_HEDGE_POOL = None
+_HEDGE_SLOTS = None
+_DNS_CACHE = None
+_DNS_LOCK = threading.Lock()
+_PREWARMED = False
+_LOCK = threading.Lock()
+_CONFIG = None
+_ASYNC_LOOP = None
+_ASYNC_SESSION = None
+_ASYNC_LIMITS = {}
+
+
+def get_http_config():
+    """
+    Get the shared HTTP client config
+    """
+    global _CONFIG
+    if _CONFIG is None:
+        with open(CONFIG_FILE, 'r') as f:
+            _CONFIG = json.load(f)
+    return _CONFIG
+
+
+def host_config(host):
+    """
+    Get the config for a host, falling back to the defaults
+    """
+    config = get_http_config()
+    settings = {k: v for k, v in config.items() if k != 'hosts'}
+    settings.update(config.get('hosts', {}).get(host, {}))
+    return settings
+
+
+def _count_response(response, *args, **kwargs):
+    """
+    Response hook counting requests and latency per host
+    """
+    host = urlparse(response.url).hostname
+    METRICS.incr(f"http.{host}.requests")
+    METRICS.incr(f"http.{host}.seconds", response.elapsed.total_seconds())
+    # Only GETs are hedged, connection prewarming HEADs would skew the delay
+    if response.request.method == 'GET':
+        _LATENCIES[host].append(response.elapsed.total_seconds())
+
+
+def _create_session(host):
+    """
+    Create a keep-alive session with a connection pool and retry adapter
+    for a single host
+    """
+    config = host_config(host)
+    retry_config = config.get('retries', {})
+    # Connection errors and timeouts are retried by the host's RetryPolicy,
+    # the adapter only retries gateway errors
+    retries = Retry(total=retry_config.get('total', 3),
+                    connect=0,
+                    read=0,
+                    backoff_factor=retry_config.get('backoff_factor', 0.5),
+                    status_forcelist=retry_config.get('status_forcelist', [502, 503, 504]),
+                    raise_on_status=False)
+    adapter_config = {
+        'pool_connections': config.get('pool_connections', 10),
+        'pool_maxsize': config.get('pool_maxsize', 10),
+        'max_retries': retries
+    }
+    cache = dns_cache()
+    adapter = CachedDNSAdapter(cache, **adapter_config) if cache else HTTPAdapter(**adapter_config)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(_count_response)
+    logging.info(f"Created HTTP session for {host}")
+    return session
+
+
+def session(url):
+    """
+    Get the shared session for the host of the provided URL
+    """
+    host = urlparse(url).hostname
+    with _LOCK:
+        host_session = _SESSIONS.get(host)
+        if not host_session:
+            host_session = _SESSIONS[host] = _create_session(host)
+    return host_session
+
+
+def _warm(host):
+    """
+    Open a keep-alive connection to host in its session's pool
+    """
+    url = f"https://{host}/"
+    try:
+        session(url).head(url, timeout=5)
+        METRICS.incr('http.prewarmed')
+    except requests.exceptions.RequestException as err:
+        logging.error(f"Unable to prewarm connection to {host} | {err.__class__.__name__}")
+
+
+def dns_cache():
+    """
+    Get the DNS cache for the hosts in http.json, or None if dns.enabled is
+    off. Sessions and the aiohttp session resolve through it.
+    """
+    global _DNS_CACHE
+    config = get_http_config()
+    dns_config = config.get('dns', {})
+    with _DNS_LOCK:
+        if not _DNS_CACHE and dns_config.get('enabled', True):
+            _DNS_CACHE = DNSCache.from_config(list(config.get('hosts', {})), dns_config)
+            _DNS_CACHE.start()
+    return _DNS_CACHE
+
+
+def prewarm():
+    """
+    Resolve the hosts in http.json into the DNS cache and, if dns.prewarm is
+    set, open a connection to each so the first command doesn't pay for
+    DNS, TCP and TLS setup. Only the first call in a process does anything.
+    """
+    global _PREWARMED
+    with _DNS_LOCK:
+        if _PREWARMED:
+            return
+        _PREWARMED = True
+    config = get_http_config()
+    hosts = list(config.get('hosts', {}))
+    cache = dns_cache()
+    if cache:
+        for host in hosts:
+            try:
+                cache.addresses(host, 443)
+            except OSError as err:
+                logging.error(f"Unable to resolve {host} | {err}")
+    if not config.get('dns', {}).get('prewarm') or cassette.active():
+        return
+    with ThreadPoolExecutor(max_workers=len(hosts) or 1, thread_name_prefix='http-prewarm') as pool:
+        list(pool.map(_warm, hosts))
+
+
+def breaker(url):
+    """
+    Get the circuit breaker for the host of the provided URL
+    """
+    host = urlparse(url).hostname
+    with _LOCK:
+        host_breaker = _BREAKERS.get(host)
+        if not host_breaker:
+            host_breaker = _BREAKERS[host] = CircuitBreaker.from_config(host, host_config(host).get('circuit', {}))
+    return host_breaker
+
+
+def limiter(url):
+    """
+    Get the shared rate limiter for the host of the provided URL, or None
+    if the host has no rate_limit config
+    """
+    host = urlparse(url).hostname
+    with _LOCK:
+        if host not in _LIMITERS:
+            config = host_config(host)
+            _LIMITERS[host] = None
+            if config.get('rate_limit'):
+                _LIMITERS[host] = RedisTokenBucket.from_config(host, config['rate_limit'], config.get('redis'))
+    return _LIMITERS[host]
+
+
+def retry_policy(url):
+    """
+    Get the retry policy for the host of the provided URL
+    """
+    host = urlparse(url).hostname
+    with _LOCK:
+        policy = _RETRY_POLICIES.get(host)
+        if not policy:
+            policy = _RETRY_POLICIES[host] = RetryPolicy.from_config(host, host_config(host).get('retry_policy', {}))
+    return policy
+
+
+def hedge_delay(host, config):
+    """
+    Seconds to wait on a request to host before hedging it, taken from a
+    percentile of the host's recent latencies
+    """
+    latencies = sorted(_LATENCIES[host])
+    if len(latencies) < config.get('min_samples', 20):
+        return config.get('delay', 1.0)
+    index = min(len(latencies) - 1, int(len(latencies) * config.get('percentile', 95) / 100))
+    return max(config.get('min_delay', 0.1), latencies[index])
+
+
+def _discard(future):
+    """
+    Close the response of a hedged request that lost
+    """
+    if not future.exception():
+        future.result().close()
+
+
+def _hedge_submit(config, func, *args, **kwargs):
+    """
+    Run func on an idle hedge worker, or return None if every worker is
+    busy so nothing queues behind slow requests that already lost
+    """
+    global _HEDGE_POOL, _HEDGE_SLOTS
+    with _LOCK:
+        if not _HEDGE_POOL:
+            workers = config.get('hedge_workers', 16)
+            _HEDGE_POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-hedge')
+            _HEDGE_SLOTS = threading.BoundedSemaphore(workers)
+    if not _HEDGE_SLOTS.acquire(blocking=False):
+        return None
+    future = _HEDGE_POOL.submit(func, *args, **kwargs)
+    future.add_done_callback(lambda _: _HEDGE_SLOTS.release())
+    return future
+
+
+def hedged_get(host_session, url, **kwargs):
+    """
+    GET request that sends a second identical request if the first hasn't
+    answered within the host's hedge delay, returning whichever answers first
+
+    Requests only run on idle hedge workers. When every worker is busy the
+    request is made on the caller's thread without a hedge.
+    """
+    host = urlparse(url).hostname
+    config = host_config(host)
+    first = _hedge_submit(config, host_session.get, url, **kwargs)
+    if not first:
+        METRICS.incr(f"http.{host}.hedges_skipped")
+        return host_session.get(url, **kwargs)
+    done, _ = wait([first], timeout=hedge_delay(host, config['hedge']))
+    if done:
+        return first.result()
+    second = _hedge_submit(config, host_session.get, url, **kwargs)
+    if not second:
+        METRICS.incr(f"http.{host}.hedges_skipped")
+        return first.result()
+    METRICS.incr(f"http.{host}.hedges")
+    pending = {first, second}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        answered = [future for future in done if not future.exception()]
+        if answered or not pending:
+            winner = answered[0] if answered else done.pop()
+            for loser in {first, second} - {winner}:
+                loser.add_done_callback(_discard)
+            if winner is second:
+                METRICS.incr(f"http.{host}.hedge_wins")
+            return winner.result()
+
+
+def guarded_get(host_session, url, **kwargs):
+    """
+    GET request on host_session through the host's retry policy, rate
+    limiter and circuit breaker, hedged for hosts with a hedge config.
+    Responses are recorded or replayed when a cassette is active.
+    """
+    tape = cassette.active()
+    if tape and tape.replaying:
+        return tape.replay(url, kwargs.get('params'))
+    response = retry_policy(url).call(_attempt, host_session, url, **kwargs)
+    if tape:
+        tape.record(url, kwargs.get('params'), response)
+    return response
+
+
+def _attempt(host_session, url, **kwargs):
+    """
+    Make one attempt at a guarded GET, with the timeout capped at what is
+    left of the command deadline. An open circuit fails the attempt before
+    it takes a rate limit token.
+    """
+    host = urlparse(url).hostname
+    host_breaker = breaker(url)
+    if host_breaker.blocked():
+        raise UpstreamUnavailable(host, host_breaker.retry_in())
+    host_limiter = limiter(url)
+    if host_limiter:
+        host_limiter.wait()
+    kwargs['timeout'] = remaining(kwargs.get('timeout'))
+    if host_config(host).get('hedge'):
+        return host_breaker.call(hedged_get, host_session, url, **kwargs)
+    return host_breaker.call(host_session.get, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """
+    GET request on the shared session for the URL's host
+    """
+    return guarded_get(session(url), url, **kwargs)
+
+
+def _async_loop():
+    """
+    Get the background event loop that owns the shared aiohttp session,
+    starting it on first use
+    """
+    global _ASYNC_LOOP
+    with _LOCK:
+        if not _ASYNC_LOOP:
+            _ASYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_ASYNC_LOOP.run_forever, name='http-client-loop', daemon=True).start()
+    return _ASYNC_LOOP
+
+
+async def _async_request(url, expires, **kwargs):
+    """
+    GET url on the shared aiohttp session and return (status, headers, body)
+
+    The host's circuit breaker is checked before waiting on the host's
+    fan-out semaphore and rate limiter, and the request's timeout is what
+    is left before expires once they let it through.
+    """
+    global _ASYNC_SESSION
+    tape = cassette.active()
+    if tape and tape.replaying:
+        return await tape.async_replay(url, kwargs.get('params'))
+    host = urlparse(url).hostname
+    host_breaker = breaker(url)
+    if host_breaker.blocked():
+        raise UpstreamUnavailable(host, host_breaker.retry_in())
+    if not _ASYNC_SESSION or _ASYNC_SESSION.closed:
+        cache = dns_cache()
+        connector = aiohttp.TCPConnector(resolver=CachedResolver(cache)) if cache else None
+        _ASYNC_SESSION = aiohttp.ClientSession(connector=connector)
+    if host not in _ASYNC_LIMITS:
+        _ASYNC_LIMITS[host] = asyncio.Semaphore(host_config(host).get('async_limit', 4))
+    host_limiter = limiter(url)
+    async with _ASYNC_LIMITS[host]:
+        if host_limiter:
+            await host_limiter.async_wait(None if expires is None else expires - time.monotonic())
+        timeout = None
+        if expires is not None:
+            timeout = expires - time.monotonic()
+            if timeout <= 0:
+                raise JalBotTimeout('Command timed out waiting on upstream APIs')
+        if not host_breaker.allow():
+            raise UpstreamUnavailable(host, host_breaker.retry_in())
+        start = time.monotonic()
+        try:
+            async with _ASYNC_SESSION.get(url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+                body = await response.read()
+        except BaseException:
+            # CancelledError too, or a cancelled half-open probe would leave
+            # the breaker refusing every call
+            host_breaker.record(False)
+            raise
+        latency = time.monotonic() - start
+        host_breaker.record(response.status < 500, latency)
+        METRICS.incr(f"http.{host}.requests")
+        METRICS.incr(f"http.{host}.seconds", latency)
+        if tape:
+            tape.save(url, kwargs.get('params'), response.status, response.headers, body)
+        return response.status, CaseInsensitiveDict(response.headers), body
+
+
+async def async_get(url, timeout=10, **kwargs):
+    """
+    GET url from any event loop and return (status, headers, body)
+
+    Requests run on one long-lived aiohttp session owned by a background
+    loop, so connections are reused across commands. Each host's concurrent
+    requests go through its circuit breaker, are capped at its async_limit
+    and paced by its rate_limit. The timeout is capped at the command
+    deadline and transient failures are retried with the host's retry
+    policy.
+    """
+    return await retry_policy(url).async_call(_async_attempt, url, timeout, **kwargs)
+
+
+async def async_get_json(url, timeout=10, raise_for_status=False, **kwargs):
+    """
+    GET a JSON document from any event loop
+    """
+    status, headers, body = await async_get(url, timeout, **kwargs)
+    return json_body(url, status, headers, body, raise_for_status)
+
+
+def json_body(url, status, headers, body, raise_for_status=False):
+    """
+    Decode a JSON response body. Raise UpstreamResponseError if it isn't
+    JSON or, with raise_for_status, if the status is an error
+    """
+    if raise_for_status and status >= 400:
+        raise UpstreamResponseError(url, status, body)
+    if 'json' not in headers.get('Content-Type', ''):
+        raise UpstreamResponseError(url, status, body)
+    return codec.loads(body)
+
+
+async def _async_attempt(url, timeout, **kwargs):
+    """
+    Make one attempt at an async GET on the background loop
+    """
+    left = remaining(timeout)
+    expires = None if left is None else time.monotonic() + left
+    future = asyncio.run_coroutine_threadsafe(_async_request(url, expires, **kwargs), _async_loop())
+    return await asyncio.wrap_future(future)
+
+
+def run_concurrently(*coroutines):
+    """
+    Run coroutines concurrently on the background loop from synchronous
+    code and return their results in order. They see the caller's command
+    deadline, and the first one to fail cancels the rest and is raised.
+    """
+    context = contextvars.copy_context()
+
+    async def run_all():
+        loop = asyncio.get_running_loop()
+        tasks = [context.copy().run(loop.create_task, coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    return asyncio.run_coroutine_threadsafe(run_all(), _async_loop()).result()
+
+
+def close_async_session():
+    """
+    Close the shared aiohttp session, a new one is opened on next use
+    """
+    if _ASYNC_SESSION and not _ASYNC_SESSION.closed:
+        asyncio.run_coroutine_threadsafe(_ASYNC_SESSION.close(), _async_loop()).result()
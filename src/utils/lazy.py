@@ -0,0 +1,22 @@
+class lazy_property:
+    """
+    Read-only attribute computed on first access and then memoised on the
+    instance, so API backed attributes are only fetched if a reply uses them
+    """
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
+def is_loaded(instance, name):
+    """
+    Return True if a lazy_property has already been computed on instance
+    """
+    return name in instance.__dict__
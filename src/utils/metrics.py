@@ -0,0 +1,42 @@
+import threading
+
+
+class Metrics:
+    """
+    Process wide registry of counters and gauges
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    def incr(self, name, value=1):
+        """
+        Increment a counter
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """
+        Set a gauge to the provided value
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def counter(self, name):
+        """
+        Return the current value of a counter
+        """
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """
+        Return a copy of all counters and gauges
+        """
+        with self._lock:
+            return {'counters': dict(self._counters), 'gauges': dict(self._gauges)}
+
+
+METRICS = Metrics()
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import redis
+import threading
+import time
+
+from utils.deadline import remaining
+from utils.exceptions import JalBotTimeout, QuotaExceeded
+from utils.metrics import METRICS
+
+
+# Takes a token from the bucket in KEYS[1] and counts the call against the
+# daily quota in KEYS[2]. Returns the seconds to wait before using the token,
+# or -1 when the quota is used up, and the calls made today.
+RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local quota = tonumber(ARGV[4])
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+if quota > 0 and used >= quota then
+    return {'-1', used}
+end
+used = redis.call('INCR', KEYS[2])
+if used == 1 then
+    redis.call('EXPIRE', KEYS[2], 172800)
+end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate) - 1
+redis.call('HMSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+local delay = 0
+if tokens < 0 then
+    delay = -tokens / rate
+end
+return {tostring(delay), used}
+"""
+
+
+class TokenBucket:
+    """
+    In-process token bucket
+
+    rate is the number of tokens added per second and burst is the most
+    tokens the bucket can hold. Callers reserve a token and wait for the
+    returned delay, so concurrent callers are spaced out instead of all
+    retrying at once.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return how many seconds to wait before using it
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = max(0, -self._tokens / self.rate)
+            return max(delay, self._paused_until - now)
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for the given number of seconds, for example
+        after the upstream sent a Retry-After header
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + float(seconds))
+            self._tokens = min(self._tokens, 0)
+
+    @staticmethod
+    def _check(delay, limit=None):
+        """
+        Raise JalBotTimeout instead of waiting past limit seconds, or past
+        the command deadline when no limit is given
+        """
+        left = remaining(delay) if limit is None else limit
+        if delay and left < delay:
+            raise JalBotTimeout('Command timed out waiting on the rate limiter')
+        return delay
+
+    def wait(self, limit=None):
+        """
+        Block until a token is available
+        """
+        delay = self._check(self.reserve(), limit)
+        if delay:
+            time.sleep(delay)
+
+    async def async_wait(self, limit=None):
+        """
+        Await until a token is available
+        """
+        delay = self._check(self.reserve(), limit)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket and daily quota shared through Redis
+
+    Every bot and worker process draws from the same bucket, so a per key
+    API limit holds across processes. Calls past daily_quota raise
+    QuotaExceeded and today's usage is published as a metric. While Redis
+    is unreachable the bucket falls back to limiting this process only.
+    """
+    def __init__(self, redis_client, name, rate, burst=1, daily_quota=0, prefix='jalbot:ratelimit:'):
+        super().__init__(rate, burst)
+        self.redis = redis_client
+        self.name = name
+        self.daily_quota = daily_quota
+        self.prefix = prefix
+        self._redis_retry_at = 0
+        self._script = redis_client.register_script(RESERVE_SCRIPT)
+        if daily_quota:
+            METRICS.gauge(f"ratelimit.{name}.daily_quota", daily_quota)
+
+    @classmethod
+    def from_config(cls, name, config, redis_config=None):
+        """
+        Create a bucket from a rate_limit section of http.json
+        """
+        redis_config = redis_config or {}
+        redis_client = redis.StrictRedis(host=redis_config.get('host', 'jal_redis.backend'),
+                                         port=redis_config.get('port', 6379),
+                                         db=0,
+                                         socket_timeout=redis_config.get('socket_timeout', 1))
+        return cls(redis_client, name,
+                   rate=config.get('rate', 1),
+                   burst=config.get('burst', 1),
+                   daily_quota=config.get('daily_quota', 0))
+
+    def quota_key(self):
+        """
+        Redis key counting today's calls
+        """
+        return f"{self.prefix}{self.name}:quota:{time.strftime('%Y%m%d', time.gmtime())}"
+
+    def reserve(self):
+        """
+        Take a token from the shared bucket and return how many seconds to
+        wait before using it
+        """
+        if time.monotonic() < self._redis_retry_at:
+            return super().reserve()
+        keys = [f"{self.prefix}{self.name}", self.quota_key()]
+        args = [self.rate, self.burst, time.time(), self.daily_quota]
+        try:
+            delay, used = self._script(keys=keys, args=args)
+        except redis.exceptions.RedisError as err:
+            logging.error(f"Redis rate limiter error for {self.name} | {err}")
+            METRICS.incr(f"ratelimit.{self.name}.redis_errors")
+            self._redis_retry_at = time.monotonic() + 30
+            return super().reserve()
+        METRICS.gauge(f"ratelimit.{self.name}.quota_used", int(used))
+        delay = float(delay)
+        if delay < 0:
+            METRICS.incr(f"ratelimit.{self.name}.quota_exceeded")
+            raise QuotaExceeded(self.name, self.daily_quota)
+        with self._lock:
+            paused = self._paused_until - time.monotonic()
+        return max(delay, paused)
+
+    def usage(self):
+        """
+        Return (calls made today, daily quota)
+        """
+        used = self.redis.get(self.quota_key())
+        return int(used or 0), self.daily_quota
+
+    async def async_wait(self, limit=None):
+        """
+        Await until a token is available without blocking the loop on Redis
+        """
+        delay = await asyncio.get_running_loop().run_in_executor(None, self.reserve)
+        delay = self._check(delay, limit)
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+from utils.metrics import METRICS
+
+
+def cache_ttl(command_config, option):
+    """
+    Get the reply cache TTL in seconds for a command option from the
+    cache_ttl section of the command's config. 0 means don't cache.
+    """
+    ttls = command_config.get('cache_ttl', {})
+    return ttls.get(option or 'default', ttls.get('default', 0))
+
+
+class ReplyCache:
+    """
+    Size bounded cache of rendered Slack replies with per entry TTLs
+
+    Only live replies are held in the cache. An entry found expired is
+    moved to a separate, equally bounded set of stale replies that is only
+    read by get_stale.
+    """
+    def __init__(self, max_size=1000, name='reply_cache'):
+        self.name = name
+        self.max_size = max_size
+        self._replies = OrderedDict()
+        self._stale = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._replies)
+
+    @staticmethod
+    def _add(entries, key, entry, max_size):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached reply for key or None if missing or expired
+        """
+        with self._lock:
+            entry = self._replies.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._replies.move_to_end(key)
+                METRICS.incr(f"{self.name}.hits")
+                return entry[2]
+            if entry:
+                self._add(self._stale, key, self._replies.pop(key), self.max_size)
+                METRICS.gauge(f"{self.name}.size", len(self._replies))
+        METRICS.incr(f"{self.name}.misses")
+        return None
+
+    def get_stale(self, key):
+        """
+        Return (age in seconds, reply) for key even if the reply has
+        expired, or None if it was never cached or has been evicted
+        """
+        with self._lock:
+            entry = self._replies.get(key) or self._stale.get(key)
+        if not entry:
+            return None
+        return time.monotonic() - entry[1], entry[2]
+
+    def set(self, key, reply, ttl):
+        """
+        Cache a reply for ttl seconds
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._stale.pop(key, None)
+            self._add(self._replies, key, (now + ttl, now, reply), self.max_size)
+            METRICS.gauge(f"{self.name}.size", len(self._replies))
@@ -0,0 +1,129 @@
+import aiohttp
+import asyncio
+import logging
+import random
+import requests
+import socket
+import threading
+import time
+
+from utils.deadline import remaining
+from utils.metrics import METRICS
+
+
+# Errors raised before a request reached the upstream, safe to retry for
+# any request
+CONNECT_ERRORS = (
+    socket.gaierror,
+    requests.exceptions.ConnectTimeout,
+    aiohttp.ClientConnectorError
+)
+
+# Errors worth retrying for idempotent requests
+TRANSIENT_ERRORS = CONNECT_ERRORS + (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError
+)
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with capped exponential backoff and full jitter
+
+    Retries are limited to attempts per call and, across calls, by a retry
+    budget: every call earns budget_ratio of a retry, up to budget retries
+    saved, so an upstream that is down isn't hit with a multiple of the
+    normal traffic. Non idempotent calls are only retried on errors raised
+    before the request was sent. No retry sleeps past the command deadline.
+    """
+    def __init__(self, name, attempts=3, base_delay=0.2, max_delay=2.0, budget=10, budget_ratio=0.2,
+                 idempotent=True, retry_on=TRANSIENT_ERRORS):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self.retry_on = retry_on if idempotent else tuple(e for e in retry_on if e in CONNECT_ERRORS)
+        self._balance = float(budget)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name, config):
+        """
+        Create a policy from a retry_policy section of a config file
+        """
+        return cls(name,
+                   attempts=config.get('attempts', 3),
+                   base_delay=config.get('base_delay', 0.2),
+                   max_delay=config.get('max_delay', 2.0),
+                   budget=config.get('budget', 10),
+                   budget_ratio=config.get('budget_ratio', 0.2),
+                   idempotent=config.get('idempotent', True))
+
+    def backoff(self, attempt):
+        """
+        Seconds to wait before retry number attempt
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _earn(self):
+        with self._lock:
+            self._balance = min(self.budget, self._balance + self.budget_ratio)
+
+    def _delay(self, attempt, err):
+        """
+        Return the seconds to wait before retrying after err, or None if
+        the call shouldn't be retried
+        """
+        if not isinstance(err, self.retry_on) or attempt + 1 >= self.attempts:
+            METRICS.incr(f"retry.{self.name}.failed")
+            return None
+        delay = self.backoff(attempt)
+        left = remaining()
+        if left is not None and delay >= left:
+            METRICS.incr(f"retry.{self.name}.deadline")
+            return None
+        with self._lock:
+            if self._balance < 1:
+                METRICS.incr(f"retry.{self.name}.budget_exhausted")
+                return None
+            self._balance -= 1
+        METRICS.incr(f"retry.{self.name}.retries")
+        logging.info(f"Retrying {self.name} in {delay:.2f}s | {err.__class__.__name__} {err}")
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func, retrying transient failures
+        """
+        self._earn()
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as err:
+                delay = self._delay(attempt, err)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def async_call(self, func, *args, **kwargs):
+        """
+        Await func(*args, **kwargs), retrying transient failures without
+        blocking the event loop
+        """
+        self._earn()
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as err:
+                delay = self._delay(attempt, err)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,55 @@
+import threading
+
+from utils.metrics import METRICS
+
+
+class _Call:
+    """
+    A computation in flight and the callers waiting on it
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one computation
+
+    The first caller for a key runs the function and every caller that
+    arrives before it finishes waits for and shares its result or error.
+    """
+    def __init__(self, name='singleflight'):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) once for all concurrent callers of key
+        """
+        if key is None:
+            return func(*args, **kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            METRICS.incr(f"{self.name}.shared")
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+        METRICS.incr(f"{self.name}.executed")
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
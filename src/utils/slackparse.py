@@ -1,9 +1,17 @@
 import re
 import logging
 
+from collections import namedtuple
+
 from utils.exceptions import JalBotError
 
 
+# Hashable identity of a bot command request. option is None for commands
+# without valid_args, whose args are the normalised command text. channel
+# is only set for the options in the command's channel_options.
+CommandKey = namedtuple('CommandKey', ['command', 'option', 'args', 'channel'])
+
+
 class SlackArgParse:
     """
     Parse Slack message bot command
@@ -76,3 +84,24 @@ class SlackArgParse:
         for k, v in replace_chars.items():
             message = message.replace(k, v)
         return message
+
+
+def command_key(command, command_config, text, channel=None):
+    """
+    Normalise a bot command into a CommandKey of command, option, parsed
+    args and, for options that act on the channel they're sent from, the
+    channel. Return None if the command text doesn't parse.
+    """
+    valid_args = command_config.get('valid_args')
+    if not valid_args:
+        return CommandKey(command, None, " ".join(text.split()), None)
+    try:
+        parsed = SlackArgParse(valid_args, command_config.get('options', []), text)
+    except JalBotError:
+        return None
+    args = tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in parsed.args.items()
+    ))
+    if parsed.option not in command_config.get('channel_options', []):
+        channel = None
+    return CommandKey(command, parsed.option, args, channel)
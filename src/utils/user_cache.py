@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+
+from utils.metrics import METRICS
+
+
+class UserDirectory:
+    """
+    Size bounded, expiring cache of Slack user objects keyed by user ID
+
+    The least recently used user is evicted once max_size is reached and
+    users older than ttl seconds are looked up again.
+    """
+    def __init__(self, ttl=3600, max_size=5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self._prewarm_lock = threading.Lock()
+        self._prewarmed = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a user directory from the user_cache section of a config file
+        """
+        return cls(ttl=config.get('ttl', 3600), max_size=config.get('max_size', 5000))
+
+    def __len__(self):
+        return len(self._users)
+
+    def get(self, user_id):
+        """
+        Return the cached user object or None if missing or expired
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self._users.move_to_end(user_id)
+                METRICS.incr('user_cache.hits')
+                return entry[1]
+            if entry:
+                del self._users[user_id]
+        METRICS.incr('user_cache.misses')
+        return None
+
+    def set(self, user):
+        """
+        Add or replace a user object
+        """
+        with self._lock:
+            self._users[user['id']] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(user['id'])
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def prewarm(self, web):
+        """
+        Load every user in the workspace from the users.list Web API method,
+        unless that was already done within the last ttl seconds. Calls go
+        through web, the SlackWebDispatcher, so they share its users.list
+        rate limit bucket.
+        """
+        if not self._prewarm_lock.acquire(blocking=False):
+            return
+        try:
+            if self._prewarmed is not None and time.monotonic() - self._prewarmed < self.ttl:
+                return
+            if self._load_users(web):
+                self._prewarmed = time.monotonic()
+                logging.info(f"User cache prewarmed with {len(self)} users")
+            else:
+                logging.warning("User cache prewarm failed, it will be retried on the next connect")
+        finally:
+            self._prewarm_lock.release()
+
+    def _load_users(self, web):
+        """
+        Page through users.list into the cache, return False on an error
+        """
+        cursor = None
+        count = 0
+        while True:
+            response = web.call("users.list", limit=200, cursor=cursor).result()
+            if not response.get('ok'):
+                logging.error(f"Error prewarming user cache | {response.get('error')}")
+                return False
+            for user in response['members']:
+                self.set(user)
+                count += 1
+            cursor = response.get('response_metadata', {}).get('next_cursor')
+            if not cursor or count >= self.max_size:
+                return True
@@ -0,0 +1,79 @@
+import logging
+import redis
+import time
+
+from utils import codec
+from utils.metrics import METRICS
+
+
+# Pushes ARGV[2] onto the list in KEYS[1] unless it already holds ARGV[1]
+# jobs. Returns the new length, or -1 if the job was rejected.
+SUBMIT_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return -1
+end
+return redis.call('LPUSH', KEYS[1], ARGV[2])
+"""
+
+
+class RedisWorkQueue:
+    """
+    Bot command queue on a Redis list shared by the RTM front end and the
+    worker processes started by worker.py
+    """
+    remote = True
+
+    def __init__(self, host='jal_redis.backend', port=6379, queue='jalbot:commands', max_queue=50,
+                 redis_client=None):
+        self.queue = queue
+        self.max_queue = int(max_queue)
+        self.redis = redis_client or redis.StrictRedis(host=host, port=port, db=0)
+        self._submit = self.redis.register_script(SUBMIT_SCRIPT)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a work queue from the dispatcher section of a config file
+        """
+        redis_config = config.get('redis', {})
+        return cls(host=redis_config.get('host', 'jal_redis.backend'),
+                   port=redis_config.get('port', 6379),
+                   queue=redis_config.get('queue', 'jalbot:commands'),
+                   max_queue=config.get('max_queue', 50))
+
+    @property
+    def depth(self):
+        """
+        Number of jobs waiting in the queue
+        """
+        return self.redis.llen(self.queue)
+
+    def submit(self, channel, command, event):
+        """
+        Push a bot command onto the queue
+
+        Return False if the job was rejected because the queue is full. The
+        length check and the push run as one script, so concurrent
+        producers can't overfill the queue
+        """
+        job = {'command': command, 'event': event, 'enqueued': time.time()}
+        if int(self._submit(keys=[self.queue], args=[self.max_queue, codec.dumps(job)])) < 0:
+            METRICS.incr('work_queue.rejected')
+            logging.warning(f"Work queue full | rejecting job for channel {channel}")
+            return False
+        METRICS.incr('work_queue.submitted')
+        return True
+
+    def pop(self, timeout=5):
+        """
+        Wait up to timeout seconds for a job, returning (command, event) or
+        None if the queue stayed empty
+        """
+        item = self.redis.brpop(self.queue, timeout=timeout)
+        if not item:
+            return None
+        job = codec.loads(item[1])
+        wait = max(0, time.time() - job['enqueued'])
+        METRICS.gauge('work_queue.last_wait', round(wait, 3))
+        METRICS.incr('work_queue.wait_seconds', wait)
+        return job['command'], job['event']
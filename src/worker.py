@@ -0,0 +1,71 @@
+import logging
+import multiprocessing
+import os
+import traceback
+
+from threading import Thread
+
+from libs import nhl_live
+from libs import nhl_schedule
+from libs import slack
+
+from utils import http_client
+from utils.BotTools import get_config, setup_logger
+
+
+def run_worker(slack_token):
+    """
+    Run queued bot commands until the process is stopped
+    """
+    setup_logger()
+    bot = slack.Slack(slack_token)
+    Thread(target=http_client.prewarm, daemon=True).start()
+    nhl_schedule.store().start()
+    nhl_live.live_games().start()
+    queue = bot.dispatcher
+    logging.info(f"Worker {os.getpid()} waiting for commands on {queue.queue}")
+    while True:
+        run_job(bot, queue)
+
+
+def run_job(bot, queue, timeout=5):
+    """
+    Wait up to timeout seconds for a queued command and run it, returning
+    False if there was nothing to run
+    """
+    job = queue.pop(timeout=timeout)
+    if not job:
+        return False
+    command, event = job
+    bot.web.start(event["channel"], event["ts"])
+    try:
+        bot.handle_message(command, event)
+    except Exception as err:
+        logging.error(f"Worker exception | {err}\n{traceback.format_exc()}")
+    return True
+
+
+def main():
+    """
+    Start the worker processes that consume the Redis command queue
+
+    The RTM front end started by main.py only queues commands when the
+    slack.json dispatcher mode is redis
+    """
+    config = get_config('slack.json')['dispatcher']
+    if config.get('mode') != 'redis':
+        raise SystemExit('slack.json dispatcher mode must be redis to run workers')
+    token = os.environ.get('JAL_SLACK_TOKEN')
+    processes = config.get('processes') or os.cpu_count()
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(token, ), name=f"jalbot-worker-{i}")
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare JSON decode times of the available codecs on recorded API payloads
+
+Payloads default to the response bodies stored by the HTTP cache on the
+stats_cache volume. With no recorded payloads a synthetic full season
+schedule is decoded instead.
+
+    python /jalbot/test/bench_codec.py --passes 50
+"""
+import argparse
+import glob
+import importlib
+import json
+import sys
+import time
+
+sys.path.insert(1, "/jalbot/src")
+
+from utils import codec  # noqa: E402
+
+
+def season_schedule(games=1271):
+    """
+    Payload shaped like an NHL statsapi full season schedule
+    """
+    dates = []
+    for day in range(games // 8):
+        dates.append({
+            'date': f"2026-{10 + day // 90:02d}-{day % 28 + 1:02d}",
+            'games': [{
+                'gamePk': 2026020000 + day * 8 + i,
+                'gameType': 'R',
+                'status': {'abstractGameState': 'Final', 'detailedState': 'Final', 'statusCode': '7'},
+                'teams': {
+                    'away': {'score': i % 5, 'team': {'id': i + 1, 'name': f"Team {i + 1}"},
+                             'leagueRecord': {'wins': 20, 'losses': 10, 'ot': 3}},
+                    'home': {'score': (i + 2) % 6, 'team': {'id': i + 9, 'name': f"Team {i + 9}"},
+                             'leagueRecord': {'wins': 18, 'losses': 12, 'ot': 4}}
+                },
+                'venue': {'name': 'Arena'}
+            } for i in range(8)]
+        })
+    return json.dumps({'totalGames': games, 'dates': dates}).encode('utf-8')
+
+
+def load_payloads(paths):
+    """
+    Read recorded payloads, keeping only valid JSON documents
+    """
+    payloads = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            body = f.read()
+        try:
+            json.loads(body)
+        except ValueError:
+            continue
+        payloads.append(body)
+    return payloads
+
+
+def bench(loads, payloads, passes):
+    """
+    Seconds taken to decode every payload passes times
+    """
+    start = time.perf_counter()
+    for _ in range(passes):
+        for payload in payloads:
+            loads(payload)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payloads', nargs='*')
+    parser.add_argument('--cache-dir', default='/jalbot/stats_cache/http')
+    parser.add_argument('--passes', type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads or glob.glob(f"{args.cache_dir}/*.body"))
+    if not payloads:
+        payloads = [season_schedule()]
+    size = sum(len(payload) for payload in payloads)
+    print(f"payloads: {len(payloads)}, {size / 1024:,.0f} KiB, codec in use: {codec.NAME}")
+
+    baseline = None
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            print(f"{name}: not installed")
+            continue
+        elapsed = bench(module.loads, payloads, args.passes)
+        baseline = baseline or elapsed
+        rate = size * args.passes / elapsed / 1024 / 1024
+        print(f"{name}: {elapsed / args.passes * 1000:.2f} ms/pass, {rate:,.0f} MiB/s, {baseline / elapsed:.1f}x json")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Time every bot command against recorded upstream responses
+
+Record a cassette once with live APIs, then replay it offline as often as
+needed. No cassette is committed because recording needs the live API
+keys, so record one before the first replay. Replay never touches the network, so latency and the number of
+upstream requests per command are repeatable. --latency adds a fixed
+delay to every replayed request to stand in for the real upstream.
+
+    python /jalbot/test/bench_commands.py --mode record
+    python /jalbot/test/bench_commands.py --passes 5 --latency 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(1, "/jalbot/src")
+# slack.json requires the token variable, but the bench never connects
+os.environ.setdefault('JAL_SLACK_TOKEN', 'xoxb-bench')
+
+from libs.slack import Slack  # noqa: E402
+from utils import cassette  # noqa: E402
+from utils.metrics import METRICS  # noqa: E402
+
+
+def upstream_requests():
+    """
+    Requests recorded or replayed so far
+    """
+    return METRICS.counter('cassette.replayed') + METRICS.counter('cassette.recorded')
+
+
+def bench_command(slack, line, passes):
+    """
+    Run one command passes times, returning the run times and upstream
+    requests per run
+    """
+    command, text = slack.matcher.match(f"{slack.config['bot_names'][0]} {line}")
+    func = slack.commands[command]
+    event = {'type': 'message', 'channel': 'CBENCH', 'user': 'UBENCH', 'ts': '0', 'text': text}
+    times = []
+    start_requests = upstream_requests()
+    for _ in range(passes):
+        start = time.perf_counter()
+        slack.run_command(func, event, {'id': 'UBENCH', 'name': 'bench'}, timeout=60)
+        times.append(time.perf_counter() - start)
+    return times, (upstream_requests() - start_requests) / passes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', default='/jalbot/config/testdata/commands.txt')
+    parser.add_argument('--cassette', default='/jalbot/config/testdata/cassette')
+    parser.add_argument('--mode', choices=[cassette.RECORD, cassette.REPLAY], default=cassette.REPLAY)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--passes', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.mode == cassette.REPLAY and not (os.path.isdir(args.cassette) and os.listdir(args.cassette)):
+        raise SystemExit(f"No cassette at {args.cassette}, record one first with --mode record")
+    cassette.use(cassette.Cassette(args.cassette, mode=args.mode, latency=args.latency))
+    passes = 1 if args.mode == cassette.RECORD else args.passes
+    with open(args.commands, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    slack = Slack('xoxb-bench')
+    for line in lines:
+        try:
+            times, requests = bench_command(slack, line, passes)
+        except Exception as err:
+            print(f"{line:<40} error: {err.__class__.__name__} {err}")
+            continue
+        print(f"{line:<40} {statistics.median(times) * 1000:9.1f} ms  {requests:5.1f} requests")
+
+
+if __name__ == '__main__':
+    main()
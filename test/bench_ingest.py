@@ -0,0 +1,67 @@
+"""
+Replay a corpus of recorded RTM frames through the Slack ingestion path
+and report messages per second
+
+Record a corpus by setting rtm.record in config/slack.json to a file path,
+or use the sample corpus in config/testdata/rtm_events.jsonl
+
+    python /jalbot/test/bench_ingest.py --passes 200
+"""
+import argparse
+import json
+import sys
+import time
+
+sys.path.insert(1, "/jalbot/src")
+
+from libs.slack import Slack  # noqa: E402
+from utils.dedupe import EventDeduper  # noqa: E402
+
+
+def bench_matcher(matcher, texts, passes):
+    """
+    Time BotMatcher.match alone over every message text in the corpus
+    """
+    start = time.perf_counter()
+    for _ in range(passes):
+        for text in texts:
+            matcher.match(text)
+    return len(texts) * passes / (time.perf_counter() - start)
+
+
+def bench_ingest(slack, frames, passes):
+    """
+    Time decoding frames and running them through Slack.handle_event
+    """
+    dispatched = []
+    slack.dispatch = lambda command, event: dispatched.append(command)
+    elapsed = 0
+    for _ in range(passes):
+        slack.deduper = EventDeduper()
+        start = time.perf_counter()
+        for frame in frames:
+            slack.handle_event(json.loads(frame))
+        elapsed += time.perf_counter() - start
+    return len(frames) * passes / elapsed, len(dispatched) // passes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default='/jalbot/config/testdata/rtm_events.jsonl')
+    parser.add_argument('--passes', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.corpus, 'r') as f:
+        frames = [line for line in f.read().splitlines() if line]
+    texts = [json.loads(frame).get('text') for frame in frames]
+
+    slack = Slack('xoxb-bench')
+    matcher_rate = bench_matcher(slack.matcher, texts, args.passes)
+    ingest_rate, commands = bench_ingest(slack, frames, args.passes)
+    print(f"corpus: {len(frames)} frames, {commands} bot commands per pass")
+    print(f"matcher: {matcher_rate:,.0f} messages/sec")
+    print(f"ingest: {ingest_rate:,.0f} messages/sec")
+
+
+if __name__ == '__main__':
+    main()
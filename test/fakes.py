@@ -0,0 +1,120 @@
+"""
+Test doubles shared by the test modules
+"""
+from unittest.mock import patch
+
+from libs import nhl_schedule
+from libs.nhl_live import CLAIM_SCRIPT, RELEASE_SCRIPT
+from utils.work_queue import SUBMIT_SCRIPT
+
+NHL_API = 'https://statsapi.web.nhl.com/api/v1/'
+
+
+class FakeRedis:
+    """
+    Stands in for StrictRedis with the keys, sets, lists and Lua scripts the
+    bot uses. When results are given every script call answers with the
+    next one instead, raising it if it's an exception.
+    """
+    def __init__(self, results=None):
+        self.results = results
+        self.calls = []
+        self.values = {}
+        self.sets = {}
+        self.lists = {}
+        self.scripts = {
+            SUBMIT_SCRIPT: self._submit,
+            CLAIM_SCRIPT: self._claim,
+            RELEASE_SCRIPT: self._release
+        }
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def sadd(self, key, value):
+        self.sets.setdefault(key, set()).add(value.encode())
+
+    def srem(self, key, value):
+        if value.encode() not in self.sets.get(key, set()):
+            return 0
+        self.sets[key].discard(value.encode())
+        return 1
+
+    def sunion(self, *keys):
+        return set().union(*[self.sets.get(key, set()) for key in keys])
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def brpop(self, key, timeout=0):
+        items = self.lists.get(key)
+        if not items:
+            return None
+        return key, items.pop()
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls.append((keys, args))
+            if self.results is not None:
+                result = self.results.pop(0)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            return self.scripts[script](keys, args)
+        return run
+
+    def _submit(self, keys, args):
+        items = self.lists.setdefault(keys[0], [])
+        if len(items) >= int(args[0]):
+            return -1
+        items.insert(0, args[1])
+        return len(items)
+
+    def _claim(self, keys, args):
+        owner = self.values.get(keys[0])
+        if owner and owner != args[0]:
+            return 0
+        self.values[keys[0]] = args[0]
+        return 1
+
+    def _release(self, keys, args):
+        if self.values.get(keys[0]) == args[0]:
+            del self.values[keys[0]]
+            return 1
+        return 0
+
+
+class FakeNHLRequests:
+    """
+    Answers statsapi requests from lookup(endpoint), recording each endpoint
+    """
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.urls = []
+
+    def __call__(self, url):
+        endpoint = url.replace(NHL_API, '').replace('//', '/')
+        self.urls.append(endpoint)
+        return self.lookup(endpoint)
+
+
+def use_nhl_requests(test, lookup):
+    """
+    Send a test's NHL and schedule store requests to a FakeNHLRequests and
+    give it a fresh schedule store, undone when the test finishes
+    """
+    requests = FakeNHLRequests(lookup)
+    for target in ('libs.nhl.NHL._nhl_request', 'libs.nhl.NHL._async_nhl_request',
+                   'libs.nhl_schedule.ScheduleStore._request'):
+        patcher = patch(target, side_effect=requests)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    nhl_schedule.use(nhl_schedule.ScheduleStore())
+    test.addCleanup(nhl_schedule.use, None)
+    return requests
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from utils.slackparse import SlackArgParse
+from utils.slackparse import SlackArgParse, command_key
 from utils.BotTools import get_config
 
 
@@ -39,3 +39,28 @@ class TestArgParser(TestCase):
 
     def tearDown(self):
         pass
+
+
+class TestCommandKey(TestCase):
+    def setUp(self):
+        self.config = get_config('sports.json')
+
+    def test_equivalent_commands_share_key(self):
+        long_args = command_key('sports', self.config, 'sports scores -league nhl')
+        short_args = command_key('sports', self.config, 'sports scores -l nhl')
+        self.assertEqual(long_args, short_args)
+        self.assertNotEqual(short_args, command_key('sports', self.config, 'sports scores -l nba'))
+
+    def test_invalid_option(self):
+        self.assertIsNone(command_key('sports', self.config, 'sports bogus -l nhl'))
+
+    def test_key_fields(self):
+        key = command_key('sports', self.config, 'sports scores -l nhl', channel='C1')
+        self.assertEqual(key.option, 'scores')
+        self.assertIsNone(key.channel)
+        self.assertIsNone(command_key('help', {}, 'help  me').option)
+
+    def test_channel_options_keyed_by_channel(self):
+        follow = command_key('sports', self.config, 'sports follow -l nhl -t boston', channel='C1')
+        self.assertEqual(follow.channel, 'C1')
+        self.assertNotEqual(follow, command_key('sports', self.config, 'sports follow -l nhl -t boston', channel='C2'))
@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from utils.botmatch import BotMatcher
+
+
+class TestBotMatcher(TestCase):
+    def setUp(self):
+        self.matcher = BotMatcher(['jalbot'], {'sp': 'sports'})
+
+    def test_bot_command(self):
+        self.assertEqual(self.matcher.match('jalbot sports scores -l nhl'),
+                         ('sports', 'sports scores -l nhl'))
+        self.assertEqual(self.matcher.match('  JalBot  news -s technology'),
+                         ('news', 'news -s technology'))
+
+    def test_alt_name(self):
+        self.assertEqual(self.matcher.match('jalbot sp standings -l nhl'),
+                         ('sports', 'sp standings -l nhl'))
+
+    def test_rejects_other_messages(self):
+        for text in (None, '', '   ', 'jalbot', 'jalbots sports', 'hey jalbot sports', 'lunch?'):
+            self.assertIsNone(self.matcher.match(text))
+
+    def tearDown(self):
+        pass
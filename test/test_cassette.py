@@ -0,0 +1,58 @@
+import asyncio
+import shutil
+import tempfile
+
+import requests
+
+from unittest import TestCase
+
+from utils import cassette, http_client
+from utils.exceptions import CassetteMiss
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict({'Content-Type': 'application/json',
+                                                                    'Content-Encoding': 'gzip'})
+        response._content = b'{"teams": [{"id": 6}]}'
+        return response
+
+
+class TestCassette(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.url = 'https://statsapi.web.nhl.com/api/v1/teams/6'
+
+    def test_record_then_replay(self):
+        session = FakeSession()
+        cassette.use(cassette.Cassette(self.path, mode=cassette.RECORD))
+        http_client.guarded_get(session, self.url, params={'expand': 'team.stats'}, timeout=5)
+        cassette.use(cassette.Cassette(self.path, mode=cassette.REPLAY))
+        response = http_client.guarded_get(session, self.url, params={'expand': 'team.stats'}, timeout=5)
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(response.json(), {'teams': [{'id': 6}]})
+        self.assertNotIn('Content-Encoding', response.headers)
+        with self.assertRaises(CassetteMiss):
+            http_client.guarded_get(session, self.url, timeout=5)
+
+    def test_async_replay_with_latency(self):
+        tape = cassette.Cassette(self.path, mode=cassette.REPLAY, latency=0.05)
+        tape.save(self.url, None, 200, {'Content-Type': 'application/json'}, b'{"id": 6}')
+        cassette.use(tape)
+        self.assertEqual(asyncio.run(http_client.async_get_json(self.url)), {'id': 6})
+
+    def test_binary_body(self):
+        tape = cassette.Cassette(self.path)
+        tape.save(self.url, None, 200, {}, b'\xff\xd8')
+        self.assertEqual(tape.replay(self.url).content, b'\xff\xd8')
+
+    def tearDown(self):
+        cassette.use(None)
+        shutil.rmtree(self.path)
@@ -0,0 +1,66 @@
+from unittest import TestCase
+from unittest import mock
+
+from utils import circuit
+from utils.circuit import CircuitBreaker, collect_stale, mark_stale
+from utils.exceptions import UpstreamUnavailable
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('stats.nba.com', failure_threshold=2, latency_slo=1, reset_timeout=30)
+
+    def test_opens_after_failures(self):
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(lambda: Response(200))
+
+    def test_success_resets_failures(self):
+        self.breaker.record(False)
+        self.breaker.record(True)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_latency_slo_counts_as_failure(self):
+        self.breaker.record(True, latency=2)
+        self.breaker.record(True, latency=3)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+
+    def test_server_errors_and_exceptions_are_failures(self):
+        self.breaker.call(lambda: Response(503))
+
+        def fail():
+            raise ConnectionError('down')
+        with self.assertRaises(ConnectionError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+
+    def test_half_open_probe(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        with mock.patch('utils.circuit.time.monotonic', return_value=self.breaker.opened_at + 31):
+            self.assertTrue(self.breaker.allow())
+            self.assertEqual(self.breaker.state, circuit.HALF_OPEN)
+            self.assertFalse(self.breaker.allow())
+            self.breaker.record(False)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        with mock.patch('utils.circuit.time.monotonic', return_value=self.breaker.opened_at + 31):
+            self.breaker.call(lambda: Response(200))
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_collect_stale(self):
+        with collect_stale() as hosts:
+            mark_stale('stats.nba.com')
+        self.assertEqual(hosts, {'stats.nba.com'})
+        mark_stale('stats.nba.com')
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from utils import codec
+from libs.nba import json_deserializer, json_serializer
+
+
+class Response:
+    content = b'{"resultSets": [{"name": "GameHeader", "rowSet": [[1, "Celtics"]]}]}'
+
+
+class TestCodec(TestCase):
+    def test_round_trip(self):
+        value = {'teams': [{'id': 6, 'name': 'Boston Bruins', 'pct': 0.625}], 'home': None}
+        self.assertEqual(codec.loads(codec.dumps(value)), value)
+        self.assertIsInstance(codec.dumps(value), str)
+
+    def test_loads_bytes_and_str(self):
+        self.assertEqual(codec.loads(b'{"a": 1}'), {'a': 1})
+        self.assertEqual(codec.loads('{"a": "é"}'), {'a': 'é'})
+
+    def test_response_json(self):
+        data = codec.response_json(Response())
+        self.assertEqual(data['resultSets'][0]['rowSet'], [[1, 'Celtics']])
+
+    def test_invalid_json_is_value_error(self):
+        with self.assertRaises(ValueError):
+            codec.loads(b'<html>')
+
+    def test_memcache_serializer(self):
+        value, flags = json_serializer('key', {'wins': 10})
+        self.assertEqual(flags, 2)
+        self.assertEqual(json_deserializer('key', value.encode('utf-8'), flags), {'wins': 10})
+        self.assertEqual(json_deserializer('key', b'text', 1), 'text')
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,34 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils.deadline import command_timeout, deadline, expired, remaining
+from utils.exceptions import JalBotTimeout
+
+
+class TestDeadline(TestCase):
+    def test_no_deadline(self):
+        self.assertEqual(remaining(10), 10)
+        self.assertIsNone(remaining())
+        self.assertFalse(expired())
+
+    @patch('utils.deadline.time')
+    def test_remaining_budget(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        with deadline(30):
+            self.assertEqual(remaining(10), 10)
+            mock_time.monotonic.return_value = 125
+            self.assertEqual(remaining(10), 5)
+            mock_time.monotonic.return_value = 131
+            self.assertTrue(expired())
+            with self.assertRaises(JalBotTimeout):
+                remaining(10)
+        self.assertEqual(remaining(10), 10)
+
+    def test_command_timeout(self):
+        config = {'timeouts': {'default': 45, 'scores': 20}}
+        self.assertEqual(command_timeout(config, 'scores'), 20)
+        self.assertEqual(command_timeout(config, 'roster'), 45)
+        self.assertEqual(command_timeout({}, 'scores', 60), 60)
+
+    def tearDown(self):
+        pass
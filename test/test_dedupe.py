@@ -0,0 +1,51 @@
+import redis
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from utils.dedupe import EventDeduper
+
+
+class TestEventDeduper(TestCase):
+    def setUp(self):
+        self.deduper = EventDeduper(window=300, max_size=100)
+        self.event = {'channel': 'C1', 'ts': '1519152516.000795', 'text': 'jalbot sports scores -l nhl'}
+
+    def test_redelivered_event(self):
+        self.assertTrue(self.deduper.first_seen(self.event))
+        self.assertFalse(self.deduper.first_seen(dict(self.event)))
+        self.assertTrue(self.deduper.first_seen(dict(self.event, ts='1519152517.000100')))
+
+    def test_client_msg_id_key(self):
+        self.assertEqual(self.deduper.event_key(dict(self.event, client_msg_id='abc')), 'abc')
+        self.assertEqual(self.deduper.event_key(self.event), 'C1:1519152516.000795')
+
+    @patch('utils.dedupe.time')
+    def test_window_expires(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        self.assertTrue(self.deduper.first_seen(self.event))
+        mock_time.monotonic.return_value = 401
+        self.assertTrue(self.deduper.first_seen(self.event))
+
+    def test_redis_claim(self):
+        redis_client = Mock()
+        redis_client.set.return_value = None
+        deduper = EventDeduper(redis_client=redis_client)
+        self.assertFalse(deduper.first_seen(self.event))
+        redis_client.set.assert_called_with('jalbot:seen:C1:1519152516.000795', 1, nx=True, ex=300)
+
+    def test_redis_error_uses_local_window(self):
+        redis_client = Mock()
+        redis_client.set.side_effect = redis.exceptions.TimeoutError('timed out')
+        deduper = EventDeduper(redis_client=redis_client)
+        self.assertTrue(deduper.first_seen(self.event))
+        self.assertFalse(deduper.first_seen(dict(self.event)))
+
+    @patch('utils.dedupe.redis.StrictRedis')
+    def test_from_config_timeouts(self, strict_redis):
+        EventDeduper.from_config({'redis': True, 'socket_timeout': 0.2}, {'host': 'localhost'})
+        strict_redis.assert_called_once_with(host='localhost', port=6379, db=0,
+                                             socket_timeout=0.2, socket_connect_timeout=0.5)
+
+    def tearDown(self):
+        pass
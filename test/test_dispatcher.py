@@ -0,0 +1,42 @@
+import time
+
+from unittest import TestCase
+
+from utils.dispatcher import CommandDispatcher
+
+
+class TestCommandDispatcher(TestCase):
+    def setUp(self):
+        self.ran = []
+
+    def handler(self, name):
+        self.ran.append(name)
+
+    def test_rejects_when_queue_full(self):
+        dispatcher = CommandDispatcher(self.handler, workers=0, max_queue=2, name='test_full')
+        self.assertTrue(dispatcher.submit('C1', 'a'))
+        self.assertTrue(dispatcher.submit('C2', 'b'))
+        self.assertFalse(dispatcher.submit('C3', 'c'))
+        self.assertEqual(dispatcher.depth, 2)
+
+    def test_defers_past_channel_cap(self):
+        dispatcher = CommandDispatcher(self.handler, workers=0, max_queue=10, channel_concurrency=1, name='test_cap')
+        dispatcher.submit('C1', 'a')
+        dispatcher.submit('C1', 'b')
+        dispatcher.submit('C2', 'c')
+        self.assertEqual(dispatcher._queue.qsize(), 2)
+        self.assertEqual(len(dispatcher._deferred['C1']), 1)
+
+    def test_runs_deferred_jobs(self):
+        dispatcher = CommandDispatcher(self.handler, workers=2, max_queue=10, channel_concurrency=1, name='test_run')
+        for name in ('a', 'b', 'c'):
+            dispatcher.submit('C1', name)
+        deadline = time.monotonic() + 5
+        while len(self.ran) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        dispatcher.stop()
+        self.assertEqual(self.ran, ['a', 'b', 'c'])
+        self.assertEqual(dispatcher.depth, 0)
+
+    def tearDown(self):
+        pass
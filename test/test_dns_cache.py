@@ -0,0 +1,100 @@
+import asyncio
+import requests
+import socket
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils.dns_cache import CachedDNSAdapter, CachedResolver, DNSCache
+
+
+class FakeResolver:
+    def __init__(self, address=None):
+        self.address = address
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.calls += 1
+        if self.fail:
+            raise socket.gaierror(-3, 'Temporary failure in name resolution')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (self.address or f"10.0.0.{self.calls}", port))]
+
+
+class OKHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDNSCache(TestCase):
+    def setUp(self):
+        self.resolver = FakeResolver()
+        self.cache = DNSCache(['statsapi.web.nhl.com'], ttl=300, refresh_interval=60)
+        self.cache._getaddrinfo = self.resolver
+
+    def test_cached_within_ttl(self):
+        first = self.cache.getaddrinfo('statsapi.web.nhl.com', 443)
+        self.assertEqual(self.cache.getaddrinfo('statsapi.web.nhl.com', 443), first)
+        self.assertEqual(self.resolver.calls, 1)
+
+    def test_unknown_hosts_not_cached(self):
+        self.cache.getaddrinfo('example.com', 443)
+        self.cache.getaddrinfo('example.com', 443)
+        self.assertEqual(self.resolver.calls, 2)
+
+    @patch('utils.dns_cache.time.monotonic')
+    def test_stale_answer_on_failure(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        first = self.cache.getaddrinfo('statsapi.web.nhl.com', 443)
+        mock_monotonic.return_value = 1000
+        self.resolver.fail = True
+        self.assertEqual(self.cache.getaddrinfo('statsapi.web.nhl.com', 443), first)
+        with self.assertRaises(socket.gaierror):
+            self.cache.getaddrinfo('statsapi.web.nhl.com', 80)
+
+    @patch('utils.dns_cache.time.monotonic')
+    def test_refresh_expiring_entries(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.cache.getaddrinfo('statsapi.web.nhl.com', 443)
+        self.cache.refresh()
+        self.assertEqual(self.resolver.calls, 1)
+        mock_monotonic.return_value = 350
+        self.cache.refresh()
+        self.assertEqual(self.resolver.calls, 2)
+        self.assertEqual(self.cache.getaddrinfo('statsapi.web.nhl.com', 443)[0][4][0], '10.0.0.2')
+
+    def test_addresses(self):
+        self.assertEqual(self.cache.addresses('statsapi.web.nhl.com', 443), ['10.0.0.1'])
+
+    def test_adapter_resolves_through_cache(self):
+        server = HTTPServer(('127.0.0.1', 0), OKHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.cache._getaddrinfo = FakeResolver('127.0.0.1')
+        getaddrinfo = socket.getaddrinfo
+        session = requests.Session()
+        session.mount('http://', CachedDNSAdapter(self.cache))
+        self.addCleanup(session.close)
+        response = session.get(f"http://statsapi.web.nhl.com:{server.server_port}/", timeout=5)
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(self.cache._getaddrinfo.calls, 1)
+        self.assertIs(socket.getaddrinfo, getaddrinfo)
+
+    def test_aiohttp_resolver(self):
+        resolver = CachedResolver(self.cache)
+        hosts = asyncio.run(resolver.resolve('statsapi.web.nhl.com', 443))
+        self.assertEqual(hosts[0]['host'], '10.0.0.1')
+        self.assertEqual(hosts[0]['hostname'], 'statsapi.web.nhl.com')
+        self.assertEqual(self.resolver.calls, 1)
+
+    def tearDown(self):
+        pass
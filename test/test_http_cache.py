@@ -0,0 +1,123 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+
+import requests
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils import http_client
+from utils.exceptions import UpstreamUnavailable
+from utils.http_cache import HTTPCache, freshness
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.requests.append(headers)
+        status, response_headers, body = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict(response_headers)
+        response._content = body
+        return response
+
+
+class TestHTTPCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = HTTPCache(self.directory)
+        self.url = 'https://statsapi.web.nhl.com/api/v1/schedule'
+
+    def test_revalidates_with_etag(self):
+        session = FakeSession([
+            (200, {'ETag': '"v1"', 'Content-Type': 'application/json'}, b'{"games": [1, 2]}'),
+            (304, {'ETag': '"v1"'}, b'')
+        ])
+        self.assertEqual(self.cache.get(session, self.url).json(), {'games': [1, 2]})
+        response = self.cache.get(session, self.url)
+        self.assertEqual(session.requests[1]['If-None-Match'], '"v1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.json(), {'games': [1, 2]})
+
+    def test_async_revalidates_with_etag(self):
+        sent = []
+        responses = [
+            (200, {'ETag': '"v1"', 'Content-Type': 'application/json'}, b'{"games": [1, 2]}'),
+            (304, {'ETag': '"v1"'}, b'')
+        ]
+
+        async def fake_get(url, params=None, headers=None, **kwargs):
+            sent.append(headers)
+            status, response_headers, body = responses.pop(0)
+            return status, requests.structures.CaseInsensitiveDict(response_headers), body
+
+        with patch('utils.http_cache.http_client.async_get', side_effect=fake_get):
+            asyncio.run(self.cache.async_get(self.url))
+            status, headers, body = asyncio.run(self.cache.async_get(self.url))
+        self.assertEqual(sent[1]['If-None-Match'], '"v1"')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'{"games": [1, 2]}')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+
+    def test_async_disk_io_off_loop(self):
+        threads = []
+        load, store = self.cache.load, self.cache.store
+        self.cache.load = lambda *args: threads.append(threading.current_thread()) or load(*args)
+        self.cache.store = lambda *args: threads.append(threading.current_thread()) or store(*args)
+
+        async def fake_get(url, params=None, headers=None, **kwargs):
+            return 200, requests.structures.CaseInsensitiveDict({'ETag': '"v1"'}), b'[]'
+
+        with patch('utils.http_cache.http_client.async_get', side_effect=fake_get):
+            asyncio.run(self.cache.async_get(self.url))
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_fresh_response_skips_request(self):
+        session = FakeSession([
+            (200, {'Cache-Control': 'public, max-age=60', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'}, b'[]'),
+        ])
+        self.cache.get(session, self.url)
+        self.assertEqual(self.cache.get(session, self.url).content, b'[]')
+        self.assertEqual(len(session.requests), 1)
+
+    def test_no_store(self):
+        session = FakeSession([
+            (200, {'Cache-Control': 'no-store', 'ETag': '"v1"'}, b'[]'),
+            (200, {'Cache-Control': 'no-store', 'ETag': '"v1"'}, b'[]')
+        ])
+        self.cache.get(session, self.url)
+        self.cache.get(session, self.url)
+        self.assertNotIn('If-None-Match', session.requests[1])
+
+    def test_open_circuit_serves_stale(self):
+        url = 'https://stats.nba.com/stats/scoreboard/'
+        session = FakeSession([(200, {'ETag': '"v1"'}, b'[1]')])
+        self.cache.get(session, url)
+        breaker = http_client.breaker(url)
+        for _ in range(breaker.failure_threshold):
+            breaker.record(False)
+        try:
+            response = self.cache.get(session, url)
+            self.assertTrue(response.stale)
+            self.assertEqual(response.json(), [1])
+            with self.assertRaises(UpstreamUnavailable):
+                self.cache.get(session, f"{url}?GameDate=10/17/2026")
+        finally:
+            breaker.record(True)
+
+    def test_freshness(self):
+        self.assertEqual(freshness({'Cache-Control': 'max-age=30'}, now=100), (True, 130))
+        self.assertEqual(freshness({'Cache-Control': 'no-cache, max-age=30'}, now=100), (True, 0))
+        self.assertEqual(freshness({}, now=100), (True, 0))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
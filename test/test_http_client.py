@@ -0,0 +1,261 @@
+import asyncio
+import datetime
+import requests
+import threading
+
+from aiohttp import web
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils import http_client
+from utils.deadline import deadline, remaining
+from utils.exceptions import JalBotTimeout, UpstreamResponseError, UpstreamUnavailable
+from utils.metrics import METRICS
+
+
+class StalledFirstSession:
+    def __init__(self, stall=True):
+        self.stall = stall
+        self.release = threading.Event()
+        self.calls = 0
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.threads.append(threading.current_thread())
+        if call == 1 and self.stall:
+            self.release.wait()
+        return Reply(call)
+
+
+class Reply:
+    def __init__(self, call):
+        self.call = call
+        self.status_code = 200
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestHTTPClient(TestCase):
+    def test_session_per_host(self):
+        nhl = http_client.session('https://statsapi.web.nhl.com/api/v1/standings')
+        self.assertIs(nhl, http_client.session('https://statsapi.web.nhl.com/api/v1/teams/6'))
+        self.assertIsNot(nhl, http_client.session('https://stats.nba.com/stats/scoreboard/'))
+
+    def test_https_retry_adapter(self):
+        nhl = http_client.session('https://statsapi.web.nhl.com/api/v1/standings')
+        adapter = nhl.get_adapter('https://statsapi.web.nhl.com/api/v1/standings')
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertEqual(adapter._pool_maxsize, 20)
+
+    def serve(self, handler):
+        """
+        Serve handler on a local aiohttp server for the length of the test
+        and return its URL
+        """
+        app = web.Application()
+        app.router.add_get('/', handler)
+        runner = web.AppRunner(app)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+        self.addCleanup(stop)
+        self.addCleanup(http_client.close_async_session)
+        return f"http://127.0.0.1:{port}/"
+
+    def test_async_fan_out_is_bounded(self):
+        active = []
+        peak = []
+
+        async def handler(request):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.05)
+            active.pop()
+            return web.json_response({'ok': True})
+
+        url = self.serve(handler)
+
+        async def fan_out():
+            return await asyncio.gather(*[http_client.async_get_json(url, timeout=5) for _ in range(12)])
+
+        results = asyncio.run(fan_out())
+        self.assertEqual(len(results), 12)
+        self.assertTrue(all(result['ok'] for result in results))
+        self.assertLessEqual(max(peak), 4)
+
+    def test_async_deadline_after_semaphore_wait(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(1)
+            return web.json_response({'ok': True})
+
+        url = self.serve(handler)
+        semaphore = http_client._ASYNC_LIMITS['127.0.0.1'] = asyncio.Semaphore(1)
+        self.addCleanup(http_client._ASYNC_LIMITS.pop, '127.0.0.1')
+
+        async def hold():
+            async with semaphore:
+                await asyncio.sleep(0.3)
+
+        held = asyncio.run_coroutine_threadsafe(hold(), http_client._async_loop())
+        with deadline(0.2):
+            with self.assertRaises(JalBotTimeout):
+                asyncio.run(http_client.async_get_json(url, timeout=5))
+        held.result()
+        self.assertEqual(calls, [])
+
+    def test_async_open_circuit_rejects(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(1)
+            return web.json_response({'ok': True})
+
+        url = self.serve(handler)
+        breaker = http_client.breaker(url)
+        for _ in range(breaker.failure_threshold):
+            breaker.record(False)
+        self.addCleanup(breaker.record, True)
+        with self.assertRaises(UpstreamUnavailable):
+            asyncio.run(http_client.async_get_json(url, timeout=5))
+        self.assertEqual(calls, [])
+
+    def test_cancelled_probe_reopens_circuit(self):
+        started = threading.Event()
+
+        async def handler(request):
+            started.set()
+            await asyncio.sleep(0.5)
+            return web.json_response({'ok': True})
+
+        url = self.serve(handler)
+        breaker = http_client.breaker(url)
+        for _ in range(breaker.failure_threshold):
+            breaker.record(False)
+        self.addCleanup(breaker.record, True)
+        breaker.opened_at -= breaker.reset_timeout
+
+        async def fail():
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            raise ValueError('bad')
+
+        with self.assertRaises(ValueError):
+            http_client.run_concurrently(http_client.async_get_json(url, timeout=5), fail())
+        self.assertTrue(started.is_set())
+        self.assertEqual(breaker.state, 'open')
+        breaker.opened_at -= breaker.reset_timeout
+        self.assertFalse(breaker.blocked())
+
+    def test_async_error_status(self):
+        async def handler(request):
+            return web.Response(status=404, text='Not Found')
+
+        url = self.serve(handler)
+        with self.assertRaises(UpstreamResponseError) as err:
+            asyncio.run(http_client.async_get_json(url, timeout=5, raise_for_status=True))
+        self.assertEqual(err.exception.status, 404)
+
+    @patch('utils.http_client.limiter')
+    def test_open_circuit_skips_rate_limiter(self, mock_limiter):
+        url = 'https://api.mysportsfeeds.com/v2.0/pull/nfl/2018-regular/standings.json'
+        breaker = http_client.breaker(url)
+        for _ in range(breaker.failure_threshold):
+            breaker.record(False)
+        self.addCleanup(breaker.record, True)
+        with self.assertRaises(UpstreamUnavailable):
+            http_client._attempt(http_client.session(url), url, timeout=5)
+        mock_limiter.return_value.wait.assert_not_called()
+
+    @patch('utils.http_client._warm')
+    def test_prewarm_runs_once(self, mock_warm):
+        self.addCleanup(setattr, http_client, '_PREWARMED', http_client._PREWARMED)
+        http_client._PREWARMED = False
+        http_client.prewarm()
+        http_client.prewarm()
+        hosts = http_client.get_http_config().get('hosts', {})
+        self.assertEqual(mock_warm.call_count, len(hosts))
+
+    def test_head_latency_not_sampled(self):
+        host = 'latency.example.com'
+        for method in ('HEAD', 'GET'):
+            response = requests.Response()
+            response.url = f"https://{host}/"
+            response.request = requests.Request(method, response.url).prepare()
+            response.elapsed = datetime.timedelta(seconds=2 if method == 'HEAD' else 0.1)
+            http_client._count_response(response)
+        self.assertEqual(list(http_client._LATENCIES[host]), [0.1])
+
+    def test_run_concurrently(self):
+        cancelled = []
+
+        async def left():
+            return remaining()
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        async def fail():
+            raise ValueError('bad')
+
+        with deadline(30):
+            results = http_client.run_concurrently(left(), left())
+        self.assertTrue(all(0 < result <= 30 for result in results))
+        with self.assertRaises(ValueError):
+            http_client.run_concurrently(slow(), fail())
+        self.assertEqual(cancelled, [1])
+
+    def test_hedge_delay_percentile(self):
+        config = {'percentile': 90, 'delay': 1.0, 'min_delay': 0.1, 'min_samples': 10}
+        self.assertEqual(http_client.hedge_delay('hedge.example.com', config), 1.0)
+        http_client._LATENCIES['hedge.example.com'].extend(i / 10 for i in range(1, 21))
+        self.assertEqual(http_client.hedge_delay('hedge.example.com', config), 1.9)
+
+    @patch('utils.http_client.hedge_delay', return_value=0.01)
+    def test_hedge_wins_on_stall(self, mock_delay):
+        url = 'https://stats.nba.com/stats/scoreboard/'
+        wins = METRICS.counter('http.stats.nba.com.hedge_wins')
+        session = StalledFirstSession()
+        self.addCleanup(session.release.set)
+        response = http_client.hedged_get(session, url)
+        self.assertEqual(response.call, 2)
+        self.assertEqual(METRICS.counter('http.stats.nba.com.hedge_wins'), wins + 1)
+
+    @patch('utils.http_client.hedge_delay', return_value=5)
+    def test_no_hedge_when_fast(self, mock_delay):
+        url = 'https://stats.nba.com/stats/scoreboard/'
+        session = StalledFirstSession(stall=False)
+        self.assertEqual(http_client.hedged_get(session, url).call, 1)
+        self.assertEqual(session.calls, 1)
+
+    @patch('utils.http_client._hedge_submit', return_value=None)
+    def test_busy_hedge_workers_run_on_caller(self, mock_submit):
+        url = 'https://stats.nba.com/stats/scoreboard/'
+        session = StalledFirstSession(stall=False)
+        self.assertEqual(http_client.hedged_get(session, url).call, 1)
+        self.assertEqual(session.threads, [threading.current_thread()])
+
+    def tearDown(self):
+        pass
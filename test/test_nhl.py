@@ -0,0 +1,117 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from fakes import use_nhl_requests
+from libs.nhl import NHL, NHLPlayer, NHLTeam
+from utils.exceptions import NHLRequestException, UpstreamResponseError
+
+TEAM = {'id': 6, 'name': 'Boston Bruins', 'venue': {'name': 'TD Garden'}}
+
+RESPONSES = {
+    'teams/6?expand=team.stats': {'teams': [dict(TEAM, teamStats=[{'splits': []}])]},
+    'teams/6?expand=team.roster': {'teams': [dict(TEAM, roster={'roster': [{'person': {'id': 1}}]})]},
+    'schedule?season=20182019': {'dates': [{
+        'date': '2018-10-03',
+        'games': [{
+            'gameType': 'R',
+            'status': {'abstractGameState': 'Final'},
+            'teams': {
+                'away': {'score': 0, 'team': {'id': 6, 'name': 'Boston Bruins'}},
+                'home': {'score': 7, 'team': {'id': 15, 'name': 'Washington Capitals'}}
+            }
+        }]
+    }]},
+    'people/8473419': {'people': [{'fullName': 'Brad Marchand', 'currentTeam': {'id': 6}}]},
+    'people/8473419/stats?stats=statsSingleSeason&season=20182019': {'stats': [{'splits': [{'stat': {}}]}]},
+    'people/8473419/stats?stats=statsSingleSeason&season=20172018': {'stats': [{'splits': [{'stat': {'goals': 34}}]}]},
+    'people/8473419/stats?stats=yearByYear': {'stats': [{'splits': []}]}
+}
+
+
+class TestNHLTeam(TestCase):
+    def setUp(self):
+        self.requests = use_nhl_requests(self, RESPONSES.__getitem__)
+
+    def test_constructor_makes_no_requests(self):
+        NHLTeam('boston')
+        self.assertEqual(self.requests.urls, [])
+
+    def test_roster_is_one_request(self):
+        team = NHLTeam('boston')
+        self.assertEqual(team.roster, [{'person': {'id': 1}}])
+        self.assertEqual(team.name, 'Boston Bruins')
+        self.assertEqual(self.requests.urls, ['teams/6?expand=team.roster'])
+
+    def test_schedule_is_one_request(self):
+        team = NHLTeam('boston')
+        self.assertEqual(len(team.game_results), 1)
+        self.assertEqual(team.unplayed_games, [])
+        self.assertEqual(team.name, 'Boston Bruins')
+        self.assertEqual(self.requests.urls, ['schedule?season=20182019'])
+
+    def test_info_and_stats_share_a_request(self):
+        team = NHLTeam('boston')
+        self.assertEqual(team.venue, 'TD Garden')
+        self.assertIn('teamStats', team.stats)
+        self.assertEqual(team.name, 'Boston Bruins')
+        self.assertEqual(self.requests.urls, ['teams/6?expand=team.stats'])
+
+    def tearDown(self):
+        pass
+
+
+class TestNHLPlayer(TestCase):
+    def setUp(self):
+        self.requests = use_nhl_requests(self, RESPONSES.__getitem__)
+
+    @patch('libs.nhl.NHLPlayer._get_player_id', return_value='8473419')
+    def test_career_stats_only(self, mock_id):
+        player = NHLPlayer('brad marchand')
+        self.assertEqual(player.career_stats, [])
+        self.assertEqual(self.requests.urls, ['people/8473419/stats?stats=yearByYear'])
+
+    @patch('libs.nhl.NHLPlayer._get_player_id', return_value='8473419')
+    def test_season_stats_reuse_info(self, mock_id):
+        player = NHLPlayer('brad marchand')
+        self.assertEqual(player.season_stats['team'], 6)
+        self.assertEqual(player.info['fullName'], 'Brad Marchand')
+        self.assertEqual(sorted(self.requests.urls), [
+            'people/8473419',
+            'people/8473419/stats?stats=statsSingleSeason&season=20182019'
+        ])
+
+    @patch('libs.nhl.NHLPlayer._get_player_id', return_value='8473419')
+    def test_season_stats_for_season(self, mock_id):
+        player = NHLPlayer('brad marchand')
+        stats = player.season_stats_for('20172018')
+        self.assertEqual(stats['stat'], {'goals': 34})
+        self.assertEqual(stats['team'], 6)
+        self.assertIn('people/8473419/stats?stats=statsSingleSeason&season=20172018', self.requests.urls)
+
+    @patch('libs.nhl.NHLPlayer._get_player_id', return_value='8473419')
+    def test_season_stats_use_passed_info(self, mock_id):
+        player = NHLPlayer('brad marchand')
+        stats = player._get_season_stats(player.player_id, season='20182019', info={'currentTeam': {'id': 1}})
+        self.assertEqual(stats['team'], 1)
+        self.assertEqual(self.requests.urls, ['people/8473419/stats?stats=statsSingleSeason&season=20182019'])
+
+    def tearDown(self):
+        pass
+
+
+class TestNHLRequests(TestCase):
+    def test_requests_return_in_order(self):
+        async def fake_get_json(url, timeout=10, **kwargs):
+            return {'url': url}
+        with patch('libs.nhl.http_cache.async_get_json', side_effect=fake_get_json):
+            data = NHL()._nhl_requests('standings', 'teams/6')
+        self.assertEqual(data, [{'url': 'standings'}, {'url': 'teams/6'}])
+
+    def test_error_status_raises(self):
+        error = UpstreamResponseError('people/0', 404, b'Not Found')
+        with patch('libs.nhl.http_cache.async_get_json', side_effect=error):
+            with self.assertRaises(NHLRequestException):
+                NHL()._nhl_requests('people/0')
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,166 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from fakes import FakeRedis
+from libs import nhl_live
+from libs.nhl_live import GamePoller, LiveGames
+
+
+def game(away=0, home=0, status='Live', period=1, intermission=False, start='2018-10-03T23:00:00Z',
+         detailed_status=None):
+    return {
+        'gamePk': 2018020001,
+        'gameDate': start,
+        'status': {'abstractGameState': status, 'detailedState': detailed_status or status},
+        'teams': {
+            'away': {'score': away, 'team': {'id': 15, 'name': 'Washington Capitals'}},
+            'home': {'score': home, 'team': {'id': 6, 'name': 'Boston Bruins'}}
+        },
+        'linescore': {
+            'currentPeriod': period,
+            'currentPeriodOrdinal': ['', '1st', '2nd', '3rd'][period],
+            'currentPeriodTimeRemaining': '10:00',
+            'intermissionInfo': {'inIntermission': intermission}
+        }
+    }
+
+
+class TestGamePoller(TestCase):
+    def poller(self, *games):
+        fetch = MagicMock(side_effect=[{'dates': [{'games': [g]}]} for g in games])
+        notify = MagicMock()
+        return GamePoller(2018020001, fetch, notify), notify
+
+    def test_reports_score_and_period_changes(self):
+        poller, notify = self.poller(game(status='Preview', period=0), game(), game(home=1),
+                                     game(home=1, intermission=True), game(home=1, period=2),
+                                     game(home=1, period=2, status='Final'))
+        changes = []
+        for _ in range(6):
+            poller.poll()
+            if notify.called:
+                changes.append(notify.call_args[0][2])
+                notify.reset_mock()
+        self.assertEqual(changes, [['Puck drop'], ['Boston Bruins goal'], ['End of 1st period'],
+                                   ['Start of 2nd period'], ['Final']])
+
+    def test_unchanged_state_is_quiet(self):
+        poller, notify = self.poller(game(status='Preview', period=0), game(status='Preview', period=0))
+        poller.poll()
+        poller.poll()
+        self.assertFalse(notify.called)
+
+    def test_interval_adapts_to_game_state(self):
+        poller, _ = self.poller()
+        state = GamePoller.game_state(game())
+        self.assertEqual(poller.interval(state), 10)
+        self.assertEqual(poller.interval(dict(state, intermission=True)), 60)
+        self.assertEqual(poller.interval(dict(state, status='Preview', start='2099-01-01T00:00:00Z')), 600)
+        self.assertEqual(poller.interval(dict(state, status='Preview', start='2018-01-01T00:00:00Z')), 10)
+
+    def test_stops_on_postponed_game(self):
+        poller, notify = self.poller(game(status='Preview', period=0, detailed_status='Postponed'))
+        poller.run()
+        self.assertEqual(poller.fetch.call_count, 1)
+        self.assertFalse(notify.called)
+
+    def test_stops_when_game_never_starts(self):
+        poller, _ = self.poller(game(status='Preview', period=0, start='2018-01-01T00:00:00Z'))
+        poller.run()
+        self.assertEqual(poller.fetch.call_count, 1)
+
+    def test_stops_when_not_kept(self):
+        poller, _ = self.poller(game())
+        poller.keep = MagicMock(return_value=False)
+        poller.run()
+        self.assertFalse(poller.fetch.called)
+        poller.stop()
+        self.assertTrue(poller.stopped)
+
+    def tearDown(self):
+        pass
+
+
+class TestLiveGames(TestCase):
+    def setUp(self):
+        self.live = LiveGames(config={'live': {}, 'emojis': {'6': 'nhl_bos'}})
+        self.live.poster = MagicMock()
+        schedule = MagicMock()
+        schedule.games_on.return_value = [game()]
+        for target, kwargs in (('libs.nhl_live.nhl_schedule.store', {'return_value': schedule}),
+                               ('libs.nhl_live.threading.Thread', {}),
+                               ('libs.nhl_live.LiveGames.start', {})):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_followers_share_one_poller(self):
+        self.assertEqual(self.live.follow(6, 'C1')['gamePk'], 2018020001)
+        self.live.follow(6, 'C2')
+        self.live.follow(15, 'C3')
+        self.assertEqual(list(self.live._pollers), [2018020001])
+        self.assertEqual(self.live.channels(game()), {'C1', 'C2', 'C3'})
+
+    def test_changes_posted_to_followers(self):
+        self.live.follow(6, 'C1')
+        self.live.follow(6, 'C2')
+        self.assertTrue(self.live.unfollow(6, 'C2'))
+        self.assertFalse(self.live.unfollow(6, 'C2'))
+        g = game(home=1)
+        self.live._notify(g, GamePoller.game_state(g), ['Boston Bruins goal'])
+        channel, message = self.live.poster.call_args[0]
+        self.assertEqual(channel, 'C1')
+        self.assertIn(':nhl_bos: *Boston Bruins:* *`1`*', message)
+        self.assertEqual(self.live.poster.call_count, 1)
+
+    def test_unfollowed_games_not_polled(self):
+        self.live.check()
+        self.assertEqual(self.live._pollers, {})
+
+    def test_unfollow_stops_poller(self):
+        self.live.follow(6, 'C1')
+        self.live.follow(15, 'C2')
+        poller = self.live._pollers[2018020001]
+        self.live.unfollow(6, 'C1')
+        self.assertFalse(poller.stopped)
+        self.live.unfollow(15, 'C2')
+        self.assertTrue(poller.stopped)
+
+    def test_postponed_games_not_polled(self):
+        nhl_live.nhl_schedule.store().games_on.return_value = [game(status='Preview', detailed_status='Postponed')]
+        self.assertEqual(self.live.follow(6, 'C1')['gamePk'], 2018020001)
+        self.assertEqual(self.live._pollers, {})
+
+    def test_finished_games_forgotten_next_day(self):
+        self.live._finished.add(2018020001)
+        self.live._finished_date = self.live._today()
+        self.live.follow(6, 'C1')
+        self.assertEqual(self.live._pollers, {})
+        self.live._finished_date = '2018-10-02'
+        self.live.check()
+        self.assertEqual(list(self.live._pollers), [2018020001])
+        self.assertEqual(self.live._finished, set())
+
+    @patch('libs.nhl_live.time.sleep', side_effect=StopIteration)
+    def test_watcher_checks_before_sleeping(self, mock_sleep):
+        self.live.follow(6, 'C1')
+        self.live._pollers.clear()
+        with self.assertRaises(StopIteration):
+            self.live._watch_forever()
+        self.assertEqual(list(self.live._pollers), [2018020001])
+
+    def test_subscriptions_shared_through_redis(self):
+        redis_client = FakeRedis()
+        config = {'live': {}, 'emojis': {}}
+        bot, worker = LiveGames(config, redis_client=redis_client), LiveGames(config, redis_client=redis_client)
+        bot.follow(6, 'C1')
+        self.assertEqual(worker.channels(game()), {'C1'})
+        worker.check()
+        self.assertEqual(list(bot._pollers), [2018020001])
+        self.assertEqual(worker._pollers, {})
+        self.assertTrue(worker.unfollow(6, 'C1'))
+        self.assertFalse(bot.unfollow(6, 'C1'))
+        self.assertFalse(bot._keep_polling(game()))
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,111 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from fakes import FakeRedis
+from libs.nhl_schedule import ScheduleStore
+from utils import codec
+from utils.deadline import deadline
+from utils.exceptions import JalBotTimeout
+
+
+def game(away, home, state, detailed_state=None):
+    return {
+        'gameType': 'R',
+        'status': {'abstractGameState': state, 'detailedState': detailed_state or state},
+        'teams': {
+            'away': {'score': 1, 'team': {'id': away, 'name': f"Team {away}"}},
+            'home': {'score': 2, 'team': {'id': home, 'name': f"Team {home}"}}
+        }
+    }
+
+
+SEASON = {'dates': [
+    {'date': '2018-10-02', 'games': [game(10, 11, 'Preview', 'Postponed')]},
+    {'date': '2018-10-03', 'games': [game(6, 15, 'Final'), game(1, 2, 'Final')]},
+    {'date': '2018-10-04', 'games': [game(2, 6, 'Live')]},
+    {'date': '2018-10-06', 'games': [game(15, 1, 'Preview')]}
+]}
+
+
+class TestScheduleStore(TestCase):
+    def setUp(self):
+        self.urls = []
+
+        def request(url):
+            endpoint = url.replace('https://statsapi.web.nhl.com/api/v1/', '')
+            self.urls.append(endpoint)
+            if endpoint == 'schedule?season=20182019':
+                return SEASON
+            if endpoint == 'schedule?date=2019-04-10':
+                return {'dates': [{'date': '2019-04-10', 'games': [game(6, 10, 'Preview')]}]}
+            return {'dates': [{'date': '2018-10-04', 'games': [game(2, 6, 'Final')]}]}
+
+        for target, kwargs in (('libs.nhl_schedule.ScheduleStore._request', {'side_effect': request}),
+                               ('libs.nhl_schedule.ScheduleStore._today', {'return_value': '2018-10-05'})):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_indexes_by_team_and_date(self):
+        store = ScheduleStore()
+        self.assertEqual([date['date'] for date in store.team_schedule(6)], ['2018-10-03', '2018-10-04'])
+        self.assertEqual(len(store.games_on('2018-10-03')), 2)
+        self.assertEqual(store.games_on('2018-10-05'), [])
+        self.assertEqual(self.urls, ['schedule?season=20182019'])
+
+    def test_refresh_only_requests_unfinished_dates(self):
+        store = ScheduleStore()
+        store.games_on('2018-10-03')
+        self.assertEqual(store.pending_dates(), ['2018-10-04'])
+        store.refresh()
+        self.assertEqual(self.urls[1:], ['schedule?date=2018-10-04'])
+        self.assertEqual(store.team_schedule(6)[1]['games'][0]['status']['abstractGameState'], 'Final')
+        self.assertEqual(store.pending_dates(), [])
+
+    def test_reads_refresh_stale_schedule(self):
+        store = ScheduleStore(refresh_interval=0)
+        store.games_on('2018-10-03')
+        store.games_on('2018-10-03')
+        self.assertEqual(self.urls, ['schedule?season=20182019', 'schedule?date=2018-10-04'])
+
+    def test_persists_to_redis(self):
+        redis_client = FakeRedis()
+        ScheduleStore(redis_client=redis_client).load()
+        self.assertEqual(len(codec.loads(redis_client.values['jalbot:nhl:schedule:20182019'])), 4)
+        self.urls = []
+        store = ScheduleStore(redis_client=redis_client)
+        self.assertEqual(len(store.games_on('2018-10-03')), 2)
+        self.assertEqual(self.urls, ['schedule?date=2018-10-04'])
+
+    def test_dates_outside_season_requested(self):
+        store = ScheduleStore()
+        self.assertEqual(store.games_on('2019-04-10')[0]['teams']['home']['team']['id'], 10)
+        store.games_on('2019-04-10')
+        self.assertEqual(self.urls, ['schedule?season=20182019', 'schedule?date=2019-04-10'])
+        self.assertEqual(store.games_on('2018-10-05'), [])
+        self.assertEqual(len(self.urls), 2)
+
+    def test_wait_for_first_load_bounded_by_deadline(self):
+        store = ScheduleStore()
+        store._load_lock.acquire()
+        self.addCleanup(store._load_lock.release)
+        with deadline(0.1):
+            with self.assertRaises(JalBotTimeout):
+                store.games_on('2018-10-03')
+        self.assertEqual(self.urls, [])
+
+    def test_postponed_dates_not_refreshed(self):
+        store = ScheduleStore()
+        store.load()
+        self.assertEqual(len(store.games_on('2018-10-02')), 1)
+        self.assertNotIn('2018-10-02', store.pending_dates())
+
+    def test_reads_skip_refresh_in_progress(self):
+        store = ScheduleStore(refresh_interval=0)
+        store.load()
+        with store._load_lock:
+            self.assertEqual(len(store.games_on('2018-10-03')), 2)
+        self.assertEqual(self.urls, ['schedule?season=20182019'])
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,72 @@
+import asyncio
+import redis
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from fakes import FakeRedis
+from utils.deadline import deadline
+from utils.exceptions import JalBotTimeout, QuotaExceeded
+from utils.metrics import METRICS
+from utils.ratelimit import RedisTokenBucket, TokenBucket
+
+
+class TestTokenBucket(TestCase):
+    @patch('utils.ratelimit.time')
+    def test_reserve_spaces_out_callers(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    @patch('utils.ratelimit.time')
+    def test_pause(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        bucket = TokenBucket(rate=10, burst=5)
+        bucket.pause(3)
+        self.assertEqual(bucket.reserve(), 3)
+
+    @patch('utils.ratelimit.time')
+    def test_wait_past_deadline_raises(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        bucket = TokenBucket(rate=1, burst=1)
+        bucket.wait()
+        with deadline(0.5):
+            with self.assertRaises(JalBotTimeout):
+                bucket.wait()
+        with self.assertRaises(JalBotTimeout):
+            asyncio.run(bucket.async_wait(limit=0.5))
+        mock_time.sleep.assert_not_called()
+
+    def tearDown(self):
+        pass
+
+
+class TestRedisTokenBucket(TestCase):
+    def test_reserve_uses_shared_delay(self):
+        client = FakeRedis([[b'0', 1], [b'0.5', 2]])
+        bucket = RedisTokenBucket(client, 'api.mysportsfeeds.com', rate=2, burst=1, daily_quota=100)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(METRICS.snapshot()['gauges']['ratelimit.api.mysportsfeeds.com.quota_used'], 2)
+        keys, args = client.calls[0]
+        self.assertEqual(keys[0], 'jalbot:ratelimit:api.mysportsfeeds.com')
+        self.assertTrue(keys[1].startswith('jalbot:ratelimit:api.mysportsfeeds.com:quota:'))
+        self.assertEqual(args[3], 100)
+
+    def test_quota_exceeded(self):
+        bucket = RedisTokenBucket(FakeRedis([[b'-1', 1000]]), 'api.darksky.net', rate=1, daily_quota=1000)
+        with self.assertRaises(QuotaExceeded):
+            bucket.reserve()
+
+    def test_falls_back_to_local_bucket(self):
+        client = FakeRedis([redis.exceptions.ConnectionError('down')])
+        bucket = RedisTokenBucket(client, 'maps.googleapis.com', rate=5, burst=1)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+        self.assertEqual(len(client.calls), 1)
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,44 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils.metrics import METRICS
+from utils.reply_cache import ReplyCache, cache_ttl
+
+
+class TestReplyCache(TestCase):
+    def setUp(self):
+        self.replies = ReplyCache(max_size=2, name='test_replies')
+
+    @patch('utils.reply_cache.time')
+    def test_reply_expires(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        self.replies.set('key', 'reply', 15)
+        mock_time.monotonic.return_value = 114
+        self.assertEqual(self.replies.get('key'), 'reply')
+        mock_time.monotonic.return_value = 116
+        self.assertIsNone(self.replies.get('key'))
+        self.assertEqual(METRICS.counter('test_replies.hits'), 1)
+        self.assertEqual(METRICS.counter('test_replies.misses'), 1)
+
+    @patch('utils.reply_cache.time')
+    def test_expired_reply_removed(self, mock_time):
+        self.replies = ReplyCache(max_size=2, name='test_expired_replies')
+        mock_time.monotonic.return_value = 100
+        self.replies.set('key', 'reply', 15)
+        mock_time.monotonic.return_value = 120
+        self.assertIsNone(self.replies.get('key'))
+        self.assertEqual(len(self.replies), 0)
+        self.assertEqual(self.replies.get_stale('key'), (20, 'reply'))
+        self.replies.set('key', 'new reply', 15)
+        self.assertEqual(len(self.replies), 1)
+        self.assertEqual(self.replies.get_stale('key'), (0, 'new reply'))
+
+    def test_cache_ttl(self):
+        config = {'cache_ttl': {'default': 300, 'scores': 15}}
+        self.assertEqual(cache_ttl(config, 'scores'), 15)
+        self.assertEqual(cache_ttl(config, 'standings'), 300)
+        self.assertEqual(cache_ttl(config, None), 300)
+        self.assertEqual(cache_ttl({}, 'scores'), 0)
+
+    def tearDown(self):
+        pass
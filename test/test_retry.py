@@ -0,0 +1,81 @@
+import asyncio
+import requests
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils.deadline import deadline
+from utils.metrics import METRICS
+from utils.retry import RetryPolicy
+
+
+class Flaky:
+    def __init__(self, failures, error=requests.exceptions.ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('flaky')
+        return 'ok'
+
+
+@patch('utils.retry.time.sleep')
+class TestRetryPolicy(TestCase):
+    def test_retries_transient_errors(self, mock_sleep):
+        flaky = Flaky(2)
+        retries = METRICS.counter('retry.test-transient.retries')
+        self.assertEqual(RetryPolicy('test-transient', attempts=3).call(flaky), 'ok')
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(METRICS.counter('retry.test-transient.retries'), retries + 2)
+
+    def test_gives_up_after_attempts(self, mock_sleep):
+        flaky = Flaky(5)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            RetryPolicy('test-attempts', attempts=3).call(flaky)
+        self.assertEqual(flaky.calls, 3)
+
+    def test_other_errors_not_retried(self, mock_sleep):
+        flaky = Flaky(1, error=KeyError)
+        with self.assertRaises(KeyError):
+            RetryPolicy('test-other').call(flaky)
+        self.assertEqual(flaky.calls, 1)
+
+    def test_non_idempotent_only_retries_connect_errors(self, mock_sleep):
+        policy = RetryPolicy('test-idempotent', idempotent=False)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            policy.call(Flaky(1, error=requests.exceptions.ReadTimeout))
+        self.assertEqual(policy.call(Flaky(1, error=requests.exceptions.ConnectTimeout)), 'ok')
+
+    def test_budget(self, mock_sleep):
+        policy = RetryPolicy('test-budget', attempts=3, budget=2, budget_ratio=0)
+        self.assertEqual(policy.call(Flaky(2)), 'ok')
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            policy.call(Flaky(1))
+
+    def test_backoff_is_capped(self, mock_sleep):
+        policy = RetryPolicy('test-backoff', base_delay=1, max_delay=3)
+        self.assertTrue(all(0 <= policy.backoff(attempt) <= 3 for attempt in range(10)))
+
+    @patch('utils.retry.random.uniform', return_value=5)
+    def test_no_retry_past_deadline(self, mock_uniform, mock_sleep):
+        flaky = Flaky(1)
+        with deadline(1), self.assertRaises(requests.exceptions.ConnectionError):
+            RetryPolicy('test-deadline', base_delay=10, max_delay=10).call(flaky)
+        self.assertEqual(flaky.calls, 1)
+
+    def test_async_call(self, mock_sleep):
+        flaky = Flaky(1, error=asyncio.TimeoutError)
+
+        async def fetch():
+            return flaky()
+
+        policy = RetryPolicy('test-async', base_delay=0.01)
+        self.assertEqual(asyncio.run(policy.async_call(fetch)), 'ok')
+        self.assertEqual(flaky.calls, 2)
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from unittest import TestCase
+
+from utils.singleflight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def setUp(self):
+        self.flight = SingleFlight('test_flight')
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_call(self):
+        self.calls += 1
+        self.release.wait(5)
+        return 'reply'
+
+    def test_concurrent_calls_share_result(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('key', self.slow_call)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ['reply'] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight._calls, {})
+
+    def test_error_is_raised(self):
+        def fail():
+            raise ValueError('upstream down')
+        with self.assertRaises(ValueError):
+            self.flight.do('key', fail)
+        self.assertEqual(self.flight.do('key', lambda: 'ok'), 'ok')
+
+    def tearDown(self):
+        self.release.set()
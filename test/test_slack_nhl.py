@@ -0,0 +1,125 @@
+import datetime
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pytz import timezone
+
+from fakes import use_nhl_requests
+from libs.slack_nhl import SlackNHL
+
+TEAM = {'id': 6, 'name': 'Boston Bruins', 'venue': {'name': 'TD Garden'}}
+STAT = {'wins': 1, 'losses': 0, 'ot': 0, 'pts': 2, 'goalsPerGame': 3.0, 'goalsAgainstPerGame': 1.0,
+        'powerPlayOpportunities': 4, 'powerPlayPercentage': 25.0, 'penaltyKillPercentage': 80.0}
+GAME = {
+    'gameType': 'R',
+    'status': {'abstractGameState': 'Final'},
+    'teams': {
+        'away': {'score': 3, 'team': {'id': 6, 'name': 'Boston Bruins'}, 'leagueRecord': {'wins': 1, 'losses': 0, 'ot': 0}},
+        'home': {'score': 1, 'team': {'id': 15, 'name': 'Washington Capitals'}, 'leagueRecord': {'wins': 0, 'losses': 1, 'ot': 0}}
+    }
+}
+UNPLAYED = dict(GAME, status={'abstractGameState': 'Preview'})
+STANDINGS = {'records': [{
+    'division': {'name': 'Atlantic'},
+    'conference': {'name': 'Eastern'},
+    'teamRecords': [{
+        'team': {'name': 'Boston Bruins'},
+        'divisionRank': '1', 'conferenceRank': '1', 'leagueRank': '1',
+        'leagueRecord': {'wins': 1, 'losses': 0, 'ot': 0}, 'points': 2, 'gamesPlayed': 1
+    }]
+}]}
+
+
+def response(endpoint):
+    if endpoint == 'standings':
+        return STANDINGS
+    if endpoint == 'schedule?season=20182019':
+        today = datetime.datetime.now(timezone('US/Eastern'))
+        yesterday = (today - datetime.timedelta(1)).strftime('%Y-%m-%d')
+        return {'dates': [{'date': '2018-10-03', 'games': [GAME]}, {'date': '2018-10-06', 'games': [UNPLAYED]},
+                          {'date': yesterday, 'games': [GAME]}, {'date': today.strftime('%Y-%m-%d'), 'games': [GAME]}]}
+    if endpoint == 'teams/6?expand=team.stats':
+        return {'teams': [dict(TEAM, teamStats=[{'splits': [{'stat': STAT}, {'stat': STAT}]}])]}
+    if endpoint == 'teams/6?expand=team.roster':
+        roster = [{'person': {'id': 1, 'fullName': 'Brad Marchand'}, 'jerseyNumber': '63', 'position': {'name': 'Left Wing'}}]
+        return {'teams': [dict(TEAM, roster={'roster': roster})]}
+    if endpoint == 'people/8473419':
+        return {'people': [{'fullName': 'Brad Marchand', 'currentTeam': {'id': 6}}]}
+    if endpoint.startswith('people/8473419/stats?stats=statsSingleSeason'):
+        stat = {'games': 1, 'timeOnIce': '20:00', 'goals': 1, 'assists': 1, 'points': 2, 'pim': 0,
+                'plusMinus': 1, 'shifts': 20}
+        return {'stats': [{'splits': [{'stat': stat}]}]}
+    if endpoint == 'people/8473419/stats?stats=yearByYear':
+        return {'stats': [{'splits': [{'season': '20182019', 'stat': {}, 'team': TEAM, 'league': {'name': 'NHL'}}]}]}
+    raise KeyError(endpoint)
+
+
+class TestSlackNHLRequests(TestCase):
+    """
+    Count the statsapi requests each sports option makes
+    """
+    def setUp(self):
+        self.urls = use_nhl_requests(self, response).urls
+        for target, kwargs in (('libs.nhl.NHLPlayer._get_player_id', {'return_value': '8473419'}),
+                               ('libs.slack_nhl.redis.StrictRedis', {})):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def reply(self, option, args=None, team=None, player=None, channel=None):
+        return SlackNHL(args or {}, option, team=team, player=player, channel=channel).reply
+
+    def test_team_stats(self):
+        self.assertIn('TD Garden', self.reply('stats', team='boston'))
+        self.assertEqual(self.urls, ['teams/6?expand=team.stats', 'schedule?season=20182019'])
+
+    def test_team_scores(self):
+        self.assertIn('Boston Bruins Scores', self.reply('scores', team='boston'))
+        self.assertEqual(len(self.urls), 1)
+
+    def test_team_schedule(self):
+        self.assertIn('Boston Bruins Upcoming Games', self.reply('schedule', team='boston'))
+        self.assertEqual(len(self.urls), 1)
+
+    def test_roster(self):
+        self.assertIn('Brad Marchand 63', self.reply('roster', team='boston'))
+        self.assertEqual(self.urls, ['teams/6?expand=team.roster'])
+
+    def test_standings(self):
+        for args in ({}, {'division': True}, {'conference': True}):
+            self.urls.clear()
+            self.reply('standings', args=args)
+            self.assertEqual(self.urls, ['standings'])
+
+    def test_league_schedule(self):
+        self.reply('schedule')
+        self.assertEqual(len(self.urls), 1)
+
+    def test_league_scores(self):
+        self.reply('scores')
+        self.assertEqual(self.urls, ['schedule?season=20182019'])
+
+    def test_schedule_shared_across_replies(self):
+        self.reply('scores')
+        self.reply('schedule', team='boston')
+        self.reply('scores', team='boston')
+        self.assertEqual(self.urls, ['schedule?season=20182019'])
+
+    def test_player_stats(self):
+        self.assertIn('Goals: `1`', self.reply('stats', player='Brad Marchand'))
+        self.assertEqual(len(self.urls), 2)
+
+    def test_career(self):
+        self.reply('career', player='Brad Marchand')
+        self.assertEqual(self.urls, ['people/8473419/stats?stats=yearByYear'])
+
+    @patch('libs.slack_nhl.nhl_live.live_games')
+    def test_follow(self, mock_live):
+        mock_live.return_value.follow.return_value = None
+        self.assertIn('Following Boston Bruins', self.reply('follow', team='boston', channel='C1'))
+        mock_live.return_value.follow.assert_called_with(6, 'C1')
+        self.assertEqual(self.urls, ['schedule?season=20182019'])
+
+    def tearDown(self):
+        pass
@@ -0,0 +1,71 @@
+import aiohttp
+import asyncio
+
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from libs.slack_rtm import SlackRTM
+
+
+async def no_sleep(delay):
+    return None
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+
+class TestSlackRTMReconnect(TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.rtm = SlackRTM(self.client, MagicMock())
+        patcher = patch('libs.slack_rtm.asyncio.sleep', side_effect=no_sleep)
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_connections_back_off(self):
+        self.client.api_call.side_effect = aiohttp.ClientConnectionError('down')
+        with patch.object(self.rtm.backoff, 'backoff', side_effect=lambda attempt: attempt + 1) as backoff:
+            for _ in range(3):
+                self.rtm.connect()
+        self.assertEqual([c[0][0] for c in backoff.call_args_list], [0, 1, 2])
+        self.assertEqual([c[0][0] for c in self.sleep.call_args_list], [1, 2, 3])
+
+    def test_missing_url_backs_off(self):
+        self.client.api_call.return_value = {'ok': False, 'error': 'invalid_auth'}
+        self.rtm.connect()
+        self.assertEqual(self.rtm.failures, 1)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_malformed_frames_skipped(self):
+        frames = ['not json', '[1, 2]', '{"type": "message", "text": "hi"}', '{"type": "goodbye"}']
+        ws = FakeWebSocket([aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, frame, None) for frame in frames])
+        session = MagicMock()
+        session.ws_connect.return_value = ws
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        with patch('libs.slack_rtm.aiohttp.ClientSession', return_value=session):
+            asyncio.run(self.rtm.read_frames('wss://example.com'))
+        self.rtm.on_event.assert_called_once_with({'type': 'message', 'text': 'hi'})
+
+    def test_backoff_is_capped(self):
+        for attempt in range(20):
+            self.assertLessEqual(self.rtm.backoff.backoff(attempt), 30)
+
+    def tearDown(self):
+        pass
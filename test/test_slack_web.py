@@ -0,0 +1,58 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from libs.slack_web import SlackWebDispatcher
+
+
+class TestSlackWebDispatcher(TestCase):
+    def setUp(self):
+        self.client = Mock()
+        self.client.api_call.return_value = {'ok': True}
+        self.web = SlackWebDispatcher(self.client, {'spinner_delay': 5})
+        self.addCleanup(self.web.loop.call_soon_threadsafe, self.web.loop.stop)
+
+    def reactions(self, method):
+        return [c[1]['name'] for c in self.client.api_call.call_args_list if c[0][0] == method]
+
+    def test_fast_reply_skips_spinner(self):
+        self.web.start('C1', '1.0').result(timeout=1)
+        self.web.finish('C1', '1.0', {'text': 'hi'}, 'robot_face').result(timeout=1)
+        self.assertEqual(self.reactions('reactions.add'), ['robot_face'])
+        self.assertEqual(self.reactions('reactions.remove'), [])
+        self.assertEqual(self.web._spinners, {})
+
+    def test_slow_reply_swaps_spinner(self):
+        self.web.spinner_delay = 0
+        self.web.start('C1', '1.0').result(timeout=1)
+        self.web.call('auth.test').result(timeout=1)
+        self.web.finish('C1', '1.0', {'text': 'hi'}, 'robot_face').result(timeout=1)
+        self.assertEqual(self.reactions('reactions.add'), ['spinning', 'robot_face'])
+        self.assertEqual(self.reactions('reactions.remove'), ['spinning'])
+
+    def test_cancel_drops_spinner(self):
+        self.web.start('C1', '1.0').result(timeout=1)
+        self.web.cancel('C1', '1.0').result(timeout=1)
+        self.assertEqual(self.web._spinners, {})
+        self.assertEqual(self.client.api_call.call_count, 0)
+
+    def test_cancel_after_finish_does_nothing(self):
+        self.web.start('C1', '1.0').result(timeout=1)
+        self.web.finish('C1', '1.0', None, 'hourglass')
+        self.web.cancel('C1', '1.0').result(timeout=1)
+        self.assertEqual(self.reactions('reactions.add'), ['hourglass'])
+        self.assertEqual(self.reactions('reactions.remove'), [])
+
+    def test_ratelimited_call_is_retried(self):
+        self.client.api_call.side_effect = [
+            {'ok': False, 'error': 'ratelimited', 'headers': {'Retry-After': '7'}},
+            {'ok': True, 'ts': '2.0'}
+        ]
+        bucket = self.web._buckets['chat.postMessage']
+        bucket.pause = Mock()
+        response = self.web.call('chat.postMessage', channel='C1', text='hi').result(timeout=1)
+        self.assertEqual(response, {'ok': True, 'ts': '2.0'})
+        self.assertEqual(self.client.api_call.call_count, 2)
+        bucket.pause.assert_called_once_with(7)
+
+    def tearDown(self):
+        pass
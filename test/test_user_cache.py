@@ -0,0 +1,59 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from utils.user_cache import UserDirectory
+
+
+class TestUserDirectory(TestCase):
+    def setUp(self):
+        self.users = UserDirectory(ttl=60, max_size=2)
+
+    def test_get_and_evict(self):
+        self.users.set({'id': 'U1', 'name': 'one'})
+        self.users.set({'id': 'U2', 'name': 'two'})
+        self.assertEqual(self.users.get('U1')['name'], 'one')
+        self.users.set({'id': 'U3', 'name': 'three'})
+        self.assertIsNone(self.users.get('U2'))
+        self.assertEqual(self.users.get('U1')['name'], 'one')
+
+    @patch('utils.user_cache.time')
+    def test_expired_user(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        self.users.set({'id': 'U1', 'name': 'one'})
+        mock_time.monotonic.return_value = 161
+        self.assertIsNone(self.users.get('U1'))
+
+    def test_prewarm_pages(self):
+        web = Mock()
+        web.call.return_value.result.side_effect = [
+            {'ok': True, 'members': [{'id': 'U1'}], 'response_metadata': {'next_cursor': 'abc'}},
+            {'ok': True, 'members': [{'id': 'U2'}], 'response_metadata': {'next_cursor': ''}}
+        ]
+        self.users.prewarm(web)
+        self.assertEqual(web.call.call_count, 2)
+        web.call.assert_called_with('users.list', limit=200, cursor='abc')
+        self.assertEqual(len(self.users), 2)
+
+    @patch('utils.user_cache.time')
+    def test_prewarm_once_per_ttl(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        web = Mock()
+        web.call.return_value.result.return_value = {'ok': True, 'members': [{'id': 'U1'}]}
+        self.users.prewarm(web)
+        mock_time.monotonic.return_value = 159
+        self.users.prewarm(web)
+        self.assertEqual(web.call.call_count, 1)
+        mock_time.monotonic.return_value = 161
+        self.users.prewarm(web)
+        self.assertEqual(web.call.call_count, 2)
+
+    def test_failed_prewarm_is_retried(self):
+        web = Mock()
+        web.call.return_value.result.side_effect = [{'ok': False, 'error': 'ratelimited'},
+                                                       {'ok': True, 'members': []}]
+        self.users.prewarm(web)
+        self.users.prewarm(web)
+        self.assertEqual(web.call.call_count, 2)
+
+    def tearDown(self):
+        pass
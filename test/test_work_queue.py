@@ -0,0 +1,63 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from fakes import FakeRedis
+from utils import codec
+from utils.work_queue import RedisWorkQueue
+import worker
+
+
+EVENT = {'channel': 'C1', 'ts': '1.0', 'text': 'jalbot sports scores -l nhl'}
+
+
+class TestRedisWorkQueue(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.queue = RedisWorkQueue(queue='test:commands', max_queue=2, redis_client=self.redis)
+
+    def test_submit_and_pop(self):
+        self.assertTrue(self.queue.submit('C1', 'sports', EVENT))
+        self.assertEqual(self.queue.depth, 1)
+        job = codec.loads(self.redis.lists['test:commands'][0])
+        self.assertEqual(job['command'], 'sports')
+        self.assertEqual(self.queue.pop(), ('sports', EVENT))
+        self.assertIsNone(self.queue.pop())
+
+    def test_reject_when_full(self):
+        self.assertTrue(self.queue.submit('C1', 'sports', EVENT))
+        self.assertTrue(self.queue.submit('C1', 'sports', EVENT))
+        self.assertFalse(self.queue.submit('C1', 'sports', EVENT))
+        self.assertEqual(self.queue.depth, 2)
+
+    def test_jobs_run_in_order(self):
+        self.queue.submit('C1', 'sports', EVENT)
+        self.queue.submit('C2', 'weather', dict(EVENT, channel='C2'))
+        self.assertEqual(self.queue.pop()[0], 'sports')
+        self.assertEqual(self.queue.pop()[0], 'weather')
+
+    def tearDown(self):
+        pass
+
+
+class TestWorker(TestCase):
+    def setUp(self):
+        self.queue = RedisWorkQueue(queue='test:commands', max_queue=2, redis_client=FakeRedis())
+        self.bot = MagicMock()
+
+    def test_runs_queued_command(self):
+        self.queue.submit('C1', 'sports', EVENT)
+        self.assertTrue(worker.run_job(self.bot, self.queue))
+        self.bot.web.start.assert_called_with('C1', '1.0')
+        self.bot.handle_message.assert_called_with('sports', EVENT)
+
+    def test_empty_queue(self):
+        self.assertFalse(worker.run_job(self.bot, self.queue))
+        self.assertFalse(self.bot.handle_message.called)
+
+    def test_command_error_keeps_worker_running(self):
+        self.bot.handle_message.side_effect = RuntimeError('boom')
+        self.queue.submit('C1', 'sports', EVENT)
+        self.assertTrue(worker.run_job(self.bot, self.queue))
+
+    def tearDown(self):
+        pass